@@ -0,0 +1,88 @@
+"""
+Encode/decode throughput of every registered codec on typical RPC messages.
+
+Usage::
+
+    python benchmarks/bench_codecs.py [--seconds 0.5]
+
+Prints one row per (message, codec) with encoded size and the best of five
+runs in microseconds per operation.  Codecs that cannot represent a message
+(for example JSON with integer map keys) are reported as skipped.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xuri_rpc.codec import availableCodecs, getCodec  # noqa: E402
+
+SMALL_CALL = {
+    'id': '6f1c2a9e-0d51-4c55-9a8e-1f6d2b7c9e01', 'objectId': 'main', 'method': 'add',
+    'args': [{'type': 'data', 'data': 1}, {'type': 'data', 'data': 2}],
+    'meta': {'sessionId': 'c0b7f4b2-55a2-4e5b-8b3b-0c9a4c2f6a11'},
+}
+
+PROXY_REPLY = {
+    'idFor': '6f1c2a9e-0d51-4c55-9a8e-1f6d2b7c9e01', 'status': 200, 'trace': None,
+    'data': {'type': 'data', 'data': [
+        {'__is_rpc_proxy__': True, 'hostId': 'server0', 'id': f'obj-{i}',
+         'members': [{'name': name, 'type': 'function'} for name in ('get', 'set', 'close')]}
+        for i in range(20)
+    ]},
+}
+
+RECORDS = {
+    'id': 'r', 'objectId': 'main', 'method': 'store',
+    'args': [{'type': 'data', 'data': [
+        {'name': f'user{i}', 'age': i % 90, 'score': i * 1.5, 'tags': ['a', 'b'], 'active': bool(i % 2)}
+        for i in range(500)
+    ]}],
+    'meta': {},
+}
+
+BYTES_ARG = {
+    'id': 'b', 'objectId': 'main', 'method': 'upload',
+    'args': [{'type': 'data', 'data': os.urandom(64 * 1024)}],
+    'meta': {},
+}
+
+MESSAGES = {
+    'small_call': SMALL_CALL,
+    'proxy_reply': PROXY_REPLY,
+    'records_500': RECORDS,
+    'bytes_64k': BYTES_ARG,
+}
+
+
+def _bestPerOp(func, seconds: float) -> float:
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * seconds / max(elapsed, 1e-9)))
+    return min(timer.repeat(5, number)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=0.2, help='approximate time per measurement')
+    args = parser.parse_args()
+
+    print(f"{'message':<13} {'codec':<8} {'bytes':>9} {'encode us':>10} {'decode us':>10}")
+    for label, message in MESSAGES.items():
+        for name in availableCodecs():
+            codec = getCodec(name)
+            try:
+                data = codec.encode(message)
+                if codec.decode(data) != message:
+                    raise ValueError('lossy round trip')
+            except (TypeError, ValueError) as e:
+                print(f"{label:<13} {name:<8} skipped: {e}")
+                continue
+            enc = _bestPerOp(lambda: codec.encode(message), args.seconds)
+            dec = _bestPerOp(lambda: codec.decode(data), args.seconds)
+            print(f"{label:<13} {name:<8} {len(data):>9} {enc * 1e6:>10.1f} {dec * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
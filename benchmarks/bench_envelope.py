@@ -0,0 +1,94 @@
+"""
+Dict envelope vs compact envelope for small calls.
+
+Usage::
+
+    python benchmarks/bench_envelope.py [--calls 20000]
+
+Part one measures wire size and encode+decode time of a small request and
+of a reply carrying proxy descriptors, for every codec that has a compact
+variant.  Part two runs ``--calls`` sequential small calls through an
+in-process DumpChannel with each envelope and reports calls per second.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xuri_rpc.codec import COMPACT_SUFFIX, availableCodecs, getCodec  # noqa: E402
+from xuri_rpc.local_serialization_sender import DumpChannel, createMain, createServer  # noqa: E402
+
+SMALL_CALL = {
+    'id': 'client0-1f', 'objectId': 'main', 'method': 'add',
+    'args': [1, 2],
+    'meta': {'sessionId': 'c0b7f4b2-55a2-4e5b-8b3b-0c9a4c2f6a11'},
+}
+
+SMALL_REPLY = {'idFor': 'client0-1f', 'status': 200, 'data': 3}
+
+PROXY_REPLY = {
+    'idFor': 'client0-20', 'status': 200,
+    'data': [
+        {'__is_rpc_proxy__': '__is_rpc_proxy__', 'hostId': 'server0', 'id': f'obj-{i}',
+         'members': [{'name': name, 'type': 'function'} for name in ('get', 'set', 'close')]}
+        for i in range(10)
+    ],
+}
+
+MESSAGES = {'small_call': SMALL_CALL, 'small_reply': SMALL_REPLY, 'proxy_reply': PROXY_REPLY}
+
+
+class Adder:
+    def add(self, a, b):
+        return a + b
+
+
+def _perOp(func) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+async def _callsPerSecond(codecName: str, calls: int) -> float:
+    channel = DumpChannel(codecName)
+    serve = await createServer(f'benchServer-{codecName}', channel)
+    serve(Adder())
+    _client, main = await createMain(f'benchClient-{codecName}', channel)
+    for _ in range(100):
+        await main.add(1, 2)
+    start = time.perf_counter()
+    for i in range(calls):
+        await main.add(i, 1)
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    bases = [n for n in availableCodecs() if n + COMPACT_SUFFIX in availableCodecs()]
+
+    print(f"{'message':<12} {'codec':<16} {'bytes':>6} {'round trip us':>14}")
+    for label, message in MESSAGES.items():
+        for base in bases:
+            for name in (base, base + COMPACT_SUFFIX):
+                codec = getCodec(name)
+                data = codec.encode(message)
+                rt = _perOp(lambda: codec.decode(codec.encode(message)))
+                print(f"{label:<12} {name:<16} {len(data):>6} {rt * 1e6:>14.2f}")
+
+    print()
+    print(f"{'codec':<16} {'calls/s':>10}")
+    for base in bases:
+        for name in (base, base + COMPACT_SUFFIX):
+            rate = asyncio.run(_callsPerSecond(name, args.calls))
+            print(f"{name:<16} {rate:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
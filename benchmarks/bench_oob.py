@@ -0,0 +1,80 @@
+"""
+Multi-MB payloads over TCP with inline vs out-of-band bytes.
+
+Usage::
+
+    python benchmarks/bench_oob.py [--sizes 1,8,32] [--rounds 10]
+
+For each payload size (MiB) the client uploads the payload (the server
+returns its length) and echoes it (the payload travels both ways), once
+with the bytes embedded in the CBOR document and once with
+``oob_threshold`` enabled.  Prints the best time per call and throughput.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'xuri-rpc-tcp'))
+
+from xuri_rpc_tcp import createMain, createServer  # noqa: E402
+
+MiB = 1024 * 1024
+
+
+class Sink:
+    def upload(self, data):
+        return len(data)
+
+    def echo(self, data):
+        return data
+
+
+async def _run(port: int, threshold: int, sizes, rounds: int):
+    serve, server = await createServer(f'benchOobServer{port}', 'localhost', port)
+    serve_task = asyncio.ensure_future(serve(Sink()))
+    client, main = await createMain(
+        f'benchOobClient{port}', 'localhost', port,
+        max_retries=1, oob_threshold=threshold,
+    )
+    rows = []
+    try:
+        for size in sizes:
+            payload = os.urandom(size * MiB)
+            for method in ('upload', 'echo'):
+                call = getattr(main, method)
+                await call(payload)
+                best = float('inf')
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    await call(payload)
+                    best = min(best, time.perf_counter() - start)
+                moved = size * (2 if method == 'echo' else 1)
+                rows.append((size, method, best, moved / best))
+    finally:
+        client.useSender().stream[1].close()
+        await asyncio.sleep(0.1)
+        server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1,8,32', help='payload sizes in MiB')
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    print(f"{'MiB':>4} {'call':<7} {'mode':<7} {'ms/call':>9} {'MiB/s':>8}")
+    for port, mode, threshold in ((18891, 'inline', 0), (18892, 'oob', 64 * 1024)):
+        for size, method, best, rate in asyncio.run(_run(port, threshold, sizes, args.rounds)):
+            print(f"{size:>4} {method:<7} {mode:<7} {best * 1e3:>9.2f} {rate:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,10 @@
 Test helpers mirroring __tests__/base.ts.
 """
 import asyncio
+import contextlib
 from typing import Any, Callable, Optional
 
-from xuri_rpc.rpc import Client, MessageReceiver, setHostId
+from xuri_rpc.rpc import Client, ISender, MessageReceiver, _options, setHostId
 from xuri_rpc.local_serialization_sender import DumpChannel, createServer, createMain
 
 _id_counter = 0
@@ -26,11 +27,104 @@ async def mainFunc(
     server_id = (customHostIds or {}).get('serverId') or f'server{idx}'
     client_id = (customHostIds or {}).get('clientId') or f'client{idx}'
 
+    _receiver, client, main = await connectDump(server_id, client_id, mainObject)
+    await testProcess(client, main, server_id)
+
+
+async def connectDump(server_id: str, client_id: str, service: Any):
+    """
+    Serve *service* over a fresh DumpChannel and connect a client to it.
+
+    Returns ``(server_receiver, client, main)``.
+    """
     channel = DumpChannel()
     serve = await createServer(server_id, channel)
-    _recv, _serve = serve(mainObject)
+    receiver, _serve = serve(service)
     client, main = await createMain(client_id, channel)
-    await testProcess(client, main, server_id)
+    return receiver, client, main
+
+
+@contextlib.asynccontextmanager
+async def tcpPair(port: int, service: Any, name: str = 'tcp', server_kwargs: Optional[dict] = None, **client_kwargs):
+    """
+    Serve *service* over TCP on *port* and yield ``(client, main)`` of a
+    client connected to it (hosts ``<name>Server<port>`` and
+    ``<name>Client<port>``).
+
+    On exit the connection and server are closed and both hosts are
+    dropped.  The client gives up after one reconnect attempt unless
+    *max_retries* says otherwise.
+    """
+    from xuri_rpc_tcp import createServer as tcpServer, createMain as tcpMain
+
+    server_id = f'{name}Server{port}'
+    client_id = f'{name}Client{port}'
+    serve, tcp_server = await tcpServer(server_id, 'localhost', port, **(server_kwargs or {}))
+    serve_task = asyncio.ensure_future(serve(service))
+    client = None
+    try:
+        client_kwargs.setdefault('max_retries', 1)
+        client, main = await tcpMain(client_id, 'localhost', port, **client_kwargs)
+        yield client, main
+    finally:
+        if client is not None:
+            client.useSender().stream[1].close()
+        tcp_server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost(client_id)
+        dropHost(server_id)
+
+
+class RecordingSender(ISender):
+    """Delivers each message to *msg_receiver* and keeps a copy in ``sent``.
+
+    Delivery runs as its own task after *latency* seconds, like a real
+    transport; ``inline=True`` awaits it inside ``send`` instead.
+    """
+
+    def __init__(self, client_callback, msg_receiver, inline: bool = False, latency: float = 0):
+        self.client_callback = client_callback
+        self.msg_receiver = msg_receiver
+        self.inline = inline
+        self.latency = latency
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(dict(message))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.inline:
+            await self.msg_receiver.onReceiveMessage(message, self.client_callback)
+        else:
+            asyncio.ensure_future(self.msg_receiver.onReceiveMessage(message, self.client_callback))
+
+
+def connectRecorded(server_id: str, client_id: str, service: Any, **senderOptions):
+    """
+    Wire a client to a receiver serving *service* through two
+    :class:`RecordingSender` objects.
+
+    Returns ``(client, server_receiver, server_client, to_server, to_client)``.
+    """
+    server_receiver = MessageReceiver(server_id)
+    server_receiver.setMain(service)
+    client_receiver = MessageReceiver(client_id)
+    client = Client(client_id)
+    server_client = Client(server_id)
+    to_server = RecordingSender(server_client, server_receiver, **senderOptions)
+    to_client = RecordingSender(client, client_receiver, **senderOptions)
+    client.setSender(lambda: to_server)
+    server_client.setSender(lambda: to_client)
+    return client, server_receiver, server_client, to_server, to_client
+
+
+def dropHost(hostId: str) -> None:
+    """
+    Forget the process-wide state of *hostId*, so that later tests (and
+    ``autoReRegister``) do not reach for a connection a test has closed.
+    """
+    _options.pop(hostId, None)
 
 
 def assert_true(condition: bool, text: Optional[str] = None):
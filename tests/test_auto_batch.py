@@ -0,0 +1,82 @@
+"""test_auto_batch.py — 同一事件循环周期内请求自动合并测试"""
+import asyncio
+import pytest
+
+from .base_test import connectRecorded, dropHost
+
+
+class KeyService:
+    async def get(self, key):
+        await asyncio.sleep(0.01)
+        return key * 2
+
+
+@pytest.mark.asyncio
+async def test_requests_in_one_tick_share_a_frame():
+    client, _receiver, _server_client, to_server, to_client = connectRecorded(
+        'autoBatchServer1', 'autoBatchClient1', KeyService()
+    )
+    main = await client.getMain()
+    client.setAutoBatch(0)
+    sent_before = len(to_server.sent)
+
+    results = await asyncio.gather(*(main.get(k) for k in range(10)))
+
+    assert results == [k * 2 for k in range(10)]
+    assert len(to_server.sent) == sent_before + 1
+    assert len(to_server.sent[-1]['frames']) == 10
+    # replies finishing together are coalesced by the server's writer
+    assert any('frames' in m for m in to_client.sent)
+
+
+@pytest.mark.asyncio
+async def test_window_collects_requests_across_ticks():
+    client, _receiver, _server_client, to_server, _to_client = connectRecorded(
+        'autoBatchServer2', 'autoBatchClient2', KeyService()
+    )
+    main = await client.getMain()
+    client.setAutoBatch(20000)
+    sent_before = len(to_server.sent)
+
+    first = asyncio.ensure_future(main.get(1))
+    await asyncio.sleep(0.005)
+    second = asyncio.ensure_future(main.get(2))
+    assert await asyncio.gather(first, second) == [2, 4]
+    assert len(to_server.sent) == sent_before + 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_is_never_sent():
+    client, _receiver, _server_client, to_server, _to_client = connectRecorded(
+        'autoBatchServer3', 'autoBatchClient3', KeyService()
+    )
+    main = await client.getMain()
+    client.setAutoBatch(20000)
+    sent_before = len(to_server.sent)
+
+    call = asyncio.ensure_future(main.get(1))
+    await asyncio.sleep(0)
+    call.cancel()
+    await asyncio.gather(call, return_exceptions=True)
+    await asyncio.sleep(0.03)
+    assert len(to_server.sent) == sent_before
+    assert not client._getReqPending()
+
+
+@pytest.mark.asyncio
+async def test_tcp_splits_frames_back_out():
+    from xuri_rpc_tcp import createServer, createMain
+
+    serve, tcp_server = await createServer('autoBatchTcpServer', 'localhost', 18831)
+    serve_task = asyncio.ensure_future(serve(KeyService()))
+    client, main = await createMain('autoBatchTcpClient', 'localhost', 18831, max_retries=1)
+    try:
+        client.setAutoBatch(0)
+        results = await asyncio.gather(*(main.get(k) for k in range(20)))
+        assert results == [k * 2 for k in range(20)]
+    finally:
+        client.useSender().stream[1].close()
+        tcp_server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('autoBatchTcpClient')
@@ -0,0 +1,92 @@
+"""test_batch.py — 批量调用帧测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import RpcRemoteError
+from .base_test import connectRecorded
+
+
+class Store:
+    def __init__(self):
+        self.log = []
+        self.data = {}
+
+    async def put(self, key, value, delay=0):
+        await asyncio.sleep(delay)
+        self.log.append(key)
+        self.data[key] = value
+        return key
+
+    def get(self, key):
+        return self.data[key]
+
+    def other(self):
+        return Other()
+
+
+class Other:
+    def hello(self, name):
+        return f'hello {name}'
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_one_frame_with_per_call_status():
+    store = Store()
+    client, _receiver, _server_client, to_server, _to_client = connectRecorded('batchServer1', 'batchClient1', store)
+    main = await client.getMain()
+    other = await main.other()
+    sent_before = len(to_server.sent)
+
+    async with client.batch() as b:
+        put = b.call(main.put, 'a', 1)
+        hello = b.call(other.hello, 'x')
+        missing = b.call(main.get, 'nope')
+
+    assert len(to_server.sent) == sent_before + 1
+    assert len(to_server.sent[-1]['batch']) == 3
+    assert put.result() == 'a'
+    assert hello.result() == 'hello x'
+    with pytest.raises(RpcRemoteError):
+        missing.result()
+    assert not client._getReqPending()
+
+
+@pytest.mark.asyncio
+async def test_ordered_batch_runs_calls_in_sequence():
+    store = Store()
+    client, *_ = connectRecorded('batchServer2', 'batchClient2', store)
+    main = await client.getMain()
+
+    async with client.batch(ordered=True) as b:
+        b.call(main.put, 'slow', 1, 0.05)
+        b.call(main.put, 'fast', 2)
+    assert store.log == ['slow', 'fast']
+
+    store.log.clear()
+    async with client.batch() as b:
+        b.call(main.put, 'slow', 1, 0.05)
+        b.call(main.put, 'fast', 2)
+    assert store.log == ['fast', 'slow']
+
+
+@pytest.mark.asyncio
+async def test_batch_falls_back_to_single_calls():
+    store = Store()
+    client, _receiver, _server_client, to_server, _to_client = connectRecorded('batchServer3', 'batchClient3', store)
+    client.features = set()
+    main = await client.getMain()
+    sent_before = len(to_server.sent)
+
+    async with client.batch() as b:
+        first = b.call(main.put, 'a', 1)
+        second = b.call(main.put, 'b', 2)
+
+    assert len(to_server.sent) == sent_before + 2
+    assert (first.result(), second.result()) == ('a', 'b')
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_local_callables():
+    client, *_ = connectRecorded('batchServer4', 'batchClient4', Store())
+    with pytest.raises(TypeError):
+        client.batch().call(print, 1)
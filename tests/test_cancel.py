@@ -0,0 +1,93 @@
+"""test_cancel.py — 远程取消进行中的调用测试"""
+import asyncio
+import pytest
+
+from xuri_rpc_tcp import createServer, createMain
+from .base_test import dropHost, mainFunc, tcpPair
+
+
+class SlowService:
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    async def slow(self, tag, seconds):
+        self.started.append(tag)
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            self.cancelled.append(tag)
+            raise
+        self.finished.append(tag)
+        return tag
+
+    def fast(self, x):
+        return x + 1
+
+    async def runner(self):
+        return asyncio.current_task().get_coro().__qualname__
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_remote_handler():
+    service = SlowService()
+
+    async def check(_client, main, sid):
+        assert await main.fast(1) == 2
+        call = asyncio.ensure_future(main.slow('a', 0.5))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert not _client._getReqPending()
+        await asyncio.sleep(0.05)
+        assert service.cancelled == ['a']
+        assert service.finished == []
+        assert await main.fast(2) == 3
+
+    await mainFunc(service, check)
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_request_over_tcp():
+    service = SlowService()
+    serve, tcp_server = await createServer(
+        'cancelServer', 'localhost', 18821, max_inflight_per_connection=1
+    )
+    serve_task = asyncio.ensure_future(serve(service))
+    client, main = await createMain('cancelClient', 'localhost', 18821, max_retries=1)
+    try:
+        assert await main.fast(1) == 2
+        first = asyncio.ensure_future(main.slow('first', 0.2))
+        await asyncio.sleep(0.02)
+        queued = asyncio.ensure_future(main.slow('queued', 0.01))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert await first == 'first'
+        await asyncio.sleep(0.05)
+        assert service.started == ['first']
+        assert not client._getReqPending()
+    finally:
+        client.useSender().stream[1].close()
+        tcp_server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('cancelClient')
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_request_over_tcp():
+    service = SlowService()
+    async with tcpPair(18822, service, 'cancel') as (client, main):
+        assert await main.fast(1) == 2
+        # the handler runs in the dispatcher's own task, not in a wrapper
+        assert await main.runner() == 'ConcurrentDispatcher._run'
+        call = asyncio.ensure_future(main.slow('a', 0.5))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        assert service.cancelled == ['a']
+        assert await main.fast(2) == 3
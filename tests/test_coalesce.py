@@ -0,0 +1,91 @@
+"""test_coalesce.py — 相同并发调用的单飞合并测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import Client, coalesce
+from .base_test import connectRecorded
+
+
+class Users:
+    def __init__(self):
+        self.runs = 0
+
+    @coalesce
+    async def getUser(self, uid):
+        self.runs += 1
+        await asyncio.sleep(0.02)
+        return {'id': uid, 'run': self.runs}
+
+    async def plain(self, uid):
+        self.runs += 1
+        await asyncio.sleep(0.02)
+        return uid
+
+
+@pytest.mark.asyncio
+async def test_client_sends_one_request_for_identical_calls():
+    service = Users()
+    client, _receiver, _server_client, to_server, _to_client = connectRecorded(
+        'coalesceServer1', 'coalesceClient1', service
+    )
+    main = await client.getMain()
+    sent_before = len(to_server.sent)
+
+    results = await asyncio.gather(*(main.getUser(42) for _ in range(50)), main.getUser(7))
+
+    assert len(to_server.sent) == sent_before + 2
+    assert service.runs == 2
+    assert all(r['id'] == 42 for r in results[:50])
+    results[0]['id'] = 0
+    assert results[1]['id'] == 42
+    assert not client._sharedCalls
+
+    await asyncio.gather(*(main.plain(1) for _ in range(3)))
+    assert service.runs == 5
+
+
+@pytest.mark.asyncio
+async def test_server_runs_identical_requests_once():
+    service = Users()
+    client, receiver, server_client, *_ = connectRecorded('coalesceServer2', 'coalesceClient2', service)
+    await client.getMain()
+
+    def request(i):
+        return {'id': 1000 + i, 'meta': {}, 'objectId': 'main', 'method': 'getUser', 'args': [5]}
+
+    replies = await asyncio.gather(*(receiver._handleRequest(request(i), server_client) for i in range(5)))
+    assert service.runs == 1
+    assert [r['status'] for r in replies] == [200] * 5
+    assert not receiver._sharedRuns
+
+
+@pytest.mark.asyncio
+async def test_other_connections_do_not_join_a_shared_call():
+    service = Users()
+    client, receiver, server_client, *_ = connectRecorded('coalesceServer4', 'coalesceClient4', service)
+    await client.getMain()
+    other_connection = Client('coalesceServer4')
+
+    def request(i):
+        return {'id': 2000 + i, 'meta': {}, 'objectId': 'main', 'method': 'getUser', 'args': [5]}
+
+    replies = await asyncio.gather(
+        receiver._handleRequest(request(0), server_client),
+        receiver._handleRequest(request(1), server_client),
+        receiver._handleRequest(request(2), other_connection),
+    )
+    assert service.runs == 2
+    assert [r['status'] for r in replies] == [200] * 3
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_shared_call():
+    service = Users()
+    client, *_ = connectRecorded('coalesceServer3', 'coalesceClient3', service)
+    main = await client.getMain()
+
+    first = asyncio.ensure_future(main.getUser(1))
+    second = asyncio.ensure_future(main.getUser(1))
+    await asyncio.sleep(0.005)
+    first.cancel()
+    assert (await second)['id'] == 1
@@ -0,0 +1,244 @@
+"""test_codec.py — 可插拔编解码与连接握手协商测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import Codec, availableCodecs, getCodec, registerCodec
+from xuri_rpc.codec import (
+    CBOR, acceptAnswer, answerHello, chooseCodec, helloOffer, isHello, needsHello,
+)
+from xuri_rpc.framing import HEADER
+from xuri_rpc.local_serialization_sender import DumpChannel, createServer, createMain
+from xuri_rpc_tcp import createServer as tcpServer, createMain as tcpMain
+from xuri_rpc_tcp.tcp_sender import TcpBinarySender
+from xuri_rpc_stdio.stdio_sender import createServer as stdioServer, createMain as stdioMain
+from xuri_rpc_websocket import createServer as wsServer, createMain as wsMain
+from .base_test import dropHost
+
+
+class EchoService:
+    def echo(self, x):
+        return x
+
+    def concat(self, a, b):
+        return a + b
+
+
+MESSAGE = {
+    'id': 'abc', 'objectId': 'main', 'method': 'echo',
+    'args': [{'type': 'data', 'data': {'blob': b'\x00\x01\xff', 'items': [1, 2.5, None, True, 'x']}}],
+    'meta': {},
+}
+
+
+@pytest.mark.parametrize('name', availableCodecs())
+def test_codec_roundtrip(name):
+    codec = getCodec(name)
+    data = codec.encode(MESSAGE)
+    assert isinstance(data, bytes)
+    assert codec.decode(data) == MESSAGE
+
+
+def test_choose_codec_follows_offer_order_and_falls_back():
+    assert chooseCodec(['json', 'cbor']).name == 'json'
+    assert chooseCodec(['json', 'cbor'], accepted=['cbor']).name == 'cbor'
+    assert chooseCodec(['nope']) is CBOR
+
+
+def test_hello_answer_and_legacy_reply():
+    codec, answer = answerHello(helloOffer(['json', 'cbor']))
+    assert codec.name == 'json'
+    assert acceptAnswer(answer).name == 'json'
+    # an older peer answers with an ordinary (error) message
+    assert acceptAnswer({'idFor': None, 'status': -1}) is CBOR
+    assert not needsHello(['cbor'])
+
+
+def test_register_custom_codec():
+    class UpperCbor(Codec):
+        name = 'test-cbor'
+
+        def encode(self, message):
+            return CBOR.encode(message)
+
+        def decode(self, data):
+            return CBOR.decode(data)
+
+    registerCodec(UpperCbor())
+    assert getCodec('test-cbor').name == 'test-cbor'
+    with pytest.raises(ValueError):
+        getCodec('missing')
+
+
+@pytest.mark.asyncio
+async def test_dump_channel_with_json_codec():
+    channel = DumpChannel('json')
+    serve = await createServer('codecServer1', channel)
+    serve(EchoService())
+    client, main = await createMain('codecClient1', channel)
+    assert await main.concat(b'ab', b'cd') == b'abcd'
+    assert await main.echo({'k': [1, 'v']}) == {'k': [1, 'v']}
+
+
+@pytest.mark.asyncio
+async def test_tcp_negotiates_offered_codec():
+    serve, server = await tcpServer('codecTcpServer', 'localhost', 18841)
+    serve_task = asyncio.ensure_future(serve(EchoService()))
+    client, main = await tcpMain(
+        'codecTcpClient', 'localhost', 18841, codecs=['json', 'cbor'], max_retries=1
+    )
+    try:
+        assert client.useSender().codec.name == 'json'
+        assert await main.concat(b'12', b'34') == b'1234'
+    finally:
+        client.useSender().stream[1].close()
+        server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('codecTcpClient')
+        dropHost('codecTcpServer')
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def _legacyProxy(port, target):
+    """Stands in for a server that predates the hello: like the old request
+    path it fails on a hello and drops the connection, and passes plain
+    CBOR frames on to a real server."""
+    async def handle(reader, writer):
+        header = await reader.readexactly(4)
+        body = await reader.readexactly(HEADER.unpack(header)[0])
+        if isHello(CBOR.decode(body)):
+            writer.close()
+            return
+        up_reader, up_writer = await asyncio.open_connection('localhost', target)
+        up_writer.write(header + body)
+        await asyncio.gather(_pipe(reader, up_writer), _pipe(up_reader, writer))
+
+    return await asyncio.start_server(handle, 'localhost', port)
+
+
+@pytest.mark.asyncio
+async def test_tcp_client_against_a_server_without_hello():
+    serve, server = await tcpServer('legacyTcpServer', 'localhost', 18844)
+    serve_task = asyncio.ensure_future(serve(EchoService()))
+    proxy = await _legacyProxy(18845, 18844)
+    try:
+        client, main = await asyncio.wait_for(
+            tcpMain('legacyTcpClient', 'localhost', 18845, max_retries=1), 5
+        )
+        assert client.useSender().codec is CBOR
+        assert await main.echo('x') == 'x'
+        client.useSender().stream[1].close()
+
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(tcpMain(
+                'legacyTcpClient2', 'localhost', 18845, codecs=['json', 'cbor'], max_retries=1,
+            ), 5)
+    finally:
+        proxy.close()
+        server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('legacyTcpClient')
+        dropHost('legacyTcpClient2')
+        dropHost('legacyTcpServer')
+
+
+@pytest.mark.asyncio
+async def test_stdio_hello_without_answer_keeps_cbor():
+    # the old stdio loop also fails on a hello; here it is swallowed, so
+    # only the timeout gets the client going
+    to_proxy, to_server, to_client = (asyncio.StreamReader() for _ in range(3))
+
+    async def legacy():
+        while True:
+            try:
+                header = await to_proxy.readexactly(4)
+            except asyncio.IncompleteReadError:
+                to_server.feed_eof()
+                return
+            body = await to_proxy.readexactly(HEADER.unpack(header)[0])
+            if not isHello(CBOR.decode(body)):
+                to_server.feed_data(header + body)
+
+    filter_task = asyncio.ensure_future(legacy())
+    serve = await stdioServer('legacyStdioServer', to_server, _Feed(to_client))
+    serve_task = asyncio.ensure_future(serve(EchoService()))
+    try:
+        client, main = await asyncio.wait_for(stdioMain(
+            'legacyStdioClient', _Feed(to_proxy), to_client, codecs=['json', 'cbor'],
+            hello_timeout=0.1,
+        ), 5)
+        assert client.useSender().codec is CBOR
+        assert await asyncio.wait_for(main.echo('x'), 5) == 'x'
+    finally:
+        to_proxy.feed_eof()
+        await asyncio.wait_for(asyncio.gather(filter_task, serve_task), 5)
+        dropHost('legacyStdioClient')
+        dropHost('legacyStdioServer')
+
+
+class _Feed:
+    """Write end of an in-memory pipe."""
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    def write(self, data):
+        self.reader.feed_data(bytes(data))
+
+    def writelines(self, parts):
+        for part in parts:
+            self.write(part)
+
+    async def drain(self):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_tcp_hello_without_answer_keeps_cbor():
+    async def silent(reader, writer):
+        await TcpBinarySender._read_frame(reader)
+        await asyncio.sleep(1)
+        writer.close()
+
+    server = await asyncio.start_server(silent, 'localhost', 18842)
+    reader, writer = await asyncio.open_connection('localhost', 18842)
+    sender = TcpBinarySender((reader, writer))
+    sender._offer = ['json', 'cbor']
+    sender._hello_timeout = 0.1
+    try:
+        await sender.handshake()
+        assert sender.codec is CBOR
+    finally:
+        writer.close()
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_websocket_negotiates_subprotocol():
+    serve, server, _receiver = await wsServer('codecWsServer', 'localhost', 18843)
+    serve_task = asyncio.ensure_future(serve(EchoService()))
+    client, main = await wsMain(
+        'codecWsClient', 'localhost', 18843, codecs=['json', 'cbor'], max_retries=1
+    )
+    try:
+        assert client.useSender().codec.name == 'json'
+        assert await main.concat(b'ab', b'cd') == b'abcd'
+    finally:
+        await client.useSender().ws.close()
+        server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('codecWsClient')
+        dropHost('codecWsServer')
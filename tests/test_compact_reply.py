@@ -0,0 +1,38 @@
+"""test_compact_reply.py — 紧凑回复格式协商测试"""
+import pytest
+from .base_test import connectRecorded
+
+
+class AddService:
+    def add(self, a, b):
+        return a + b
+
+    def boom(self):
+        raise ValueError('boom')
+
+
+@pytest.mark.asyncio
+async def test_compact_replies_after_negotiation():
+    client, _receiver, _server_client, _to_server, to_client = connectRecorded(
+        'compactServer1', 'compactClient1', AddService(), inline=True
+    )
+    main = await client.getMain()
+    assert await main.add(1, 2) == 3
+    with pytest.raises(Exception) as exc_info:
+        await main.boom()
+    assert 'boom' in str(exc_info.value)
+
+    ok_reply, error_reply = to_client.sent[-2:]
+    assert set(ok_reply) == {'idFor', 'status', 'data'}
+    assert set(error_reply) == {'idFor', 'status', 'trace', 'error'}
+
+
+@pytest.mark.asyncio
+async def test_full_replies_for_peers_without_features():
+    client, _receiver, _server_client, _to_server, to_client = connectRecorded(
+        'compactServer2', 'compactClient2', AddService(), inline=True
+    )
+    client.features = set()
+    main = await client.getMain()
+    assert await main.add(1, 2) == 3
+    assert {'id', 'objectId', 'method', 'args', 'meta'} <= set(to_client.sent[-1])
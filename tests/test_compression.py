@@ -0,0 +1,134 @@
+"""test_compression.py — 按帧压缩、阈值与协商测试"""
+import asyncio
+import os
+import pytest
+
+from xuri_rpc.compression import (
+    ZLIB, FrameCompressor, availableCompressions, chooseCompression, defaultCompressions,
+)
+from xuri_rpc_stdio.stdio_sender import createServer as stdioServer, createMain as stdioMain
+from xuri_rpc_websocket import createServer as wsServer, createMain as wsMain
+from .base_test import dropHost, tcpPair
+
+
+class Records:
+    def rows(self, n):
+        return [{'name': f'user{i}', 'email': f'user{i}@example.com', 'active': True} for i in range(n)]
+
+    def count(self, rows):
+        return len(rows)
+
+    def echo(self, data):
+        return data
+
+
+def test_threshold_and_incompressible_frames():
+    compressor = FrameCompressor(ZLIB, threshold=100)
+    assert compressor.compress(b'a' * 50) == (b'a' * 50, False)
+    noise = os.urandom(4096)
+    assert compressor.compress(noise) == (noise, False)
+    packed, compressed = compressor.compress(b'abc' * 1000)
+    assert compressed and len(packed) < 100
+    assert compressor.decompress(packed) == b'abc' * 1000
+    stats = compressor.stats.asDict()
+    assert stats['frames'] == 2 and stats['compressed'] == 1 and stats['decompressed'] == 1
+    assert stats['ratio'] > 10
+
+
+def test_decompression_limit():
+    packed = ZLIB.compress(b'\0' * 100000)
+    assert len(ZLIB.decompress(packed, 100000)) == 100000
+    with pytest.raises(ValueError):
+        ZLIB.decompress(packed, 1000)
+
+
+def test_choose_compression():
+    assert 'zlib' in availableCompressions() and 'zlib' in defaultCompressions()
+    assert chooseCompression(['nope', 'zlib']) is ZLIB
+    assert chooseCompression(['zlib'], accepted=()) is None
+    assert chooseCompression('zlib') is None
+
+
+@pytest.mark.asyncio
+async def test_tcp_compression_both_ways():
+    async with tcpPair(
+        18881, Records(), 'z', compression=['zlib'], chunk_size=4096, oob_threshold=1024,
+    ) as (client, main):
+        rows = await main.rows(500)
+        assert rows[499]['email'] == 'user499@example.com'
+        assert await main.count(rows) == 500
+        assert await main.echo('x') == 'x'
+        blob = os.urandom(10000)
+        assert await main.echo([blob, 'y' * 20000]) == [blob, 'y' * 20000]
+        stats = client.useSender().get_compression_stats()
+        assert stats['algorithm'] == 'zlib'
+        assert stats['compressed'] == 2 and stats['decompressed'] == 2
+        assert stats['ratio'] > 5
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_may_refuse_compression():
+    async with tcpPair(
+        18882, Records(), 'z', server_kwargs={'compression': ()}, compression=True,
+    ) as (client, main):
+        assert client.useSender().get_compression_stats()['algorithm'] is None
+        assert len(await main.rows(100)) == 100
+
+
+class _Pipe:
+    def __init__(self, reader):
+        self.reader = reader
+
+    def write(self, data):
+        self.reader.feed_data(bytes(data))
+
+    def writelines(self, parts):
+        for part in parts:
+            self.write(part)
+
+    async def drain(self):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_stdio_compression():
+    to_server, to_client = asyncio.StreamReader(), asyncio.StreamReader()
+    serve = await stdioServer('zStdioServer', to_server, _Pipe(to_client))
+    serve_task = asyncio.ensure_future(serve(Records()))
+    client, main = await stdioMain(
+        'zStdioClient', _Pipe(to_server), to_client, codecs=['cbor'], compression=True,
+    )
+    try:
+        rows = await main.rows(300)
+        assert await main.count(rows) == 300
+        stats = client.useSender().get_compression_stats()
+        assert stats['compressed'] == 1 and stats['decompressed'] == 1
+    finally:
+        to_server.feed_eof()
+        await asyncio.wait_for(serve_task, 5)
+        dropHost('zStdioClient')
+        dropHost('zStdioServer')
+
+
+@pytest.mark.asyncio
+async def test_websocket_deflate_threshold_and_stats():
+    serve, ws_server, _ = await wsServer('zWsServer', 'localhost', 18883)
+    serve_task = asyncio.ensure_future(serve(Records()))
+    client, main = await wsMain(
+        'zWsClient', 'localhost', 18883, compress_threshold=2048, max_retries=1
+    )
+    try:
+        assert await main.echo('small') == 'small'
+        rows = await main.rows(300)
+        assert await main.count(rows) == 300
+        stats = client.useSender().get_compression_stats()
+        assert stats['algorithm'] == 'deflate'
+        assert stats['compressed'] == 1 and stats['decompressed'] == 1
+        assert stats['ratio'] > 5
+    finally:
+        await client.useSender().ws.close()
+        ws_server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('zWsClient')
+        dropHost('zWsServer')
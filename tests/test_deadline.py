@@ -0,0 +1,57 @@
+"""test_deadline.py — 请求截止时间测试"""
+import asyncio
+import pytest
+
+from xuri_rpc_tcp import createServer, createMain
+from .base_test import dropHost, mainFunc
+
+
+class SlowService:
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    async def slow(self, tag, seconds):
+        self.started.append(tag)
+        await asyncio.sleep(seconds)
+        self.finished.append(tag)
+        return tag
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_running_handler():
+    service = SlowService()
+
+    async def check(_client, main, sid):
+        with pytest.raises(TimeoutError):
+            await main.slow('a', 0.3, _rpc_timeout=0.05)
+        await asyncio.sleep(0.4)
+        assert service.started == ['a']
+        assert service.finished == []
+        assert not _client._getReqPending()
+
+    await mainFunc(service, check)
+
+
+@pytest.mark.asyncio
+async def test_expired_request_is_dropped_before_dispatch():
+    service = SlowService()
+    serve, tcp_server = await createServer(
+        'deadlineServer', 'localhost', 18811, max_inflight_per_connection=1
+    )
+    serve_task = asyncio.ensure_future(serve(service))
+    client, main = await createMain('deadlineClient', 'localhost', 18811, max_retries=1)
+    try:
+        first = asyncio.ensure_future(main.slow('first', 0.2))
+        await asyncio.sleep(0.02)
+        with pytest.raises(TimeoutError):
+            await main.slow('queued', 0.01, _rpc_timeout=0.05)
+        assert await first == 'first'
+        await asyncio.sleep(0.05)
+        assert service.started == ['first']
+    finally:
+        client.useSender().stream[1].close()
+        tcp_server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('deadlineClient')
@@ -0,0 +1,60 @@
+"""test_dispatch_cache.py — 分发缓存失效测试"""
+import pytest
+from xuri_rpc.rpc import Client, _deleteProxyById
+from .base_test import connectDump
+
+
+class V1Service:
+    def version(self):
+        return 1
+
+
+class V2Service:
+    def version(self):
+        return 2
+
+
+class ContextService:
+    def who(self, context):
+        return context.get('user')
+
+
+@pytest.mark.asyncio
+async def test_setObject_invalidates_cached_handler():
+    receiver, client, _main = await connectDump('cacheServer1', 'cacheClient1', V1Service())
+    receiver.setObject('svc', V1Service(), False)
+    svc = await client.getObject('svc')
+    assert await svc.version() == 1
+    assert 'svc' in receiver._dispatchTable.entries
+
+    receiver.setObject('svc', V2Service(), False)
+    assert 'svc' not in receiver._dispatchTable.entries
+    assert await svc.version() == 2
+
+
+@pytest.mark.asyncio
+async def test_deleteById_invalidates_cached_handler():
+    receiver, client, _main = await connectDump('cacheServer2', 'cacheClient2', V1Service())
+    receiver.setObject('svc', V1Service(), False)
+    svc = await client.getObject('svc')
+    assert await svc.version() == 1
+
+    _deleteProxyById('svc', 'cacheServer2')
+    with pytest.raises(Exception) as exc_info:
+        await svc.version()
+    assert 'object not found' in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_addInterceptor_invalidates_cached_handler():
+    receiver, client, _main = await connectDump('cacheServer3', 'cacheClient3', V1Service())
+    receiver.setObject('ctx', ContextService(), True)
+    ctx = await client.getObject('ctx')
+    assert await ctx.who() is None
+
+    async def auth(context, message, client, next_fn):
+        context['user'] = 'mike'
+        await next_fn()
+
+    receiver.addInterceptor(auth)
+    assert await ctx.who() == 'mike'
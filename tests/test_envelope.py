@@ -0,0 +1,112 @@
+"""test_envelope.py — 紧凑键驻留信封测试"""
+import asyncio
+import pytest
+
+from xuri_rpc.codec import getCodec
+from xuri_rpc.envelope import packMessage, unpackMessage
+from xuri_rpc.local_serialization_sender import DumpChannel, createServer, createMain
+from xuri_rpc_tcp import createServer as tcpServer, createMain as tcpMain
+from .base_test import dropHost
+
+
+def _descriptor(objId, *names):
+    return {
+        'id': objId, 'hostId': 'h1',
+        'members': [{'name': n, 'type': 'function'} for n in names],
+        '__is_rpc_proxy__': '__is_rpc_proxy__',
+    }
+
+
+class Counter:
+    def __init__(self):
+        self.n = 0
+
+    def inc(self):
+        self.n += 1
+        return self.n
+
+
+class Service:
+    def add(self, a, b):
+        return a + b
+
+    async def callBack(self, cb, x):
+        return await cb(x)
+
+    def makeCounter(self):
+        return Counter()
+
+
+@pytest.mark.parametrize('message', [
+    {'id': 'a1', 'objectId': 'main', 'method': 'add', 'args': [1, 2], 'meta': {}},
+    {'id': 'a2', 'objectId': 'main', 'method': 'f', 'args': [_descriptor('p1', '__call__')],
+     'meta': {'sessionId': 's', 'features': ['compact']}},
+    {'idFor': 'a1', 'status': 200, 'data': 3},
+    {'idFor': 'a2', 'status': 200, 'data': {'k': [_descriptor('p2', 'get', 'set')]}},
+    {'idFor': 'a3', 'status': -1, 'error': {'type': 'ValueError', 'message': 'x'}},
+    {'frames': [{'cancelFor': 'a1'}, {'streamFor': 'a4', 'chunk': b'\x00\x01'}]},
+    {'id': 'b', 'objectId': 'main', 'method': 'g', 'args': [], 'meta': {}, 'promiseFor': 'a1'},
+])
+def test_pack_roundtrip(message):
+    assert unpackMessage(packMessage(message)) == message
+
+
+def test_reserved_keys_in_user_data_survive():
+    message = {
+        'id': 'a', 'objectId': 'main', 'method': 'f', 'meta': {},
+        'args': [{-1: ['x']}, {-2: 1}, _descriptor('p', 'g')],
+    }
+    assert getCodec('cbor+compact').decode(getCodec('cbor+compact').encode(message)) == message
+
+
+def test_member_options_and_interning():
+    desc = _descriptor('p', 'g')
+    desc['members'][0]['oneway'] = True
+    message = {'id': 'a', 'objectId': 'main', 'method': 'someMethod', 'args': [desc], 'meta': {}}
+    codec = getCodec('cbor+compact')
+    first = codec.decode(codec.encode(message))
+    second = codec.decode(codec.encode(message))
+    assert first == message
+    assert first['method'] is second['method']
+
+
+def test_compact_is_smaller():
+    message = {'idFor': 'a', 'status': 200, 'data': [_descriptor(f'p{i}', 'get', 'set') for i in range(5)]}
+    assert len(getCodec('cbor+compact').encode(message)) < len(getCodec('cbor').encode(message)) / 2
+
+
+def test_compact_needs_integer_keys():
+    with pytest.raises(ValueError):
+        getCodec('json+compact')
+
+
+@pytest.mark.asyncio
+async def test_compact_channel_with_proxies():
+    channel = DumpChannel('cbor+compact')
+    serve = await createServer('envServer1', channel)
+    serve(Service())
+    client, main = await createMain('envClient1', channel)
+    assert await main.add(2, 3) == 5
+    assert await main.callBack(lambda x: x * 10, 4) == 40
+    counter = await main.makeCounter()
+    assert await counter.inc() == 1
+    assert await counter.inc() == 2
+
+
+@pytest.mark.asyncio
+async def test_tcp_negotiates_compact_envelope():
+    serve, server = await tcpServer('envTcpServer', 'localhost', 18851)
+    serve_task = asyncio.ensure_future(serve(Service()))
+    client, main = await tcpMain(
+        'envTcpClient', 'localhost', 18851, codecs=['cbor+compact', 'cbor'], max_retries=1
+    )
+    try:
+        assert client.useSender().codec.name == 'cbor+compact'
+        assert await main.callBack(lambda x: x + 1, 1) == 2
+    finally:
+        client.useSender().stream[1].close()
+        server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('envTcpClient')
+        dropHost('envTcpServer')
@@ -0,0 +1,73 @@
+"""test_error_detail.py — 错误详细级别与结构化错误测试"""
+import pytest
+
+from xuri_rpc import RpcError, RpcRemoteError
+from .base_test import connectRecorded
+
+
+class Accounts:
+    def withdraw(self, amount):
+        raise RpcError('insufficient funds', amount, code='E_FUNDS')
+
+    def crash(self):
+        raise KeyError('missing')
+
+
+@pytest.mark.asyncio
+async def test_business_error_is_structured_without_trace(capsys):
+    client, _receiver, _server_client, _to_server, to_client = connectRecorded(
+        'errorServer1', 'errorClient1', Accounts(), inline=True
+    )
+    main = await client.getMain()
+    with pytest.raises(RpcRemoteError) as exc_info:
+        await main.withdraw(50)
+    err = exc_info.value
+    assert (err.type, err.code, err.message, err.remoteArgs) == (
+        'RpcError', 'E_FUNDS', 'insufficient funds', ['insufficient funds', 50]
+    )
+    assert 'trace' not in to_client.sent[-1]
+    assert 'insufficient funds' in str(err)
+    assert capsys.readouterr().out == ''
+
+
+@pytest.mark.asyncio
+async def test_detail_levels():
+    client, receiver, _server_client, _to_server, to_client = connectRecorded(
+        'errorServer2', 'errorClient2', Accounts(), inline=True
+    )
+    main = await client.getMain()
+
+    with pytest.raises(RpcRemoteError) as exc_info:
+        await main.crash()
+    assert 'Traceback' in to_client.sent[-1]['trace']
+    assert exc_info.value.type == 'KeyError'
+
+    receiver.setErrorDetail('message')
+    with pytest.raises(RpcRemoteError) as exc_info:
+        await main.crash()
+    assert 'trace' not in to_client.sent[-1]
+    assert exc_info.value.message == "'missing'"
+
+    receiver.setErrorDetail('none')
+    with pytest.raises(RpcRemoteError) as exc_info:
+        await main.crash()
+    assert to_client.sent[-1]['error'] == {'type': 'KeyError'}
+    assert exc_info.value.message is None
+
+    with pytest.raises(ValueError):
+        receiver.setErrorDetail('everything')
+
+
+@pytest.mark.asyncio
+async def test_peer_without_structured_errors_gets_short_trace():
+    client, receiver, _server_client, _to_server, to_client = connectRecorded(
+        'errorServer3', 'errorClient3', Accounts(), inline=True
+    )
+    client.features = {'compact'}
+    receiver.setErrorDetail('message')
+    main = await client.getMain()
+    with pytest.raises(RpcRemoteError) as exc_info:
+        await main.withdraw(1)
+    assert to_client.sent[-1]['trace'] == 'RpcError: insufficient funds'
+    assert 'error' not in to_client.sent[-1]
+    assert exc_info.value.type is None
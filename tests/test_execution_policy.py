@@ -0,0 +1,84 @@
+"""test_execution_policy.py — 同步方法执行策略测试"""
+import asyncio
+import threading
+import time
+import pytest
+from xuri_rpc import ExecutionPolicy, runIn
+from .base_test import connectDump
+
+_threadPool = ExecutionPolicy.thread(max_workers=2)
+
+
+class BlockingService:
+    @runIn(_threadPool)
+    def block(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+    def fast(self):
+        return 'fast'
+
+
+class CpuService:
+    def square(self, n):
+        return n * n
+
+
+@pytest.mark.asyncio
+async def test_thread_policy_keeps_loop_responsive():
+    _receiver, _client, main = await connectDump('execServer1', 'execClient1', BlockingService())
+    slow = asyncio.ensure_future(main.block(0.3))
+    await asyncio.sleep(0.05)
+    start = time.time()
+    assert await main.fast() == 'fast'
+    assert time.time() - start < 0.2
+    assert await slow == 0.3
+
+
+@pytest.mark.asyncio
+async def test_process_policy_set_through_setObject():
+    receiver, client, _main = await connectDump('execServer2', 'execClient2', BlockingService())
+    pool = ExecutionPolicy.process(max_workers=1)
+    try:
+        receiver.setObject('cpu', CpuService(), False, {'square': pool})
+        cpu = await client.getObject('cpu')
+        assert await asyncio.gather(*(cpu.square(n) for n in range(4))) == [0, 1, 4, 9]
+    finally:
+        pool.shutdown()
+
+
+class LockedService:
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def square(self, n):
+        return n * n
+
+
+@pytest.mark.asyncio
+async def test_unpicklable_service_is_refused_for_a_process_pool():
+    receiver, _client, _main = await connectDump('execServer3', 'execClient3', BlockingService())
+    pool = ExecutionPolicy.process(max_workers=1)
+    with pytest.raises(ValueError, match='process pool'):
+        receiver.setObject('locked', LockedService(), False, {'square': pool})
+    receiver.setObject('locked', LockedService(), False, ExecutionPolicy.thread())
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_applies_back_pressure():
+    pool = ExecutionPolicy.thread(max_workers=1, max_pending=0)
+    calls = []
+
+    def work(n):
+        calls.append(n)
+        time.sleep(0.05)
+        return n
+
+    try:
+        tasks = [asyncio.ensure_future(pool.run(work, n)) for n in range(3)]
+        await asyncio.sleep(0.01)
+        assert pool._getLimit(asyncio.get_running_loop()).locked()
+        assert calls == [0]
+        assert await asyncio.gather(*tasks) == [0, 1, 2]
+    finally:
+        pool.shutdown()
@@ -0,0 +1,194 @@
+"""test_framing.py — 大消息分块传输与消息大小上限测试"""
+import asyncio
+import pytest
+
+from xuri_rpc.codec import CBOR, helloOffer, helloOptions
+from xuri_rpc.framing import (
+    FLAG_CHUNK, FLAG_FIRST, HEADER, LENGTH_MASK, MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, MessageTooLarge,
+    Reassembler, chunkFrames, chunkOption, chunkSizeFor, readMessage,
+)
+from xuri_rpc_stdio.stdio_sender import createServer as stdioServer, createMain as stdioMain
+from .base_test import dropHost, tcpPair
+
+
+class BlobService:
+    def size(self, data):
+        return len(data)
+
+    def echo(self, data):
+        return data
+
+    def ping(self):
+        return 'pong'
+
+    def blob(self, n):
+        return b'x' * n
+
+
+def _feed(frames):
+    reader = asyncio.StreamReader()
+    for frame in frames:
+        reader.feed_data(b''.join(bytes(p) for p in frame))
+    reader.feed_eof()
+    return reader
+
+
+def test_chunk_frames_split_and_reassemble():
+    doc, blob = b'd' * 10, bytes(range(256)) * 4
+    frames = list(chunkFrames([doc, blob], 100))
+    assert len(frames) == 11  # 12-byte first header + 1034 bytes
+    flags = [HEADER.unpack(f[0])[0] & ~0x1FFFFFFF for f in frames]
+    assert flags[0] == FLAG_CHUNK | FLAG_FIRST
+    assert set(flags[1:]) == {FLAG_CHUNK}
+
+    assembler = Reassembler()
+    done = None
+    for frame in frames:
+        (word,) = HEADER.unpack(frame[0])
+        done = assembler.feed(word, b''.join(bytes(p) for p in frame[1:]))
+    data, doc_size, _ = done
+    assert doc_size == 10
+    assert bytes(data[:doc_size]) == doc and bytes(data[doc_size:]) == blob
+
+
+@pytest.mark.asyncio
+async def test_plain_frame_between_chunks():
+    frames = list(chunkFrames([b'x' * 250], 100))
+    plain = [HEADER.pack(5), b'small']
+    reader = _feed([frames[0], plain, *frames[1:]])
+    assembler = Reassembler()
+    first = await readMessage(reader.readexactly, True, assembler)
+    second = await readMessage(reader.readexactly, True, assembler)
+    assert bytes(first[0]) == b'small'
+    assert bytes(second[0]) == b'x' * 250
+
+
+def test_tiny_chunk_sizes_are_refused():
+    with pytest.raises(ValueError):
+        list(chunkFrames([b'x' * 100], 5))
+    assert chunkOption(4) == MIN_CHUNK_SIZE
+    assert chunkOption(0) == 0 and chunkOption('4') == 0
+    assert chunkOption(LENGTH_MASK + 1) == MAX_CHUNK_SIZE
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_raises_a_tiny_offered_chunk():
+    from xuri_rpc_tcp import createServer
+
+    serve, tcp_server = await createServer('frameTinyServer', 'localhost', 18874)
+    serve_task = asyncio.ensure_future(serve(BlobService()))
+    reader, writer = await asyncio.open_connection('localhost', 18874)
+    try:
+        hello = CBOR.encode(helloOffer(['cbor'], chunk=4))
+        writer.write(HEADER.pack(len(hello)) + hello)
+        (length,) = HEADER.unpack(await asyncio.wait_for(reader.readexactly(4), 5))
+        answer = CBOR.decode(await reader.readexactly(length))
+        assert helloOptions(answer)['chunk'] == MIN_CHUNK_SIZE
+    finally:
+        writer.close()
+        tcp_server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
+        dropHost('frameTinyServer')
+
+
+class _Sized:
+    """Stands in for a payload too large to allocate in a test."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+
+def test_payload_over_flagged_length_is_chunked():
+    assert chunkSizeFor(b'x' * 100, 0, True) == 0
+    assert chunkSizeFor(_Sized(LENGTH_MASK + 1), 0, True) == MAX_CHUNK_SIZE
+    assert chunkSizeFor(_Sized(LENGTH_MASK + 1), 4096, True) == 4096
+    assert chunkSizeFor(_Sized(LENGTH_MASK + 1), 0, False) == 0
+    with pytest.raises(MessageTooLarge):
+        chunkSizeFor(_Sized(1 << 32), 0, False)
+
+
+@pytest.mark.asyncio
+async def test_size_limit_checked_before_reading_payload():
+    reader = _feed(list(chunkFrames([b'x' * 5000], 100)))
+    with pytest.raises(ConnectionError):
+        await readMessage(reader.readexactly, True, Reassembler(1000))
+    reader = _feed([[HEADER.pack(5000)]])
+    with pytest.raises(ConnectionError):
+        await readMessage(reader.readexactly, False, Reassembler(1000))
+
+
+@pytest.mark.asyncio
+async def test_tcp_chunked_transfer():
+    async with tcpPair(
+        18871, BlobService(), 'frame', chunk_size=4096, oob_threshold=1024,
+    ) as (client, main):
+        assert client.useSender().chunk_size == 4096
+        payload = bytes(range(256)) * 1024
+        big, small = await asyncio.gather(main.echo(payload), main.ping())
+        assert big == payload and small == 'pong'
+        assert await main.echo([b'a' * 5000, 'text' * 2000]) == [b'a' * 5000, 'text' * 2000]
+
+
+@pytest.mark.asyncio
+async def test_tcp_peer_limit_is_enforced_by_sender():
+    async with tcpPair(
+        18872, BlobService(), 'frame', server_kwargs={'max_message_size': 10000}, chunk_size=4096,
+    ) as (client, main):
+        assert client.useSender().peer_max_message_size == 10000
+        assert await main.size(b'a' * 5000) == 5000
+        with pytest.raises(MessageTooLarge):
+            await main.size(b'a' * 20000)
+        assert await main.ping() == 'pong'
+
+
+@pytest.mark.asyncio
+async def test_tcp_pings_overlap_a_big_reply():
+    async with tcpPair(18873, BlobService(), 'frame', chunk_size=65536) as (client, main):
+        big = asyncio.ensure_future(main.blob(32 * 1024 * 1024))
+        pings = 0
+        while not big.done():
+            assert await main.ping() == 'pong'
+            pings += 1 if not big.done() else 0
+        assert len(await big) == 32 * 1024 * 1024
+        assert pings >= 5
+
+
+class _Pipe:
+    """In-memory byte pipe that looks like an asyncio StreamWriter."""
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    def write(self, data):
+        self.reader.feed_data(bytes(data))
+
+    def writelines(self, parts):
+        for part in parts:
+            self.write(part)
+
+    async def drain(self):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_stdio_chunked_transfer():
+    to_server, to_client = asyncio.StreamReader(), asyncio.StreamReader()
+    serve = await stdioServer('frameStdioServer', to_server, _Pipe(to_client))
+    serve_task = asyncio.ensure_future(serve(BlobService()))
+    client, main = await stdioMain(
+        'frameStdioClient', _Pipe(to_server), to_client, codecs=['cbor'], chunk_size=1000,
+    )
+    try:
+        assert client.useSender().chunk_size == 1000
+        payload = b'z' * 50000
+        assert await main.echo(payload) == payload
+        assert await main.ping() == 'pong'
+    finally:
+        to_server.feed_eof()
+        await asyncio.wait_for(serve_task, 5)
+        dropHost('frameStdioClient')
+        dropHost('frameStdioServer')
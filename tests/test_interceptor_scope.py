@@ -0,0 +1,74 @@
+"""test_interceptor_scope.py — 拦截器作用域测试"""
+import pytest
+from xuri_rpc.local_serialization_sender import DumpChannel, createServer, createMain
+
+
+class UserService:
+    def getName(self, context):
+        return context.get('trace', []) + ['getName']
+
+    def setName(self, context, name):
+        return context.get('trace', []) + ['setName']
+
+
+class OtherService:
+    def getName(self, context):
+        return context.get('trace', []) + ['other']
+
+
+def _tracer(tag):
+    async def interceptor(context, message, client, next_fn):
+        context['trace'] = context.get('trace', []) + [tag]
+        await next_fn()
+    return interceptor
+
+
+@pytest.mark.asyncio
+async def test_interceptor_scoped_by_object_and_method():
+    channel = DumpChannel()
+    serve = await createServer('scopeServer', channel)
+    receiver, _serve = serve(UserService())
+    receiver.setObject('user', UserService(), True)
+    receiver.setObject('other', OtherService(), True)
+    receiver.addInterceptor(_tracer('all'))
+    receiver.addInterceptor(_tracer('user'), objectId='user')
+    receiver.addInterceptor(_tracer('getters'), method='get*')
+
+    client, _main = await createMain('scopeClient', channel)
+    user = await client.getObject('user')
+    other = await client.getObject('other')
+
+    assert await user.getName() == ['all', 'user', 'getters', 'getName']
+    assert await user.setName('x') == ['all', 'user', 'setName']
+    assert await other.getName() == ['all', 'getters', 'other']
+
+
+class FlakyService:
+    def __init__(self):
+        self.calls = 0
+
+    def work(self, context):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError('first attempt fails')
+        return context.get('trace', [])
+
+
+@pytest.mark.asyncio
+async def test_interceptor_retry_reruns_downstream_chain():
+    async def retry(context, message, client, next_fn):
+        try:
+            await next_fn()
+        except RuntimeError:
+            await next_fn()
+
+    channel = DumpChannel()
+    serve = await createServer('retryServer', channel)
+    receiver, _serve = serve(FlakyService())
+    receiver.setObject('flaky', FlakyService(), True)
+    receiver.addInterceptor(retry)
+    receiver.addInterceptor(_tracer('inner'))
+
+    client, _main = await createMain('retryClient', channel)
+    flaky = await client.getObject('flaky')
+    assert await flaky.work() == ['inner', 'inner']
@@ -0,0 +1,39 @@
+"""test_message_id.py — 整数消息 id 测试"""
+import asyncio
+import pytest
+from xuri_rpc.rpc import _nextMessageId, _PendingCall, Client
+from .base_test import mainFunc
+
+
+class EchoService:
+    def echo(self, x):
+        return x
+
+
+def test_message_ids_are_small_ints_per_host():
+    a1 = _nextMessageId('msgIdHostA')
+    a2 = _nextMessageId('msgIdHostA')
+    b1 = _nextMessageId('msgIdHostB')
+    assert isinstance(a1, int) and a2 == a1 + 1
+    assert isinstance(b1, int)
+
+
+@pytest.mark.asyncio
+async def test_pending_table_uses_int_ids_and_slotted_entries():
+    seen = {}
+
+    async def check(client: Client, main, sid):
+        pending = client._getReqPending()
+        task = asyncio.ensure_future(main.echo('x'))
+        await asyncio.sleep(0)
+        for reqId, entry in pending.items():
+            seen[reqId] = entry
+        assert await task == 'x'
+        assert not pending
+
+    await mainFunc(EchoService(), check)
+    assert seen
+    for reqId, entry in seen.items():
+        assert isinstance(reqId, int)
+        assert isinstance(entry, _PendingCall)
+        assert not hasattr(entry, '__dict__')
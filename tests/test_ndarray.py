@@ -0,0 +1,102 @@
+"""test_ndarray.py — numpy 数组按内容传输与自定义转换器测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import ICustomTranslator
+from xuri_rpc.local_serialization_sender import DumpChannel, createServer, createMain
+from xuri_rpc_tcp import createServer as tcpServer, createMain as tcpMain
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+class PointTranslator(ICustomTranslator):
+    def match(self, obj):
+        return isinstance(obj, Point)
+
+    def translate(self, obj):
+        return {'__point__': [obj.x, obj.y]}
+
+    def reverseMatch(self, obj):
+        return '__point__' in obj
+
+    def reverseTranslate(self, obj):
+        return Point(*obj['__point__'])
+
+
+class Geometry:
+    def norm2(self, p):
+        return p.x * p.x + p.y * p.y
+
+    def mirror(self, p):
+        return Point(p.y, p.x)
+
+
+class ArrayService:
+    def describe(self, arr):
+        return [type(arr).__name__, str(arr.dtype), list(arr.shape), arr.flags.writeable]
+
+    def total(self, arr):
+        return float(arr.sum())
+
+    def echo(self, arr):
+        return arr
+
+    def viewsMessage(self, arr):
+        base = arr.base
+        while base is not None and not isinstance(base, memoryview):
+            base = getattr(base, 'base', None)
+        return isinstance(base, memoryview)
+
+
+@pytest.mark.asyncio
+async def test_custom_translator_round_trip():
+    channel = DumpChannel()
+    serve = await createServer('ctServer', channel)
+    serve(Geometry())
+    client, main = await createMain('ctClient', channel)
+    for side in (client, channel.serverSideClient):
+        side.argTranslator.customTranslators.append(PointTranslator())
+    assert await main.norm2(Point(3, 4)) == 25
+    mirrored = await main.mirror(Point(1, 2))
+    assert isinstance(mirrored, Point) and (mirrored.x, mirrored.y) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_ndarray_by_value_over_dump_channel():
+    np = pytest.importorskip('numpy')
+    channel = DumpChannel()
+    serve = await createServer('npServer', channel)
+    serve(ArrayService())
+    client, main = await createMain('npClient', channel)
+
+    arr = np.arange(12, dtype='<i4').reshape(3, 4)
+    assert await main.describe(arr) == ['ndarray', 'int32', [3, 4], False]
+    assert await main.total(arr[:, 1]) == 1 + 5 + 9
+    fortran = np.asfortranarray(np.arange(6, dtype='f8').reshape(2, 3))
+    assert np.array_equal(await main.echo(fortran), fortran)
+    structured = np.zeros(2, dtype=[('a', '<i4'), ('b', '<f8', (2,))])
+    structured['b'][1] = [1.5, 2.5]
+    echoed = await main.echo(structured)
+    assert echoed.dtype == structured.dtype and echoed['b'][1].tolist() == [1.5, 2.5]
+    assert (await main.echo(np.array(2.5, dtype='f4'))).shape == ()
+
+
+@pytest.mark.asyncio
+async def test_ndarray_uses_out_of_band_buffers():
+    np = pytest.importorskip('numpy')
+    serve, server = await tcpServer('npTcpServer', 'localhost', 18897)
+    serve_task = asyncio.ensure_future(serve(ArrayService()))
+    client, main = await tcpMain('npTcpClient', 'localhost', 18897, oob_threshold=1024)
+    try:
+        arr = np.random.default_rng(0).standard_normal((256, 64))
+        assert await main.viewsMessage(arr)
+        echoed = await main.echo(arr)
+        assert np.array_equal(echoed, arr) and not echoed.flags.writeable
+    finally:
+        client.useSender().stream[1].close()
+        server.close()
+        serve_task.cancel()
+        await asyncio.gather(serve_task, return_exceptions=True)
@@ -0,0 +1,62 @@
+"""test_oneway.py — 无回复的单向调用测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import oneway
+from .base_test import connectRecorded
+
+
+class Telemetry:
+    def __init__(self):
+        self.events = []
+
+    @oneway
+    def record(self, event):
+        self.events.append(event)
+        return 'ignored'
+
+    def count(self):
+        return len(self.events)
+
+    @oneway
+    def broken(self):
+        raise ValueError('boom')
+
+
+@pytest.mark.asyncio
+async def test_oneway_method_sends_no_reply():
+    service = Telemetry()
+    client, _receiver, _server_client, _to_server, to_client = connectRecorded(
+        'onewayServer1', 'onewayClient1', service
+    )
+    main = await client.getMain()
+    replies_before = len(to_client.sent)
+
+    assert await main.record('a') is None
+    assert not client._getReqPending()
+    await main.broken()
+    await asyncio.sleep(0.01)
+    assert service.events == ['a']
+    assert len(to_client.sent) == replies_before
+
+
+@pytest.mark.asyncio
+async def test_oneway_chosen_per_call():
+    service = Telemetry()
+    client, *_ = connectRecorded('onewayServer2', 'onewayClient2', service)
+    main = await client.getMain()
+
+    assert await main.count(_rpc_oneway=True) is None
+    assert await main.record('b', _rpc_oneway=False) == 'ignored'
+    assert await main.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_peer_without_oneway_gets_regular_calls():
+    service = Telemetry()
+    client, _receiver, _server_client, _to_server, to_client = connectRecorded(
+        'onewayServer3', 'onewayClient3', service
+    )
+    client.features = set()
+    main = await client.getMain()
+    assert await main.record('c') == 'ignored'
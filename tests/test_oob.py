@@ -0,0 +1,86 @@
+"""test_oob.py — 大块字节带外零拷贝传输测试"""
+import pytest
+
+from xuri_rpc.oob import OOB_KEY, extractBuffers, restoreBuffers
+from .base_test import tcpPair
+
+
+class BlobService:
+    def kind(self, data):
+        return type(data).__name__
+
+    def size(self, data):
+        return len(data)
+
+    def echo(self, data):
+        return data
+
+    def concat(self, a, b):
+        return bytes(a) + bytes(b)
+
+
+def test_extract_and_restore():
+    big = b'x' * 100
+    message = {'id': 'a', 'args': [big, b'small', {'k': bytearray(200)}], 'meta': {}}
+    doc, buffers = extractBuffers(message, 64)
+    assert doc['oob'] == [100, 200]
+    assert doc['args'][0] == {OOB_KEY: 0}
+    assert doc['args'][1] == b'small'
+    assert buffers[0] is big
+    # the caller's message is left alone
+    assert message['args'][0] is big and 'oob' not in message
+    restored = restoreBuffers(doc, [memoryview(b) for b in buffers])
+    assert 'oob' not in restored
+    assert bytes(restored['args'][0]) == big
+    assert bytes(restored['args'][2]['k']) == bytes(200)
+
+
+def test_nothing_to_extract_returns_same_message():
+    message = {'id': 'a', 'args': [1, b'ab'], 'meta': {}}
+    doc, buffers = extractBuffers(message, 64)
+    assert doc is message and buffers == []
+
+
+def test_colliding_dicts_are_escaped():
+    lookalike = {OOB_KEY: 0}
+    nested = {'__rpc_oob_escape__': {OOB_KEY: 5}}
+    doc, buffers = extractBuffers({'args': [lookalike, b'x' * 100, nested]}, 64)
+    restored = restoreBuffers(doc, [memoryview(b) for b in buffers])
+    assert restored['args'][0] == lookalike
+    assert bytes(restored['args'][1]) == b'x' * 100
+    assert restored['args'][2] == nested
+    # without buffers the message goes out untouched
+    doc, buffers = extractBuffers({'args': [lookalike]}, 64)
+    assert doc['args'][0] is lookalike and buffers == []
+
+
+def test_bad_reference_is_a_connection_error():
+    with pytest.raises(ConnectionError):
+        restoreBuffers({'args': [{OOB_KEY: 3}], 'oob': [1]}, [memoryview(b'x')])
+
+
+def test_small_memoryview_is_inlined_as_bytes():
+    doc, buffers = extractBuffers({'args': [memoryview(b'abc')]}, 64)
+    assert doc['args'] == [b'abc'] and buffers == []
+
+
+@pytest.mark.asyncio
+async def test_tcp_large_bytes_travel_out_of_band():
+    async with tcpPair(18861, BlobService(), 'oob', oob_threshold=1024) as (client, main):
+        assert client.useSender().oob_threshold == 1024
+        payload = bytes(range(256)) * 64 * 1024
+        assert await main.kind(payload) == 'memoryview'
+        assert await main.kind(b'tiny') == 'bytes'
+        assert await main.size(bytearray(5000)) == 5000
+        echoed = await main.echo(payload)
+        assert isinstance(echoed, memoryview) and echoed == payload
+        assert await main.concat(b'a' * 2000, b'b') == b'a' * 2000 + b'b'
+
+
+@pytest.mark.asyncio
+async def test_tcp_server_may_refuse_out_of_band():
+    async with tcpPair(
+        18862, BlobService(), 'oob', server_kwargs={'oob': False}, oob_threshold=1024,
+    ) as (client, main):
+        assert client.useSender().oob_threshold == 0
+        assert await main.kind(b'z' * 5000) == 'bytes'
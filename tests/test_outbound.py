@@ -0,0 +1,78 @@
+"""test_outbound.py — 有序、有界的回复写出测试"""
+import asyncio
+import pytest
+from xuri_rpc import Client, ISender
+
+
+class SlowSender(ISender):
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        await asyncio.sleep(0.01)
+        self.sent.append(message['idFor'])
+
+
+class OverlappingSender(ISender):
+    overlapsSends = True
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        large = len(message.get('data') or b'') > 100000
+        await asyncio.sleep(0.05 if large else 0.001)
+        self.sent.append(message.get('idFor', message.get('streamFor')))
+
+
+class BrokenSender(ISender):
+    async def send(self, message):
+        raise ConnectionError('peer gone')
+
+
+@pytest.mark.asyncio
+async def test_replies_are_ordered_and_bounded():
+    sender = SlowSender()
+    client = Client('outboundHost1')
+    client.setSender(lambda: sender)
+    client.setOutboundQueueSize(2)
+
+    for i in range(6):
+        await client.sendReply({'idFor': i, 'status': 200, 'data': None})
+        assert client.outboundQueueDepth() <= 2
+
+    while client.outboundQueueDepth() or len(sender.sent) < 6:
+        await asyncio.sleep(0.01)
+    assert sender.sent == list(range(6))
+    assert client.getOutboundStats()['sent'] == 6
+
+
+@pytest.mark.asyncio
+async def test_send_errors_are_counted():
+    client = Client('outboundHost2')
+    sender = BrokenSender()
+    client.setSender(lambda: sender)
+    await client.sendReply({'idFor': 1, 'status': 200, 'data': None})
+    await asyncio.sleep(0.01)
+    stats = client.getOutboundStats()
+    assert stats['failed'] == 1
+    assert stats['sent'] == 0
+
+
+@pytest.mark.asyncio
+async def test_only_large_replies_are_overtaken():
+    sender = OverlappingSender()
+    client = Client('outboundHost3')
+    client.setSender(lambda: sender)
+
+    await client.sendReply({'idFor': 'big', 'status': 200, 'data': b'x' * 200000})
+    for i in range(3):
+        await client.sendReply({'idFor': i, 'status': 200, 'data': None})
+    await client.sendReply({'streamFor': 'big', 'status': 200})
+    await client.sendReply({'idFor': 3, 'status': 200, 'data': None})
+
+    while len(sender.sent) < 6:
+        await asyncio.sleep(0.01)
+    # small replies keep their order and pass the large one; the frame of
+    # the large reply's own call waits for it (and so does what follows)
+    assert sender.sent == [0, 1, 2, 'big', 'big', 3]
@@ -0,0 +1,88 @@
+"""test_pipelining.py — 未决远程结果上的流水线调用测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import RpcRemoteError
+from xuri_rpc.rpc import RemotePromise
+from .base_test import connectRecorded
+
+
+class Counter:
+    def __init__(self, start):
+        self.value = start
+
+    def add(self, n):
+        self.value += n
+        return self.value
+
+    def child(self):
+        return Counter(self.value * 10)
+
+
+class Factory:
+    def counter(self, start):
+        return Counter(start)
+
+    def number(self):
+        return 42
+
+    def fail(self):
+        raise ValueError('no counter')
+
+
+@pytest.mark.asyncio
+async def test_chained_call_is_sent_before_base_resolves():
+    client, _receiver, _server_client, to_server, _to_client = connectRecorded(
+        'pipeServer1', 'pipeClient1', Factory(), latency=0.01
+    )
+    main = await client.getMain()
+    client.setPipelining(True)
+    events = []
+    for kind, sender in (('request', to_server), ('reply', _to_client)):
+        def record(message, kind=kind, send=sender.send):
+            for frame in message.get('frames') or (message,):
+                events.append((kind, frame.get('id', frame.get('idFor'))))
+            return send(message)
+        sender.send = record
+
+    counter = main.counter(5)
+    assert isinstance(counter, RemotePromise)
+    assert await counter.add(2) == 7
+    base, chained = to_server.sent[-2]['id'], to_server.sent[-1]['id']
+    # the chained call goes out before the base call's reply comes back
+    assert events.index(('request', chained)) < events.index(('reply', base))
+    assert to_server.sent[-1]['promiseFor'] == to_server.sent[-2]['id']
+    assert to_server.sent[-2]['meta']['pipeline'] == 1
+
+    proxy = await counter
+    assert await proxy.add(1) == 8
+
+
+@pytest.mark.asyncio
+async def test_multi_level_chain():
+    client, *_ = connectRecorded('pipeServer2', 'pipeClient2', Factory(), latency=0.01)
+    main = await client.getMain()
+    client.setPipelining(True)
+    assert await main.counter(3).child().add(1) == 31
+
+
+@pytest.mark.asyncio
+async def test_chained_call_after_base_was_sent():
+    client, *_ = connectRecorded('pipeServer3', 'pipeClient3', Factory(), latency=0.01)
+    main = await client.getMain()
+    client.setPipelining(True)
+    counter = main.counter(1)
+    await asyncio.sleep(0)
+    assert await counter.add(1) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_or_plain_base_fails_chained_call():
+    client, *_ = connectRecorded('pipeServer4', 'pipeClient4', Factory(), latency=0.01)
+    main = await client.getMain()
+    client.setPipelining(True)
+    with pytest.raises(RpcRemoteError):
+        await main.fail().add(1)
+    with pytest.raises(RpcRemoteError):
+        await main.number().add(1)
+    assert await main.number() == 42
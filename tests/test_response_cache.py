@@ -0,0 +1,84 @@
+"""test_response_cache.py — 客户端响应缓存与服务端推送失效测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import clientCached
+from xuri_rpc.local_serialization_sender import DumpChannel, createServer, createMain
+from .base_test import mainFunc
+
+
+class Config:
+    def __init__(self):
+        self.calls = 0
+        self.values = {'mode': 'fast'}
+
+    @clientCached(ttl=60, key='config')
+    def get(self, name):
+        self.calls += 1
+        return {'value': self.values.get(name)}
+
+    @clientCached(ttl=0.05)
+    def version(self):
+        self.calls += 1
+        return self.calls
+
+    def plain(self):
+        self.calls += 1
+        return self.calls
+
+
+@pytest.mark.asyncio
+async def test_cached_calls_resolve_locally():
+    service = Config()
+
+    async def check(client, main, sid):
+        client.enableResponseCache()
+        first = await main.get('mode')
+        first['value'] = 'mutated'
+        assert await main.get('mode') == {'value': 'fast'}
+        assert service.calls == 1
+        await main.plain()
+        await main.plain()
+        assert service.calls == 3
+
+    await mainFunc(service, check)
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_disabled_cache():
+    service = Config()
+
+    async def check(client, main, sid):
+        await main.get('mode')
+        await main.get('mode')
+        assert service.calls == 2
+        client.enableResponseCache()
+        v = await main.version()
+        assert await main.version() == v
+        await asyncio.sleep(0.06)
+        assert await main.version() != v
+
+    await mainFunc(service, check)
+
+
+@pytest.mark.asyncio
+async def test_server_pushes_invalidation():
+    service = Config()
+    channel = DumpChannel()
+    serve = await createServer('responseCacheServer', channel)
+    receiver, _ = serve(service)
+    client, main = await createMain('responseCacheClient', channel)
+    client.enableResponseCache()
+
+    assert await main.get('mode') == {'value': 'fast'}
+    service.values['mode'] = 'safe'
+    assert await main.get('mode') == {'value': 'fast'}
+
+    receiver.pushInvalidation(key='config')
+    await asyncio.sleep(0.01)
+    assert await main.get('mode') == {'value': 'safe'}
+
+    service.values['mode'] = 'slow'
+    receiver.pushInvalidation(objectId='main')
+    await asyncio.sleep(0.01)
+    assert await main.get('mode') == {'value': 'slow'}
@@ -0,0 +1,129 @@
+"""test_result_cache.py — 服务端结果缓存测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import MessageReceiver, cached, getResultCache
+from xuri_rpc.cache import ResultCache, freezeArgs
+from .base_test import connectDump, mainFunc, tcpPair
+
+
+class Directory:
+    def __init__(self):
+        self.calls = 0
+        self.users = {42: {'name': 'ann'}}
+
+    @cached(maxsize=2)
+    def getUser(self, uid):
+        self.calls += 1
+        return self.users.get(uid)
+
+    @cached(ttl=0.05)
+    async def slowCount(self, flag):
+        self.calls += 1
+        return self.calls
+
+    def rename(self, uid, name):
+        self.users[uid] = {'name': name}
+        getResultCache(self.getUser).invalidate(method='getUser')
+
+    @cached
+    def makeObject(self):
+        self.calls += 1
+        return Directory()
+
+
+def test_freeze_args_keeps_types_apart():
+    assert freezeArgs([1]) != freezeArgs([True])
+    assert freezeArgs([1]) != freezeArgs([1.0])
+    assert freezeArgs([{'a': 1, 'b': [2]}]) == freezeArgs([{'b': [2], 'a': 1}])
+    assert freezeArgs([object()]) is None
+
+
+def test_lru_eviction():
+    cache = ResultCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert len(cache) == 2
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_method_skips_handler():
+    service = Directory()
+
+    async def check(_client, main, sid):
+        assert await main.getUser(42) == {'name': 'ann'}
+        assert await main.getUser(42) == {'name': 'ann'}
+        assert service.calls == 1
+        await main.rename(42, 'bob')
+        assert await main.getUser(42) == {'name': 'bob'}
+        assert service.calls == 2
+
+    await mainFunc(service, check)
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_non_plain_results():
+    service = Directory()
+
+    async def check(_client, main, sid):
+        first = await main.slowCount(True)
+        assert await main.slowCount(True) == first
+        await asyncio.sleep(0.06)
+        assert await main.slowCount(True) != first
+        calls = service.calls
+        await main.makeObject()
+        await main.makeObject()
+        assert service.calls == calls + 2
+
+    await mainFunc(service, check)
+
+
+class Profile:
+    def __init__(self, name):
+        self.name = name
+
+    @cached
+    def whoami(self):
+        return self.name
+
+
+@pytest.mark.asyncio
+async def test_each_instance_and_host_has_its_own_cache():
+    _r1, _c1, first = await connectDump('profileServer1', 'profileClient1', Profile('ann'))
+    _r2, _c2, second = await connectDump('profileServer2', 'profileClient2', Profile('bob'))
+    assert await first.whoami() == 'ann'
+    assert await second.whoami() == 'bob'
+    assert await first.whoami() == 'ann'
+
+
+class Private:
+    @cached
+    def secret(self, context):
+        return context.get('user')
+
+
+@pytest.mark.asyncio
+async def test_cached_method_with_context_is_refused():
+    receiver, client, _main = await connectDump('privateServer', 'privateClient', Directory())
+    receiver.setObject('private', Private(), True)
+    private = await client.getObject('private')
+    with pytest.raises(Exception) as exc_info:
+        await private.secret()
+    assert 'cannot be cached' in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_reaches_caches_of_tcp_connections():
+    service = Directory()
+    async with tcpPair(18891, service, 'cache') as (_client, main):
+        assert await main.getUser(42) == {'name': 'ann'}
+        service.users[42] = {'name': 'bob'}
+        assert await main.getUser(42) == {'name': 'ann'}
+        # any receiver of the server host reaches the per-connection ones
+        MessageReceiver('cacheServer18891').invalidateCache(method='getUser')
+        assert await main.getUser(42) == {'name': 'bob'}
+        assert service.calls == 2
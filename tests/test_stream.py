@@ -0,0 +1,101 @@
+"""test_stream.py — 生成器结果流式传输测试"""
+import asyncio
+import pytest
+
+from xuri_rpc import rpc
+from xuri_rpc.rpc import RemoteStream, RpcRemoteError
+from .base_test import mainFunc
+
+
+class StreamService:
+    def __init__(self):
+        self.produced = 0
+        self.closed = False
+
+    async def count(self, n):
+        for i in range(n):
+            self.produced += 1
+            yield i
+            await asyncio.sleep(0)
+
+    def squares(self, n):
+        for i in range(n):
+            yield {'i': i, 'sq': i * i}
+
+    async def broken(self):
+        yield 1
+        raise ValueError('boom')
+
+    async def endless(self):
+        try:
+            i = 0
+            while True:
+                self.produced += 1
+                yield i
+                i += 1
+                await asyncio.sleep(0.001)
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_async_generator_is_streamed():
+    async def check(_client, main, sid):
+        stream = await main.count(5)
+        assert isinstance(stream, RemoteStream)
+        assert [x async for x in stream] == [0, 1, 2, 3, 4]
+        assert not _client._getRemoteStreams()
+
+    await mainFunc(StreamService(), check)
+
+
+@pytest.mark.asyncio
+async def test_sync_generator_is_streamed():
+    async def check(_client, main, sid):
+        items = [x async for x in await main.squares(3)]
+        assert items == [{'i': 0, 'sq': 0}, {'i': 1, 'sq': 1}, {'i': 2, 'sq': 4}]
+
+    await mainFunc(StreamService(), check)
+
+
+@pytest.mark.asyncio
+async def test_stream_error_is_raised_after_chunks():
+    async def check(_client, main, sid):
+        stream = await main.broken()
+        assert await stream.__anext__() == 1
+        with pytest.raises(RpcRemoteError):
+            await stream.__anext__()
+
+    await mainFunc(StreamService(), check)
+
+
+@pytest.mark.asyncio
+async def test_producer_waits_for_credit():
+    service = StreamService()
+
+    async def check(_client, main, sid):
+        stream = await main.count(10 * rpc._streamWindow)
+        await asyncio.sleep(0.1)
+        assert service.produced <= rpc._streamWindow + 1
+        items = [x async for x in stream]
+        assert len(items) == 10 * rpc._streamWindow
+
+    await mainFunc(service, check)
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_stops_producer():
+    service = StreamService()
+
+    async def check(_client, main, sid):
+        async with await main.endless() as stream:
+            async for x in stream:
+                if x == 3:
+                    break
+        await asyncio.sleep(0.05)
+        produced = service.produced
+        assert service.closed
+        await asyncio.sleep(0.05)
+        assert service.produced == produced
+
+    await mainFunc(service, check)
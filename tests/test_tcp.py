@@ -0,0 +1,81 @@
+"""test_tcp.py — TCP 传输与并发分发测试"""
+import asyncio
+import time
+import pytest
+
+from xuri_rpc import Client, ConcurrentDispatcher
+from .base_test import tcpPair
+
+
+class SlowFastService:
+    async def slow(self):
+        await asyncio.sleep(0.5)
+        return 'slow'
+
+    def fast(self, x):
+        return x + 1
+
+    async def callBack(self, cb):
+        return await cb(20)
+
+
+@pytest.mark.asyncio
+async def test_tcp_slow_call_does_not_block_fast_call():
+    async with tcpPair(18801, SlowFastService(), 'tcp') as (client, main):
+        slow = asyncio.ensure_future(main.slow())
+        await asyncio.sleep(0.05)
+        start = time.time()
+        assert await main.fast(1) == 2
+        assert time.time() - start < 0.3
+        assert await slow == 'slow'
+
+
+@pytest.mark.asyncio
+async def test_tcp_serial_dispatch():
+    async with tcpPair(
+        18802, SlowFastService(), 'tcp', server_kwargs={'concurrent': False},
+    ) as (client, main):
+        slow = asyncio.ensure_future(main.slow())
+        await asyncio.sleep(0.05)
+        start = time.time()
+        assert await main.fast(1) == 2
+        assert time.time() - start >= 0.3
+        await slow
+
+
+@pytest.mark.asyncio
+async def test_tcp_callback_with_full_window():
+    async def cb(x):
+        return x * 2
+
+    async with tcpPair(
+        18803, SlowFastService(), 'tcp', server_kwargs={'max_inflight_per_connection': 1},
+    ) as (client, main):
+        results = await asyncio.gather(main.callBack(cb), main.callBack(cb))
+        assert results == [40, 40]
+
+
+class _BlockingReceiver:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def onReceiveMessage(self, message, client):
+        await self.release.wait()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_waits_when_window_and_queue_are_full():
+    receiver = _BlockingReceiver()
+    dispatcher = ConcurrentDispatcher(receiver, Client('dispatchClient'), max_inflight=2, max_queued=1)
+    for i in range(3):
+        await dispatcher.dispatch({'id': i, 'objectId': 'main', 'method': 'm', 'args': []})
+    assert dispatcher.inflight == 3
+    blocked = asyncio.ensure_future(
+        dispatcher.dispatch({'id': 3, 'objectId': 'main', 'method': 'm', 'args': []})
+    )
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+    assert dispatcher.inflight == 3
+    receiver.release.set()
+    await asyncio.wait_for(blocked, 1)
+    await dispatcher.close()
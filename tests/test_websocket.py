@@ -4,6 +4,7 @@ import struct
 import pytest
 
 from xuri_rpc_websocket import createServer, createMain
+from .base_test import dropHost
 
 
 # ---------------------------------------------------------------------------
@@ -168,3 +169,50 @@ async def test_ws_bytes_transfer():
         ws_server.close()
         await ws_server.wait_closed()
         await serve_task
+
+
+class SlowFastService:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def slow(self):
+        await self.release.wait()
+        return 'slow'
+
+    def fast(self, x):
+        return x + 1
+
+    async def callBack(self, cb):
+        return await cb(20)
+
+
+@pytest.mark.asyncio
+async def test_ws_slow_call_does_not_block_fast_call():
+    serve, ws_server, _receiver = await createServer('wsServer8', 'localhost', 18772)
+    service = SlowFastService()
+    serve_task = asyncio.ensure_future(serve(service))
+    client = None
+    try:
+        client, main = await createMain('wsClient8', 'localhost', 18772, max_retries=1)
+        slow = asyncio.ensure_future(main.slow())
+        await asyncio.sleep(0.05)
+        # slow only finishes once fast has, so a blocked fast call times out
+        assert await asyncio.wait_for(main.fast(1), 5) == 2
+        assert not slow.done()
+        service.release.set()
+        assert await slow == 'slow'
+
+        async def cb(x):
+            await asyncio.sleep(0.1)
+            return x * 2
+
+        results = await asyncio.gather(main.callBack(cb), main.callBack(cb))
+        assert results == [40, 40]
+    finally:
+        if client is not None:
+            await client.useSender().ws.close()
+        ws_server.close()
+        await ws_server.wait_closed()
+        await serve_task
+        dropHost('wsClient8')
+        dropHost('wsServer8')
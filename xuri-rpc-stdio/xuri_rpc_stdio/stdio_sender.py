@@ -1,5 +1,7 @@
 """
-Stdio-based RPC transport using CBOR binary encoding (cross-platform).
+Stdio-based RPC transport using length-prefixed binary frames (cross-platform).
+Frames are CBOR unless the two ends negotiate another codec first, and may
+be compressed or split into chunk frames (see :mod:`xuri_rpc.framing`).
 
 Supports both:
 - Raw ``BinaryIO`` streams (``sys.stdin.buffer`` / ``sys.stdout.buffer``)
@@ -22,12 +24,24 @@ Usage — parent process launches a child::
     result = await main_proxy.add(1, 2)  # → 3
 """
 import asyncio
+import logging
 import sys
-from typing import Any, Callable, Optional, Tuple, Union, BinaryIO
-
-import cbor2
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, BinaryIO
 
 from xuri_rpc import Client, MessageReceiver, RpcMessage, ISender
+from xuri_rpc.codec import (
+    CBOR, HELLO_KEY, Codec, acceptAnswer, answerHello, helloOffer, helloOptions, isHello,
+    needsHello, streamOffer,
+)
+from xuri_rpc.compression import (
+    CompressionStats, FrameCompressor, chooseCompression, offeredCompressions,
+)
+from xuri_rpc.framing import (
+    FLAG_COMPRESSED, Reassembler, checkSize, chunkFrames, chunkOption, chunkSizeFor,
+    needsChunks, readMessage, sizeOption,
+)
+
+logger = logging.getLogger(__name__)
 
 # Type alias for stream parameters
 StreamType = Union[BinaryIO, asyncio.StreamReader, asyncio.StreamWriter]
@@ -60,37 +74,94 @@ async def _read_exactly(stream: StreamType, n: int) -> Optional[bytes]:
         return buf
 
 
-async def _read_message(stream: StreamType) -> Optional[RpcMessage]:
-    """Read one length-prefixed CBOR message."""
-    header = await _read_exactly(stream, 4)
-    if header is None:
-        return None
-    length = int.from_bytes(header, 'big')
-    data = await _read_exactly(stream, length)
-    if data is None:
+async def _read_message(
+    stream: StreamType, sender: Optional['_StdioSender'] = None
+) -> Optional[RpcMessage]:
+    """Read one message framed and encoded the way *sender*'s connection agreed
+    (plain CBOR frames without a sender)."""
+    done = await readMessage(
+        lambda n: _read_exactly(stream, n),
+        bool(sender and (sender.chunk_size or sender.compressor)),
+        sender._reassembler if sender else Reassembler(),
+        sender.compressor if sender else None,
+    )
+    if done is None:
         return None
-    return cbor2.loads(data)
+    return (sender.codec if sender else CBOR).decode(done[0])
 
 
 class _StdioSender(ISender):
-    """Sends RPC messages as CBOR binary to a stream."""
+    """Sends RPC messages to a stream, encoded with :attr:`codec`.
+
+    Once the hello agreed on a :attr:`chunk_size`, larger messages are
+    written as chunk frames; other messages may go out between two chunks.
+    Once it agreed on compression, messages of at least
+    :attr:`compress_threshold` bytes are compressed.
+    """
+
+    overlapsSends = True
 
-    def __init__(self, stream: StreamType) -> None:
+    def __init__(
+        self,
+        stream: StreamType,
+        max_message_size: int = 0,
+        compress_threshold: int = 1024,
+    ) -> None:
         self._stream: StreamType = stream
         self._lock: asyncio.Lock = asyncio.Lock()
+        self._chunk_lock: asyncio.Lock = asyncio.Lock()
         self._is_async: bool = _is_async_stream(stream)
+        self.codec: Codec = CBOR
+        self.chunk_size: int = 0
+        self.max_message_size: int = max_message_size
+        self.peer_max_message_size: int = 0
+        self._reassembler: Reassembler = Reassembler(max_message_size)
+        self.compress_threshold: int = compress_threshold
+        self.compressor: Optional[FrameCompressor] = None
+        self.compression_stats: CompressionStats = CompressionStats()
+
+    def _use_compression(self, name: Any) -> None:
+        compression = chooseCompression([name])
+        if compression is not None:
+            self.compressor = FrameCompressor(
+                compression, self.compress_threshold, self.compression_stats
+            )
+
+    def get_compression_stats(self) -> Dict[str, Any]:
+        """Counters of this connection's compression, see
+        :class:`xuri_rpc.compression.CompressionStats`."""
+        stats = self.compression_stats.asDict()
+        stats['algorithm'] = self.compressor.compression.name if self.compressor else None
+        return stats
 
     async def send(self, message: RpcMessage) -> None:
-        data = cbor2.dumps(message)
-        header = len(data).to_bytes(4, 'big')
-        payload = header + data
+        data = self.codec.encode(message)
+        checkSize(len(data), self.peer_max_message_size)
+        flags = 0
+        if self.compressor is not None:
+            data, compressed = self.compressor.compress(data)
+            if compressed:
+                flags = FLAG_COMPRESSED
+        chunk_size = chunkSizeFor(data, self.chunk_size, bool(self.chunk_size or self.compressor))
+        if not needsChunks(data, (), chunk_size):
+            await self._write(data, flags)
+            return
+        async with self._chunk_lock:
+            for frame in chunkFrames([data], chunk_size, flags):
+                await self._write_parts(frame)
+
+    async def _write(self, data: bytes, flags: int = 0) -> None:
+        header = (len(data) | flags).to_bytes(4, 'big')
+        await self._write_parts([header + data])
+
+    async def _write_parts(self, parts: Sequence[Any]) -> None:
         async with self._lock:
             if self._is_async:
-                self._stream.write(payload)
+                self._stream.writelines(parts)
                 await self._stream.drain()
             else:
                 loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, self._stream.write, payload)
+                await loop.run_in_executor(None, self._stream.writelines, parts)
                 self._stream.flush()
 
 
@@ -99,18 +170,55 @@ async def _runLoop(
     out_stream: StreamType,
     messageReceiver: MessageReceiver,
     client: Client,
+    codecs: Optional[Sequence[str]] = None,
+    compression: Optional[Sequence[str]] = None,
+    pending: Optional['asyncio.Future[Optional[RpcMessage]]'] = None,
 ) -> None:
-    """Continuously read CBOR messages and dispatch them."""
-    sender = _StdioSender(out_stream)
-    if client.useSender() is None:
+    """Continuously read messages and dispatch them.
+
+    On the serving side a hello arriving as the very first frame is answered
+    here; *codecs* and *compression* limit what it may pick.  On the calling
+    side *pending* is a read the hello wait gave up on; it is finished first.
+    """
+    sender = client.useSender()
+    if sender is None:
+        sender = _StdioSender(out_stream)
         client.setSender(lambda: sender)
+    first = pending is None
     try:
         while True:
-            msg = await _read_message(in_stream)
+            if pending is not None:
+                msg, pending = await pending, None
+                if isHello(msg):
+                    logger.warning("hello answer arrived after the timeout, ignored")
+                    continue
+            else:
+                msg = await _read_message(in_stream, sender)
             if msg is None:
                 break
+            if first:
+                first = False
+                if isHello(msg):
+                    codec, answer = answerHello(msg, codecs)
+                    options = helloOptions(msg)
+                    chunk = chunkOption(options.get('chunk'))
+                    if chunk:
+                        answer[HELLO_KEY]['chunk'] = chunk
+                    if sender.max_message_size:
+                        answer[HELLO_KEY]['maxMessage'] = sender.max_message_size
+                    chosen = chooseCompression(options.get('compression'), compression)
+                    if chosen is not None:
+                        answer[HELLO_KEY]['compression'] = chosen.name
+                    await sender._write(CBOR.encode(answer))
+                    sender.codec = codec
+                    sender.chunk_size = chunk
+                    sender.peer_max_message_size = sizeOption(options.get('maxMessage'))
+                    if chosen is not None:
+                        sender._use_compression(chosen.name)
+                    continue
             await messageReceiver.onReceiveMessage(msg, client)
     except (EOFError, OSError, asyncio.IncompleteReadError):
+        # ConnectionError (e.g. an oversized frame) is an OSError
         pass
 
 
@@ -122,11 +230,21 @@ async def createServer(
     hostId: str,
     in_stream: Optional[StreamType] = None,
     out_stream: Optional[StreamType] = None,
+    codecs: Optional[Sequence[str]] = None,
+    max_message_size: int = 0,
+    compression: Optional[Sequence[str]] = None,
+    compress_threshold: int = 1024,
 ) -> Callable[[Any], Any]:
     """Create a stdio-based RPC server.
 
     If *in_stream*/*out_stream* are not given, ``sys.stdin.buffer`` /
-    ``sys.stdout.buffer`` are used.
+    ``sys.stdout.buffer`` are used.  *codecs* restricts the codecs the
+    parent may pick in its hello (default: every registered codec).
+    *max_message_size* is the largest message in bytes accepted from the
+    parent (``0`` means unlimited); a larger frame ends the loop.
+    *compression* lists the compression algorithms the parent may pick
+    (default: every registered one; ``()`` refuses), and
+    *compress_threshold* is the smallest encoded reply this side compresses.
 
     Returns a callable ``serve(mainObject)`` that registers the main object
     and starts the I/O loop.  ``serve`` is an async function that blocks
@@ -137,12 +255,12 @@ async def createServer(
 
     messageReceiver: MessageReceiver = MessageReceiver(hostId)
     client: Client = Client(hostId)
-    sender: _StdioSender = _StdioSender(out_stream)
+    sender: _StdioSender = _StdioSender(out_stream, max_message_size, compress_threshold)
     client.setSender(lambda: sender)
 
     async def serve(mainObject: Any) -> Tuple[MessageReceiver, Callable[[Any], Any]]:
         messageReceiver.setMain(mainObject)
-        await _runLoop(in_stream, out_stream, messageReceiver, client)
+        await _runLoop(in_stream, out_stream, messageReceiver, client, codecs, compression)
         return (messageReceiver, serve)
 
     return serve
@@ -156,12 +274,37 @@ async def createMain(
     hostId: str,
     out_stream: Optional[StreamType] = None,
     in_stream: Optional[StreamType] = None,
+    codecs: Optional[Sequence[str]] = None,
+    chunk_size: int = 0,
+    max_message_size: int = 0,
+    compression: Union[bool, Sequence[str]] = False,
+    compress_threshold: int = 1024,
+    hello_timeout: float = 1.0,
 ) -> Tuple[Client, Any]:
     """Create a stdio-based RPC client.
 
     *out_stream* is the stream that goes to the server's stdin.
     *in_stream* is the stream that receives the server's stdout.
 
+    *codecs* are offered to the server in a hello, most preferred first
+    (default: CBOR only; :func:`xuri_rpc.codec.defaultCodecs` lists the
+    fastest available).  A hello is sent only when something beyond CBOR is
+    offered or one of the options below is set, since a server that
+    predates it cannot answer.  Without an answer within *hello_timeout*
+    seconds the connection stays on CBOR.
+
+    With a positive *chunk_size* the hello also asks for chunked transfer:
+    messages larger than that (but at least
+    :data:`xuri_rpc.framing.MIN_CHUNK_SIZE`) are written as a series of
+    chunk frames in both directions.  *max_message_size* is the largest message in bytes
+    accepted from the server (``0`` means unlimited); sending one over the
+    server's own limit raises :class:`xuri_rpc.framing.MessageTooLarge`.
+
+    *compression* offers compression algorithms, most preferred first
+    (``True``: :func:`xuri_rpc.compression.defaultCompressions`); each side
+    then compresses encoded messages of at least its own
+    *compress_threshold* bytes.  ``False`` (default) offers none.
+
     Returns ``(client, mainProxy)``.
     """
     out_stream = out_stream or sys.stdout.buffer
@@ -169,10 +312,42 @@ async def createMain(
 
     client: Client = Client(hostId)
     messageReceiver: MessageReceiver = MessageReceiver(hostId)
-    sender: _StdioSender = _StdioSender(out_stream)
+    sender: _StdioSender = _StdioSender(out_stream, max_message_size, compress_threshold)
     client.setSender(lambda: sender)
 
-    asyncio.ensure_future(_runLoop(in_stream, out_stream, messageReceiver, client))
+    offer: List[str] = streamOffer(codecs)
+    options = {
+        key: value
+        for key, value in (
+            ('chunk', chunkOption(chunk_size)),
+            ('maxMessage', max_message_size),
+            ('compression', offeredCompressions(compression)),
+        )
+        if value
+    }
+    pending: Optional['asyncio.Future[Optional[RpcMessage]]'] = None
+    if needsHello(offer) or options:
+        await sender._write(CBOR.encode(helloOffer(offer, **options)))
+        # the read is not cancelled on timeout, so a frame that arrives
+        # later (or one that is not a hello answer) still reaches the loop
+        pending = asyncio.ensure_future(_read_message(in_stream, sender))
+        try:
+            answer = await asyncio.wait_for(asyncio.shield(pending), hello_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("no hello answer from server, using CBOR")
+            answer = None
+        else:
+            if isHello(answer):
+                pending = None
+        sender.codec = acceptAnswer(answer)
+        options = helloOptions(answer)
+        sender.chunk_size = chunkOption(options.get('chunk'))
+        sender.peer_max_message_size = sizeOption(options.get('maxMessage'))
+        sender._use_compression(options.get('compression'))
+
+    asyncio.ensure_future(
+        _runLoop(in_stream, out_stream, messageReceiver, client, pending=pending)
+    )
 
     main: Any = await client.getMain()
     return (client, main)
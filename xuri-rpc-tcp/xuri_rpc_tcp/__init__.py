@@ -3,13 +3,13 @@ xuri-rpc-tcp — tcp sender for xuri-rpc.
 """
 
 from .tcp_sender import (
-    tcpBinarySender,
+    TcpBinarySender,
     createServer,
     createMain,
 )
 
 __all__ = [
-    'tcpBinarySender',
+    'TcpBinarySender',
     'createServer',
     'createMain',
 ]
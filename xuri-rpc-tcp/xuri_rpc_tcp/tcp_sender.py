@@ -1,16 +1,28 @@
 """
-TCP sender and connection helpers using CBOR binary format with length-prefix framing.
+TCP sender and connection helpers with length-prefix framing.  Messages are
+CBOR-encoded unless both ends negotiate another codec when connecting.
 """
 import asyncio
 import logging
 import struct
 import uuid
-from typing import Any, Awaitable, Callable, Optional, Tuple, Dict, Union
-
-import cbor2
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple, Dict, Union
+
+from xuri_rpc.codec import (
+    CBOR, HELLO_KEY, Codec, acceptAnswer, answerHello, helloOffer, helloOptions, isHello,
+    needsHello, streamOffer,
+)
+from xuri_rpc.compression import (
+    CompressionStats, FrameCompressor, chooseCompression, offeredCompressions,
+)
+from xuri_rpc.framing import (
+    FLAG_COMPRESSED, Reassembler, bufferSize, checkSize, chunkFrames,
+    chunkOption, chunkSizeFor, needsChunks, readMessage, sizeOption,
+)
+from xuri_rpc.oob import extractBuffers, restoreBuffers
 from xuri_rpc.rpc import debugFlag
 
-from xuri_rpc import Client, MessageReceiver, RpcMessage, ISender
+from xuri_rpc import Client, MessageReceiver, RpcMessage, ISender, ConcurrentDispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +36,18 @@ _HEADER_SIZE = struct.calcsize(_HEADER_FMT)
 # ---------------------------------------------------------------------------
 
 class TcpBinarySender(ISender):
-    """Sends RPC messages as length-prefixed CBOR-encoded binary over TCP.
+    """Sends RPC messages as length-prefixed binary frames over TCP.
+
+    Frames are encoded with :attr:`codec`, CBOR until a hello exchange
+    (:meth:`handshake`) settles on something else.  When the hello also
+    agreed on out-of-band buffers, binary values of at least
+    :attr:`oob_threshold` bytes follow the frame as raw side data written
+    with one vectored write, and arrive at the handler as ``memoryview``.
+    When it agreed on a :attr:`chunk_size`, messages larger than that (and
+    all messages with out-of-band buffers) are sent as chunk frames, see
+    :mod:`xuri_rpc.framing`.  When it agreed on a compression algorithm,
+    encoded messages of at least :attr:`compress_threshold` bytes are
+    compressed; see :meth:`get_compression_stats`.
 
     *session_id* may be a plain string **or** a zero-argument callable that
     returns the current session id (useful on the client side where the id is
@@ -43,6 +66,8 @@ class TcpBinarySender(ISender):
     so that only one reconnection happens at a time.
     """
 
+    overlapsSends = True
+
     def __init__(
         self,
         stream: Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = None,
@@ -63,6 +88,28 @@ class TcpBinarySender(ISender):
         self._reconnect_lock: Optional[asyncio.Lock] = None
         self._client: Optional[Client] = None
 
+        # codec negotiation (offer set by createMain)
+        self.codec: Codec = CBOR
+        self._offer: List[str] = []
+        self._hello_timeout: float = 1.0
+        self._oob_offer: int = 0
+        self.oob_threshold: int = 0
+
+        # framing: chunk size agreed in the hello (0 = one frame per message),
+        # our own receive limit and the peer's
+        self._chunk_offer: int = 0
+        self.chunk_size: int = 0
+        self.max_message_size: int = 0
+        self.peer_max_message_size: int = 0
+        self._reassembler: Reassembler = Reassembler()
+        self._chunk_lock: asyncio.Lock = asyncio.Lock()
+
+        # compression agreed in the hello; stats survive reconnects
+        self._compression_offer: List[str] = []
+        self.compress_threshold: int = 1024
+        self.compressor: Optional[FrameCompressor] = None
+        self.compression_stats: CompressionStats = CompressionStats()
+
     # -- session id ---------------------------------------------------------
 
     @property
@@ -77,11 +124,17 @@ class TcpBinarySender(ISender):
 
     @staticmethod
     async def _write_frame(
-        writer: asyncio.StreamWriter, payload: bytes
+        writer: asyncio.StreamWriter,
+        payload: bytes,
+        buffers: Sequence[Any] = (),
+        flags: int = 0,
     ) -> None:
-        """Write a length-prefixed frame to the TCP stream."""
-        header = struct.pack(_HEADER_FMT, len(payload))
-        writer.write(header + payload)
+        """Write a length-prefixed frame, followed by out-of-band *buffers*."""
+        header = struct.pack(_HEADER_FMT, len(payload) | flags)
+        if buffers:
+            writer.writelines([header, payload, *buffers])
+        else:
+            writer.write(header + payload)
         await writer.drain()
 
     @staticmethod
@@ -95,6 +148,130 @@ class TcpBinarySender(ISender):
             return b""
         return await reader.readexactly(length)
 
+    async def _write_message(
+        self, writer: asyncio.StreamWriter, payload: bytes, buffers: Sequence[Any] = ()
+    ) -> None:
+        """Write one encoded message, compressed and in chunks as agreed."""
+        checkSize(
+            len(payload) + sum(bufferSize(b) for b in buffers),
+            self.peer_max_message_size,
+        )
+        flags = 0
+        if self.compressor is not None:
+            payload, compressed = self.compressor.compress(payload)
+            if compressed:
+                flags = FLAG_COMPRESSED
+        chunk_size = chunkSizeFor(payload, self.chunk_size, bool(self.chunk_size or self.compressor))
+        if not needsChunks(payload, buffers, chunk_size):
+            await self._write_frame(writer, payload, buffers, flags)
+            return
+        # one chunked message at a time; plain frames of other calls may be
+        # written while this one waits for drain
+        async with self._chunk_lock:
+            for frame in chunkFrames([payload, *buffers], chunk_size, flags):
+                writer.writelines(frame)
+                await writer.drain()
+
+    async def _read_message(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[RpcMessage]:
+        """Read and decode one message, including its out-of-band buffers."""
+        done = await readMessage(
+            reader.readexactly,
+            bool(self.chunk_size or self.compressor),
+            self._reassembler,
+            self.compressor,
+        )
+        if done is None:
+            return None
+        doc, rest = done
+        message = self.codec.decode(doc)
+        lengths = message.get("oob") if self.oob_threshold else None
+        if not lengths:
+            return message
+        if rest is not None:
+            # buffers arrived in the same chunked message, after the document
+            buffers, offset = [], 0
+            for n in lengths:
+                buffers.append(rest[offset:offset + n])
+                offset += n
+        else:
+            limit = self.max_message_size
+            if limit and len(doc) + sum(lengths) > limit:
+                raise ConnectionError(f"message exceeds the limit of {limit} bytes")
+            buffers = [memoryview(await reader.readexactly(n)) for n in lengths]
+        return restoreBuffers(message, buffers)
+
+    def _reset_framing(self) -> None:
+        self.chunk_size = 0
+        self.peer_max_message_size = 0
+        self.compressor = None
+        self._reassembler = Reassembler(self.max_message_size)
+
+    def _use_compression(self, name: Any) -> None:
+        compression = chooseCompression([name])
+        if compression is not None:
+            self.compressor = FrameCompressor(
+                compression, self.compress_threshold, self.compression_stats
+            )
+
+    def get_compression_stats(self) -> Dict[str, Any]:
+        """Counters of this connection's compression, see
+        :class:`xuri_rpc.compression.CompressionStats`; ``algorithm`` is
+        ``None`` while uncompressed."""
+        stats = self.compression_stats.asDict()
+        stats['algorithm'] = self.compressor.compression.name if self.compressor else None
+        return stats
+
+    # -- codec negotiation --------------------------------------------------
+
+    async def handshake(self) -> None:
+        """Offer codecs to the server and switch to the one it picks.
+
+        Runs on every fresh connection before any RPC traffic, but only
+        sends a hello when more than plain CBOR framing was asked for.  A
+        server that does not answer within the timeout is spoken to in CBOR;
+        one that closes the connection on the hello (a release that predates
+        it) raises :class:`ConnectionError`.
+        """
+        self.codec = CBOR
+        self.oob_threshold = 0
+        self._reset_framing()
+        options = {
+            key: value
+            for key, value in (
+                ('oob', self._oob_offer),
+                ('chunk', self._chunk_offer),
+                ('maxMessage', self.max_message_size),
+                ('compression', self._compression_offer),
+            )
+            if value
+        }
+        if not (needsHello(self._offer) or options):
+            return
+        reader, writer = self.stream
+        await self._write_frame(writer, CBOR.encode(helloOffer(self._offer, **options)))
+        try:
+            raw = await asyncio.wait_for(
+                self._read_frame(reader), self._hello_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("no hello answer from server, using CBOR")
+            return
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            raise ConnectionError(
+                "server closed the connection on the hello; it may predate "
+                "codec negotiation, connect without codecs and transport options"
+            ) from exc
+        answer = CBOR.decode(raw) if raw else None
+        self.codec = acceptAnswer(answer)
+        options = helloOptions(answer)
+        if options.get('oob'):
+            self.oob_threshold = self._oob_offer
+        self.chunk_size = chunkOption(options.get('chunk'))
+        self.peer_max_message_size = sizeOption(options.get('maxMessage'))
+        self._use_compression(options.get('compression'))
+
     # -- reconnection -------------------------------------------------------
 
     def _configure_reconnect(
@@ -175,6 +352,7 @@ class TcpBinarySender(ISender):
                         f"[TCP] Reconnected: local port {local_addr[1]}, "
                         f"remote port {remote_addr[1]}"
                     )
+                    await self.handshake()
 
                     if self._on_reconnect is not None:
                         try:
@@ -204,8 +382,11 @@ class TcpBinarySender(ISender):
         try:
             await self.ensure_connected()
             _, writer = self.stream
-            payload = cbor2.dumps(message)
-            await self._write_frame(writer, payload)
+            buffers: Sequence[Any] = ()
+            if self.oob_threshold:
+                message, buffers = extractBuffers(message, self.oob_threshold)
+            payload = self.codec.encode(message)
+            await self._write_message(writer, payload, buffers)
         except (ConnectionError, OSError) as exc:
             if self.stream is not None:
                 _, writer = self.stream
@@ -225,11 +406,52 @@ class TcpBinarySender(ISender):
 # Server side
 # ---------------------------------------------------------------------------
 
+async def _answer_hello(
+    sender: TcpBinarySender,
+    hello: RpcMessage,
+    codecs: Optional[Sequence[str]],
+    oob: bool,
+    compression: Optional[Sequence[str]],
+) -> None:
+    """Answer a client's hello and switch *sender* to what was agreed."""
+    codec, answer = answerHello(hello, codecs)
+    offer = helloOptions(hello)
+    agreed = answer[HELLO_KEY]
+    threshold = sizeOption(offer.get("oob"))
+    if oob and threshold:
+        agreed["oob"] = True
+    chunk = chunkOption(offer.get("chunk"))
+    if chunk:
+        agreed["chunk"] = chunk
+    if sender.max_message_size:
+        agreed["maxMessage"] = sender.max_message_size
+    chosen = chooseCompression(offer.get("compression"), compression)
+    if chosen is not None:
+        agreed["compression"] = chosen.name
+    # the answer itself still goes out in the plain framing
+    await TcpBinarySender._write_frame(sender.stream[1], CBOR.encode(answer))
+    sender.codec = codec
+    sender.oob_threshold = threshold if oob else 0
+    sender.chunk_size = chunk
+    sender.peer_max_message_size = sizeOption(offer.get("maxMessage"))
+    if chosen is not None:
+        sender._use_compression(chosen.name)
+
+
 async def createServer(
     hostId: str,
     host: str = "localhost",
     port: int = 8765,
     path: str = "/",
+    *,
+    concurrent: bool = True,
+    max_inflight_per_connection: int = 64,
+    max_inflight: int = 1024,
+    codecs: Optional[Sequence[str]] = None,
+    oob: bool = True,
+    max_message_size: int = 0,
+    compression: Optional[Sequence[str]] = None,
+    compress_threshold: int = 1024,
 ) -> Tuple[Callable[[Any], Any], asyncio.AbstractServer]:
     """Create a TCP-based RPC server with length-prefix framing.
 
@@ -237,12 +459,48 @@ async def createServer(
     registers the main object and blocks until the server is closed.
     ``tcp_server`` is the underlying asyncio server for lifecycle management.
 
+    Dispatch parameters
+    -------------------
+    concurrent : bool
+        When ``True`` (default) every decoded request runs as its own task,
+        so a slow handler does not stall other calls on the same socket.
+        Replies to the server's own pending calls are always processed
+        immediately.  ``False`` restores strictly serial dispatch.
+    max_inflight_per_connection : int
+        Maximum requests executing at once on one connection (``0`` means
+        unlimited).  As many again may wait for a slot; beyond that the
+        connection stops reading until a request finishes.
+    max_inflight : int
+        Maximum requests executing at once across the whole server (``0``
+        means unlimited).
+    codecs : sequence of str, optional
+        Codec names this server accepts in a client's hello (default: every
+        registered codec).  Clients that send no hello are spoken to in CBOR.
+    oob : bool
+        Accept a client's request for out-of-band buffers; the server then
+        uses the client's threshold for its replies as well.
+    max_message_size : int
+        Largest message, in bytes, accepted from a client (``0`` means
+        unlimited).  A larger frame closes the connection before its payload
+        is read; clients that said hello learn the limit and refuse to send
+        such messages.  Chunked transfer is used whenever a client asks
+        for it.
+    compression : sequence of str, optional
+        Compression algorithms a client may pick in its hello (default:
+        every registered one; ``()`` refuses compression).
+    compress_threshold : int
+        Smallest encoded reply, in bytes, that the server compresses on a
+        connection that agreed on compression.
+
     Usage::
 
         serve, tcp_server = await createServer('myServer', 'localhost', 8765)
         await serve(MyService())  # blocks until tcp_server is closed
     """
     serverReceiver: MessageReceiver = MessageReceiver(hostId)
+    server_limit: Optional[asyncio.Semaphore] = (
+        asyncio.Semaphore(max_inflight) if concurrent and max_inflight > 0 else None
+    )
 
     async def _onTcpConnected(
         reader: asyncio.StreamReader, writer: asyncio.StreamWriter
@@ -259,19 +517,37 @@ async def createServer(
         conn_sender: TcpBinarySender = TcpBinarySender(
             (reader, writer), session_id
         )
+        conn_sender.max_message_size = max_message_size
+        conn_sender.compress_threshold = compress_threshold
+        conn_sender._reset_framing()
         # Register sender in session map at connection time
         conn_client: Client = Client(hostId)
         conn_client.getSessionData()[session_id] = conn_sender
         conn_client.setSender(lambda: conn_client.getSessionData()[session_id])
         connReceiver: MessageReceiver = MessageReceiver(hostId)
+        dispatcher: Optional[ConcurrentDispatcher] = (
+            ConcurrentDispatcher(
+                connReceiver, conn_client,
+                max_inflight_per_connection, server_limit,
+            )
+            if concurrent else None
+        )
 
+        first: bool = True
         try:
             while True:
-                raw = await TcpBinarySender._read_frame(reader)
-                if raw is None:
+                data = await conn_sender._read_message(reader)
+                if data is None:
                     break  # clean EOF
-                data = cbor2.loads(raw)
-                await connReceiver.onReceiveMessage(data, conn_client)
+                if first:
+                    first = False
+                    if isHello(data):
+                        await _answer_hello(conn_sender, data, codecs, oob, compression)
+                        continue
+                if dispatcher is not None:
+                    await dispatcher.dispatch(data)
+                else:
+                    await connReceiver.onReceiveMessage(data, conn_client)
         except asyncio.IncompleteReadError:
             # Peer disconnected without sending full frame
             pass
@@ -280,6 +556,8 @@ async def createServer(
             traceback.print_exc()
             pass
         finally:
+            if dispatcher is not None:
+                await dispatcher.close()
             writer.close()
             try:
                 await writer.wait_closed()
@@ -313,6 +591,13 @@ async def createMain(
     retry_delay: float = 1.0,
     retry_backoff: float = 2.0,
     on_reconnect: Optional[Callable[[Client, Optional[Any]], Any]] = None,
+    codecs: Optional[Sequence[str]] = None,
+    hello_timeout: float = 1.0,
+    oob_threshold: int = 0,
+    chunk_size: int = 0,
+    max_message_size: int = 0,
+    compression: Union[bool, Sequence[str]] = False,
+    compress_threshold: int = 1024,
 ) -> Tuple[Client, Any]:
     """Connect to a TCP-based RPC server and return the main proxy.
 
@@ -340,6 +625,48 @@ async def createMain(
         every successful *re*connection.  Useful for re-subscribing or
         re-registering state.
 
+    Codec parameters
+    ----------------
+    codecs : sequence of str, optional
+        Codec names offered to the server, most preferred first (default:
+        CBOR only; :func:`xuri_rpc.codec.defaultCodecs` lists the fastest
+        available).  A hello is sent only when something beyond CBOR is
+        offered or a transport option below is set; servers that predate
+        the hello close the connection on it.
+    hello_timeout : float
+        Seconds to wait for the server's answer before settling on CBOR.
+    oob_threshold : int
+        When positive, ask the server to move ``bytes``/``bytearray``/
+        ``memoryview`` values of at least this many bytes out of the encoded
+        message into raw side data (both directions).  Large values then
+        reach handlers as read-only ``memoryview`` objects.  Buffers are
+        written without copying, so do not mutate them until the call
+        returns.  ``0`` (default) keeps them inline.
+
+    Framing parameters
+    ------------------
+    chunk_size : int
+        When positive, ask the server to send messages larger than this many
+        bytes (and any with out-of-band buffers) as a series of chunk frames,
+        in both directions.  Small calls can then be written between the
+        chunks of a big one, and the receiver fills one preallocated buffer
+        instead of holding a second copy.  Sizes are kept between
+        ``MIN_CHUNK_SIZE`` and ``MAX_CHUNK_SIZE`` of
+        :mod:`xuri_rpc.framing`.  ``0`` (default) sends each message as a
+        single frame.
+    max_message_size : int
+        Largest message, in bytes, accepted from the server (``0`` means
+        unlimited).  Sending a message over the server's own limit raises
+        :class:`xuri_rpc.framing.MessageTooLarge`.
+    compression : bool or sequence of str
+        Compression algorithms offered to the server, most preferred first
+        (``True``: :func:`xuri_rpc.compression.defaultCompressions`).  Both
+        ends then compress encoded messages of at least their own
+        *compress_threshold* bytes that actually shrink.  ``False``
+        (default) sends everything uncompressed.
+    compress_threshold : int
+        Smallest encoded message, in bytes, that this side compresses.
+
     Usage::
 
         client, main = await createMain('myClient', 'localhost', 8765)
@@ -358,6 +685,13 @@ async def createMain(
         retry_backoff=retry_backoff,
         on_reconnect=on_reconnect,
     )
+    sender._offer = streamOffer(codecs)
+    sender._hello_timeout = hello_timeout
+    sender._oob_offer = oob_threshold
+    sender._chunk_offer = chunkOption(chunk_size)
+    sender.max_message_size = max_message_size
+    sender._compression_offer = offeredCompressions(compression)
+    sender.compress_threshold = compress_threshold
 
     # Initial connection
     try:
@@ -372,6 +706,11 @@ async def createMain(
         f"[TCP] Connected: local port {local_addr[1]}, "
         f"remote port {remote_addr[1]}"
     )
+    try:
+        await sender.handshake()
+    except ConnectionError:
+        writer.close()
+        raise
 
     # Start background listen — reconnect is triggered from inside
     asyncio.ensure_future(_listen(sender, messageReceiver, client))
@@ -392,10 +731,9 @@ async def _listen(
                 raise ConnectionError("No active TCP stream")
             reader, _ = sender.stream
             while True:
-                raw = await TcpBinarySender._read_frame(reader)
-                if raw is None:
+                data = await sender._read_message(reader)
+                if data is None:
                     raise ConnectionError("Clean EOF from server")
-                data = cbor2.loads(raw)
                 # Extract sessionId from meta and update sender
                 meta = data.get("meta") or {}
                 if meta.get("sessionId"):
@@ -1,24 +1,33 @@
 """
-WebSocket sender and connection helpers supporting both CBOR binary and
-JSON text formats.
+WebSocket sender and connection helpers supporting both binary frames (CBOR
+or a codec negotiated as a WebSocket subprotocol) and JSON text frames.
+Messages are compressed with the standard permessage-deflate extension when
+the peer supports it.
 Requires: pip install websockets cbor2
 """
 import asyncio
 import base64
-import json
 import logging
+import time
 import uuid
-from typing import Any, Awaitable, Callable, Literal, Optional, Tuple, Dict, Union
+from typing import Any, Awaitable, Callable, List, Literal, Optional, Sequence, Tuple, Dict, Union
 
-import cbor2
+from xuri_rpc import codec as _codec
+from xuri_rpc.codec import CBOR, JSON, Codec, _jsonDefault, _reviveBytes
+from xuri_rpc.compression import CompressionStats
 from xuri_rpc.rpc import debugFlag
 import websockets
 from websockets.exceptions import ConnectionClosed
+from websockets.extensions.base import Extension
+from websockets.extensions.permessage_deflate import (
+    ClientPerMessageDeflateFactory, ServerPerMessageDeflateFactory,
+)
+from websockets.frames import CTRL_OPCODES, Frame, Opcode
 from websockets.legacy.protocol import WebSocketCommonProtocol
 from websockets.legacy.server import WebSocketServerProtocol, WebSocketServer
 from websockets.legacy.client import WebSocketClientProtocol
 
-from xuri_rpc import Client, MessageReceiver, RpcMessage, ISender
+from xuri_rpc import Client, MessageReceiver, RpcMessage, ISender, ConcurrentDispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +36,7 @@ logger = logging.getLogger(__name__)
 # Base64 helpers (for embedding binary data inside JSON messages)
 # ---------------------------------------------------------------------------
 
-BYTES_PREFIX = "--^3jK7a%A8_Di0o77Z"
+BYTES_PREFIX = _codec.BYTES_PREFIX
 
 
 def uint8_to_base64(data: bytes) -> str:
@@ -44,29 +53,122 @@ def base64_to_uint8(b64: str) -> bytes:
 # JSON serializer / deserializer with base64 for bytes
 # ---------------------------------------------------------------------------
 
-def _json_replacer(obj: Any) -> Any:
-    """JSON default hook – converts bytes to prefixed base64 string."""
-    if isinstance(obj, (bytes, bytearray)):
-        return BYTES_PREFIX + uint8_to_base64(obj)
-    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
-
-
-def _json_reviver(obj: dict) -> Any:
-    """JSON object_hook – restores prefixed base64 strings back to bytes."""
-    for key, value in obj.items():
-        if isinstance(value, str) and value.startswith(BYTES_PREFIX):
-            obj[key] = base64_to_uint8(value[len(BYTES_PREFIX):])
-    return obj
+_json_replacer = _jsonDefault
+_json_reviver = _reviveBytes
 
 
 def encode_text_message(message: RpcMessage) -> str:
     """Serialize an RpcMessage to the text wire format (JSON with prefixed-base64 bytes)."""
-    return json.dumps(message, default=_json_replacer)
+    return JSON.encodeText(message)
 
 
 def decode_text_message(raw: str) -> RpcMessage:
     """Deserialize a text wire message back to an RpcMessage."""
-    return json.loads(raw, object_hook=_json_reviver)
+    return JSON.decodeText(raw)
+
+
+# ---------------------------------------------------------------------------
+# Codec negotiation via WebSocket subprotocols
+# ---------------------------------------------------------------------------
+
+_SUBPROTOCOL_PREFIX = "xuri-rpc."
+
+
+def _subprotocols(names: Sequence[str]) -> List[str]:
+    return [_SUBPROTOCOL_PREFIX + name for name in names]
+
+
+def _codec_for(subprotocol: Optional[str]) -> Codec:
+    """Codec of a negotiated subprotocol; CBOR when none was agreed."""
+    if not subprotocol or not subprotocol.startswith(_SUBPROTOCOL_PREFIX):
+        return CBOR
+    name = subprotocol[len(_SUBPROTOCOL_PREFIX):]
+    return _codec.chooseCodec([name])
+
+
+def _select_subprotocol(connection: Any, offered: Sequence[str]) -> Optional[str]:
+    """Honour the client's order, like the TCP and stdio hello."""
+    accepted = connection.protocol.available_subprotocols or ()
+    for subprotocol in offered:
+        if subprotocol in accepted:
+            return subprotocol
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Compression: permessage-deflate with a size threshold
+# ---------------------------------------------------------------------------
+# WebSocket already defines per-message compression (RFC 7692): it is
+# negotiated in the opening handshake and flagged with the RSV1 bit of each
+# message, and every browser speaks it.  The wrapper below only skips
+# messages under a threshold (sent with RSV1 clear, which the RFC allows)
+# and counts the work for get_compression_stats().
+
+class _MeteredDeflate(Extension):
+    """permessage-deflate that leaves small messages alone and keeps stats."""
+
+    def __init__(self, inner: Extension, threshold: int) -> None:
+        self.inner: Extension = inner
+        self.name = inner.name
+        self.threshold: int = threshold
+        self.stats: CompressionStats = CompressionStats()
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is not Opcode.CONT and frame.fin and len(frame.data) < self.threshold:
+            return frame
+        start = time.perf_counter()
+        out = self.inner.encode(frame)
+        stats = self.stats
+        stats.compressSeconds += time.perf_counter() - start
+        if frame.opcode is not Opcode.CONT:
+            stats.frames += 1
+            stats.compressed += 1
+        stats.bytesIn += len(frame.data)
+        stats.bytesOut += len(out.data)
+        return out
+
+    def decode(self, frame: Frame, *, max_size: Optional[int] = None) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        start = time.perf_counter()
+        out = self.inner.decode(frame, max_size=max_size)
+        if frame.rsv1:
+            self.stats.decompressed += 1
+        self.stats.decompressSeconds += time.perf_counter() - start
+        return out
+
+
+class _ClientDeflateFactory(ClientPerMessageDeflateFactory):
+    def __init__(self, threshold: int) -> None:
+        # same settings websockets uses by default
+        super().__init__(compress_settings={"memLevel": 5})
+        self.threshold: int = threshold
+
+    def process_response_params(self, params: Any, accepted_extensions: Any) -> Extension:
+        return _MeteredDeflate(
+            super().process_response_params(params, accepted_extensions), self.threshold
+        )
+
+
+class _ServerDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, threshold: int) -> None:
+        super().__init__(
+            server_max_window_bits=12,
+            client_max_window_bits=12,
+            compress_settings={"memLevel": 5},
+        )
+        self.threshold: int = threshold
+
+    def process_request_params(self, params: Any, accepted_extensions: Any) -> Tuple[Any, Extension]:
+        response, inner = super().process_request_params(params, accepted_extensions)
+        return response, _MeteredDeflate(inner, self.threshold)
+
+
+def _compression_kwargs(factory: Any, compression: bool) -> Dict[str, Any]:
+    """``websockets.serve``/``connect`` arguments for the *compression* option."""
+    return {"extensions": [factory]} if compression else {"compression": None}
 
 
 # ---------------------------------------------------------------------------
@@ -74,7 +176,10 @@ def decode_text_message(raw: str) -> RpcMessage:
 # ---------------------------------------------------------------------------
 
 class WebSocketBinarySender(ISender):
-    """Sends RPC messages as CBOR-encoded binary over a WebSocket connection.
+    """Sends RPC messages as binary frames over a WebSocket connection.
+
+    Frames are encoded with :attr:`codec`: CBOR, or the codec agreed as the
+    connection's ``xuri-rpc.<name>`` subprotocol.
 
     *session_id* may be a plain string **or** a zero-argument callable that
     returns the current session id (useful on the client side where the id is
@@ -110,6 +215,12 @@ class WebSocketBinarySender(ISender):
         self._reconnect_lock: Optional[asyncio.Lock] = None
         self._client: Optional[Client] = None
 
+        # codecs offered as subprotocols and compression settings used on
+        # (re)connect (set by createMain)
+        self._subprotocols: Optional[List[str]] = None
+        self._connect_kwargs: Dict[str, Any] = {}
+        self.codec: Codec = _codec_for(getattr(ws, 'subprotocol', None))
+
     # -- session id ---------------------------------------------------------
 
     @property
@@ -120,6 +231,20 @@ class WebSocketBinarySender(ISender):
     def session_id(self, value: Optional[str])->None:
         self._session_id = value
 
+    def get_compression_stats(self) -> Dict[str, Any]:
+        """permessage-deflate counters of the current connection, see
+        :class:`xuri_rpc.compression.CompressionStats`; ``algorithm`` is
+        ``None`` when the peer did not agree to compress."""
+        protocol = getattr(self.ws, 'protocol', self.ws)
+        for extension in getattr(protocol, 'extensions', None) or ():
+            if isinstance(extension, _MeteredDeflate):
+                stats = extension.stats.asDict()
+                stats['algorithm'] = 'deflate'
+                return stats
+        stats = CompressionStats().asDict()
+        stats['algorithm'] = None
+        return stats
+
     # -- reconnection -------------------------------------------------------
 
     def _configure_reconnect(
@@ -182,7 +307,11 @@ class WebSocketBinarySender(ISender):
                 await asyncio.sleep(delay)
 
                 try:
-                    self.ws = await websockets.connect(self._uri)
+                    self.ws = await websockets.connect(
+                        self._uri, subprotocols=self._subprotocols,
+                        **self._connect_kwargs,
+                    )
+                    self.codec = _codec_for(self.ws.subprotocol)
                     local_addr = self.ws.local_address
                     remote_addr = self.ws.remote_address
                     print(f"[WebSocket] Reconnected: local port {local_addr[1]}, remote port {remote_addr[1]}")
@@ -211,7 +340,7 @@ class WebSocketBinarySender(ISender):
         
         try:
             await self.ensure_connected()
-            await self.ws.send(cbor2.dumps(message))
+            await self.ws.send(self.codec.encode(message))
         except ConnectionClosed:
             local_addr = self.ws.local_address
             remote_addr = self.ws.remote_address
@@ -263,6 +392,12 @@ async def createServer(
     mode: Literal["binary", "text"] = "binary",
     *,
     max_size: int = 10 * 1024 * 1024,
+    concurrent: bool = True,
+    max_inflight_per_connection: int = 64,
+    max_inflight: int = 1024,
+    codecs: Optional[Sequence[str]] = None,
+    compression: bool = True,
+    compress_threshold: int = 1024,
 ) -> Tuple[Callable[[Any], Any], Any, MessageReceiver]:
     """Create a WebSocket-based RPC server.
 
@@ -275,6 +410,26 @@ async def createServer(
     mode : ``'binary'`` | ``'text'``
         ``'binary'`` (default) uses CBOR encoding;
         ``'text'`` uses JSON with base64-encoded bytes.
+    concurrent : bool
+        When ``True`` (default) every request runs as its own task so a slow
+        call does not block pings, replies or other calls multiplexed on the
+        same socket.  ``False`` restores strictly serial dispatch.
+    max_inflight_per_connection : int
+        Maximum requests executing at once on one connection (``0`` means
+        unlimited).  As many again may wait for a slot; beyond that the
+        connection stops reading until a request finishes.
+    max_inflight : int
+        Maximum requests executing at once across the whole server (``0``
+        means unlimited).
+    codecs : sequence of str, optional
+        Codecs a binary-mode client may pick through the WebSocket
+        subprotocol (default: every registered codec).  Clients offering
+        none are spoken to in CBOR.
+    compression : bool
+        Accept permessage-deflate from clients that offer it (default).
+    compress_threshold : int
+        Messages shorter than this many bytes are sent uncompressed even on
+        a compressed connection.
 
     Usage::
 
@@ -283,6 +438,9 @@ async def createServer(
         await serve(MyService())  # blocks until ws_server is closed
     """
     serverReceiver: MessageReceiver = MessageReceiver(hostId)
+    server_limit: Optional[asyncio.Semaphore] = (
+        asyncio.Semaphore(max_inflight) if concurrent and max_inflight > 0 else None
+    )
 
     async def _onWsConnected(ws: WebSocketServerProtocol, path: Optional[str] = None) -> None:
         """Handle a single WebSocket client connection."""
@@ -308,6 +466,13 @@ async def createServer(
             conn_client.setSender(lambda: conn_client.getSessionData()[session_id])
 
         connReceiver: MessageReceiver = serverReceiver
+        dispatcher: Optional[ConcurrentDispatcher] = (
+            ConcurrentDispatcher(
+                connReceiver, conn_client,
+                max_inflight_per_connection, server_limit,
+            )
+            if concurrent else None
+        )
         first=True
 
         try:
@@ -315,17 +480,29 @@ async def createServer(
                 if isinstance(raw, str):
                     data = decode_text_message(raw)
                 else:
-                    data = cbor2.loads(raw)
+                    data = conn_sender.codec.decode(raw)
                 if(first):
                     first=False
                     setSessiont(data)
-                await connReceiver.onReceiveMessage(data, conn_client)
+                if dispatcher is not None:
+                    await dispatcher.dispatch(data)
+                else:
+                    await connReceiver.onReceiveMessage(data, conn_client)
         except ConnectionClosed as e:
             import traceback
             traceback.print_exc()
             pass
-
-    ws_server: WebSocketServer = await websockets.serve(_onWsConnected, host, port, max_size=max_size)
+        finally:
+            if dispatcher is not None:
+                await dispatcher.close()
+
+    accepted = _codec.availableCodecs() if codecs is None else list(codecs)
+    ws_server: WebSocketServer = await websockets.serve(
+        _onWsConnected, host, port, max_size=max_size,
+        subprotocols=_subprotocols(accepted) if mode == "binary" else None,
+        select_subprotocol=_select_subprotocol,
+        **_compression_kwargs(_ServerDeflateFactory(compress_threshold), compression),
+    )
 
     async def serve(mainObject: Any) -> Tuple[MessageReceiver, Callable[[Any], Any]]:
         serverReceiver.setMain(mainObject)
@@ -350,6 +527,11 @@ async def createMain(
     retry_delay: float = 1.0,
     retry_backoff: float = 2.0,
     on_reconnect: Optional[Callable[[Client, Optional[Any]], Any]] = None,
+    concurrent: bool = True,
+    max_inflight: int = 64,
+    codecs: Optional[Sequence[str]] = None,
+    compression: bool = True,
+    compress_threshold: int = 1024,
 ) -> Tuple[Client, Any]:
     """Connect to a WebSocket-based RPC server and return the main proxy.
 
@@ -379,6 +561,21 @@ async def createMain(
         ``fn(client, main)`` or ``async def fn(client, main)`` called after
         every successful *re*connection.  Useful for re-subscribing or
         re-registering state.
+    concurrent : bool
+        When ``True`` (default) requests sent by the server (callbacks) run
+        as their own tasks; replies are always processed immediately.
+    max_inflight : int
+        Maximum server-initiated requests executing at once (``0`` means
+        unlimited).  As many again may wait; beyond that the client stops
+        reading until one finishes.
+    codecs : sequence of str, optional
+        Binary mode only: codecs offered as WebSocket subprotocols, most
+        preferred first (default: :func:`xuri_rpc.codec.defaultCodecs`).
+        Servers that accept none of them are spoken to in CBOR.
+    compression : bool
+        Offer permessage-deflate to the server (default).
+    compress_threshold : int
+        Messages shorter than this many bytes are sent uncompressed.
 
     Usage::
 
@@ -402,20 +599,36 @@ async def createMain(
         retry_backoff=retry_backoff,
         on_reconnect=on_reconnect,
     )
+    if mode == "binary":
+        offer = _codec.offeredCodecs(codecs)
+        if _codec.needsHello(offer):
+            sender._subprotocols = _subprotocols(offer)
+    sender._connect_kwargs = _compression_kwargs(
+        _ClientDeflateFactory(compress_threshold), compression
+    )
 
     # Initial connection
     try:
-        ws: WebSocketClientProtocol = await websockets.connect(uri)
+        ws: WebSocketClientProtocol = await websockets.connect(
+            uri, subprotocols=sender._subprotocols, **sender._connect_kwargs
+        )
     except (OSError, websockets.WebSocketException) as exc:
         print(f"[WebSocket] Initial connection to {uri} failed: {exc}")
         raise
     sender.ws = ws
+    sender.codec = _codec_for(ws.subprotocol)
     local_addr = ws.local_address
     remote_addr = ws.remote_address
     print(f"[WebSocket] Connected: local port {local_addr[1]}, remote port {remote_addr[1]}")
 
     # Start background listen — reconnect is triggered from inside
-    asyncio.ensure_future(_listen(sender, messageReceiver, client, mode=mode))
+    dispatcher: Optional[ConcurrentDispatcher] = (
+        ConcurrentDispatcher(messageReceiver, client, max_inflight)
+        if concurrent else None
+    )
+    asyncio.ensure_future(
+        _listen(sender, messageReceiver, client, mode=mode, dispatcher=dispatcher)
+    )
 
     main: Any = await client.getMain()
     return (client, main)
@@ -426,6 +639,7 @@ async def _listen(
     messageReceiver: MessageReceiver,
     client: Client,
     mode: str = "binary",
+    dispatcher: Optional[ConcurrentDispatcher] = None,
 ) -> None:
     """Read messages from the sender's ws; reconnect and continue on drop."""
     while True:
@@ -434,13 +648,16 @@ async def _listen(
                 if isinstance(raw, str):
                     data = decode_text_message(raw)
                 else:
-                    data = cbor2.loads(raw)
+                    data = sender.codec.decode(raw)
                 # Extract sessionId from meta and update sender
                 meta = data.get('meta') or {}
                 if meta.get('sessionId'):
                     logger.info(f"get session:{ meta.get('sessionId')}")
                     sender.session_id = meta['sessionId']
-                await messageReceiver.onReceiveMessage(data, client)
+                if dispatcher is not None:
+                    await dispatcher.dispatch(data)
+                else:
+                    await messageReceiver.onReceiveMessage(data, client)
         except ConnectionClosed:
             pass
 
@@ -11,6 +11,7 @@ from .rpc import (
     ICustomTranslator,
     # Flags & configuration
     setDebugFlag,
+    setErrorDetail,
     setHostId,
     # Core data wrapper
     PreArgObj,
@@ -20,6 +21,8 @@ from .rpc import (
     RemoteProxy,
     # Client & receiver
     Client,
+    Batch,
+    RemotePromise,
     MessageReceiver,
     getMessageReceiver,
     # Utilities
@@ -33,8 +36,15 @@ from .rpc import (
     getProxyHoldingInfo,
     autoReRegister,
     autoCheck,
+    RpcError,
     RpcRemoteError,
+    # Streaming
+    RemoteStream,
 )
+from .codec import Codec, availableCodecs, getCodec, registerCodec
+from .dispatcher import ConcurrentDispatcher
+from .decorators import cached, clientCached, coalesce, getResultCache, oneway
+from .execution import ExecutionPolicy, runIn
 
 __all__ = [
     # Types
@@ -45,6 +55,7 @@ __all__ = [
     'ICustomTranslator',
     # Flags & configuration
     'setDebugFlag',
+    'setErrorDetail',
     'setHostId',
     # Core data wrapper
     'PreArgObj',
@@ -54,6 +65,8 @@ __all__ = [
     'RemoteProxy',
     # Client & receiver
     'Client',
+    'Batch',
+    'RemotePromise',
     'MessageReceiver',
     'getMessageReceiver',
     # Utilities
@@ -67,5 +80,24 @@ __all__ = [
     'getProxyHoldingInfo',
     'autoReRegister',
     'autoCheck',
+    'RpcError',
     'RpcRemoteError',
+    # Streaming
+    'RemoteStream',
+    # Transport helpers
+    'ConcurrentDispatcher',
+    # Codecs
+    'Codec',
+    'registerCodec',
+    'getCodec',
+    'availableCodecs',
+    # Execution policies
+    'ExecutionPolicy',
+    'runIn',
+    # Method decorators
+    'oneway',
+    'cached',
+    'getResultCache',
+    'clientCached',
+    'coalesce',
 ]
@@ -0,0 +1,114 @@
+"""
+LRU/TTL caches for RPC results.
+"""
+import collections
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+MISS: Any = object()
+
+_SCALARS = (str, int, float, bool, bytes, type(None))
+
+
+def freezeArgs(args: Any) -> Optional[Hashable]:
+    """Canonical hashable form of decoded call arguments.
+
+    Lists and tuples become tuples, dicts become key-sorted tuples and
+    scalars are tagged with their type (so ``1``, ``1.0`` and ``True`` stay
+    distinct).  Returns ``None`` when an argument is not plain data, e.g. a
+    remote proxy, in which case the call is not cacheable.
+    """
+    if isinstance(args, _SCALARS):
+        return (args.__class__, args)
+    if isinstance(args, (list, tuple)):
+        items = []
+        for item in args:
+            frozen = freezeArgs(item)
+            if frozen is None:
+                return None
+            items.append(frozen)
+        return (list, tuple(items))
+    if isinstance(args, dict):
+        items = []
+        for key, value in args.items():
+            frozen = freezeArgs(value)
+            if frozen is None or not isinstance(key, _SCALARS):
+                return None
+            items.append((key.__class__, key, frozen))
+        try:
+            items.sort()
+        except TypeError:
+            return None
+        return (dict, tuple(items))
+    return None
+
+
+def isPlainData(value: Any) -> bool:
+    if isinstance(value, _SCALARS):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(isPlainData(v) for v in value)
+    if isinstance(value, dict):
+        return all(isPlainData(v) for v in value.values())
+    return False
+
+
+class ResultCache:
+    """Least-recently-used cache with an optional time to live.
+
+    Keys are ``(objectId, method, frozenArgs)`` tuples, so entries can be
+    dropped per object id or method.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: Optional[float] = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: 'collections.OrderedDict[Hashable, Tuple[float, Any]]' = (
+            collections.OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value for *key*, or :data:`MISS`."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        if entry[0] and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store *value*; *ttl* overrides the cache's default for this entry."""
+        if ttl is None:
+            ttl = self.ttl
+        expires = time.monotonic() + ttl if ttl else 0.0
+        entries = self._entries
+        entries[key] = (expires, value)
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def invalidate(self, objectId: Optional[str] = None, method: Optional[str] = None) -> None:
+        """Drop the entries of *objectId* and/or *method* (all when both are None)."""
+        if objectId is None and method is None:
+            self._entries.clear()
+            return
+        self.invalidateWhere(
+            lambda k: (objectId is None or k[0] == objectId) and (method is None or k[1] == method)
+        )
+
+    def invalidateWhere(self, predicate: Callable[[Any], bool]) -> None:
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,308 @@
+"""
+Pluggable message codecs shared by all transports, and the connection hello
+used to negotiate one.
+"""
+import abc
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cbor2
+
+from .envelope import packMessage, unpackMessage
+from .rpc import RpcMessage
+
+# Prefix marking base64-encoded bytes inside JSON documents; shared with the
+# WebSocket text mode so both sides of a JSON connection agree on it.
+BYTES_PREFIX: str = "--^3jK7a%A8_Di0o77Z"
+
+HELLO_KEY: str = '__rpc_hello__'
+
+# Suffix selecting the key-interned envelope on top of a codec, e.g.
+# ``'cbor+compact'``; see :mod:`xuri_rpc.envelope`.
+COMPACT_SUFFIX: str = '+compact'
+
+
+class Codec(abc.ABC):
+    """Turns one RpcMessage into bytes and back.
+
+    *intKeys* tells whether integer map keys survive a round trip, which the
+    compact envelope relies on.
+    """
+
+    name: str = ''
+    intKeys: bool = True
+
+    @abc.abstractmethod
+    def encode(self, message: RpcMessage) -> bytes:
+        ...
+
+    @abc.abstractmethod
+    def decode(self, data: bytes) -> RpcMessage:
+        ...
+
+    def __repr__(self) -> str:
+        return f'<Codec {self.name}>'
+
+
+class CborCodec(Codec):
+    """The original wire format; every peer understands it."""
+
+    name = 'cbor'
+
+    def encode(self, message: RpcMessage) -> bytes:
+        return cbor2.dumps(message)
+
+    def decode(self, data: bytes) -> RpcMessage:
+        return cbor2.loads(data)
+
+
+def _jsonDefault(obj: Any) -> Any:
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return BYTES_PREFIX + base64.b64encode(obj).decode('ascii')
+    if isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _reviveBytes(value: Any, nested: bool = False) -> Any:
+    """Restore prefixed base64 strings to bytes, in place.
+
+    As a ``json`` object hook the dicts below *value* are already revived;
+    *nested* walks into them too, for decoders without such a hook.
+    """
+    if isinstance(value, str):
+        if value.startswith(BYTES_PREFIX):
+            return base64.b64decode(value[len(BYTES_PREFIX):])
+        return value
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (str, list)) or (nested and isinstance(item, dict)):
+                value[key] = _reviveBytes(item, nested)
+        return value
+    if isinstance(value, list):
+        for i, item in enumerate(value):
+            if isinstance(item, (str, list)) or (nested and isinstance(item, dict)):
+                value[i] = _reviveBytes(item, nested)
+    return value
+
+
+class JsonCodec(Codec):
+    """Standard-library JSON; bytes travel as prefixed base64 strings.
+
+    JSON has no integer map keys and no binary type, so this codec is never
+    offered by default; ask for it explicitly when a peer needs text.
+    """
+
+    name = 'json'
+    intKeys = False
+
+    def encodeText(self, message: RpcMessage) -> str:
+        return json.dumps(message, default=_jsonDefault, separators=(',', ':'))
+
+    def decodeText(self, raw: str) -> RpcMessage:
+        return json.loads(raw, object_hook=_reviveBytes)
+
+    def encode(self, message: RpcMessage) -> bytes:
+        return self.encodeText(message).encode('utf-8')
+
+    def decode(self, data: bytes) -> RpcMessage:
+        return self.decodeText(bytes(data).decode('utf-8'))
+
+
+class MsgpackCodec(Codec):
+    """msgpack with the bin type enabled; requires the ``msgpack`` package."""
+
+    name = 'msgpack'
+
+    def __init__(self) -> None:
+        import msgpack
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def encode(self, message: RpcMessage) -> bytes:
+        return self._packb(message, use_bin_type=True)
+
+    def decode(self, data: bytes) -> RpcMessage:
+        return self._unpackb(data, raw=False, strict_map_key=False)
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON through ``orjson``; same document layout as :class:`JsonCodec`."""
+
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        import orjson
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def encode(self, message: RpcMessage) -> bytes:
+        return self._dumps(message, default=_jsonDefault, option=self._options)
+
+    def decode(self, data: bytes) -> RpcMessage:
+        return _reviveBytes(self._loads(data), True)
+
+    def encodeText(self, message: RpcMessage) -> str:
+        return self.encode(message).decode('utf-8')
+
+    def decodeText(self, raw: str) -> RpcMessage:
+        return self.decode(raw)
+
+
+class CompactCodec(Codec):
+    """Any integer-keyed codec carrying the compact envelope."""
+
+    def __init__(self, inner: Codec) -> None:
+        self.inner: Codec = inner
+        self.name = inner.name + COMPACT_SUFFIX
+
+    def encode(self, message: RpcMessage) -> bytes:
+        return self.inner.encode(packMessage(message))
+
+    def decode(self, data: bytes) -> RpcMessage:
+        return unpackMessage(self.inner.decode(data))
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+CBOR: Codec = CborCodec()
+JSON: JsonCodec = JsonCodec()
+
+_codecs: Dict[str, Codec] = {CBOR.name: CBOR, JSON.name: JSON}
+# Codecs offered when a transport is not told otherwise, fastest first.  Only
+# binary codecs that round-trip bytes and integer keys are listed.
+_preference: List[str] = ['msgpack', 'cbor']
+
+for _cls in (MsgpackCodec, OrjsonCodec):
+    try:
+        _codec = _cls()
+    except ImportError:
+        continue
+    _codecs[_codec.name] = _codec
+
+
+_compact: Dict[str, CompactCodec] = {}
+
+
+def _lookup(name: str) -> Optional[Codec]:
+    codec = _codecs.get(name)
+    if codec is None and name.endswith(COMPACT_SUFFIX):
+        codec = _compact.get(name)
+        if codec is None:
+            inner = _codecs.get(name[:-len(COMPACT_SUFFIX)])
+            if inner is None or not inner.intKeys:
+                return None
+            codec = _compact[name] = CompactCodec(inner)
+    return codec
+
+
+def registerCodec(codec: Codec, preferred: bool = False) -> None:
+    """Make *codec* available to every transport.
+
+    With *preferred* it is also offered by default, ahead of the built-ins.
+    """
+    _codecs[codec.name] = codec
+    _compact.pop(codec.name + COMPACT_SUFFIX, None)
+    if preferred:
+        if codec.name in _preference:
+            _preference.remove(codec.name)
+        _preference.insert(0, codec.name)
+
+
+def getCodec(name: str) -> Codec:
+    codec = _lookup(name)
+    if codec is None:
+        raise ValueError(f"unknown codec '{name}'")
+    return codec
+
+
+def availableCodecs() -> List[str]:
+    """Registered codec names, followed by their compact variants."""
+    names = list(_codecs)
+    names.extend(name + COMPACT_SUFFIX for name, codec in _codecs.items() if codec.intKeys)
+    return names
+
+
+def defaultCodecs() -> List[str]:
+    """Names offered in a hello when the transport gets no explicit list."""
+    return [name for name in _preference if _lookup(name) is not None]
+
+
+def chooseCodec(offered: Iterable[str], accepted: Optional[Iterable[str]] = None) -> Codec:
+    """First codec in the peer's *offered* order that this side accepts.
+
+    Falls back to CBOR, which both sides always speak.
+    """
+    allowed = None if accepted is None else set(accepted)
+    for name in offered:
+        if not isinstance(name, str) or (allowed is not None and name not in allowed):
+            continue
+        codec = _lookup(name)
+        if codec is not None:
+            return codec
+    return CBOR
+
+
+# ---------------------------------------------------------------------------
+# Connection hello
+# ---------------------------------------------------------------------------
+# The connecting side sends one CBOR-encoded hello frame before any RPC
+# traffic; the accepting side answers with its choice, also in CBOR, and both
+# switch codecs after that frame.  A server that predates the hello fails on
+# it and drops the connection, so the stream transports (TCP, stdio) only
+# send one when the caller asked for more than plain CBOR framing; see
+# streamOffer().
+
+def isHello(message: Any) -> bool:
+    return isinstance(message, dict) and HELLO_KEY in message
+
+
+def offeredCodecs(codecs: Optional[Sequence[str]] = None) -> List[str]:
+    """Validated offer list; *None* means :func:`defaultCodecs`."""
+    return defaultCodecs() if codecs is None else [getCodec(n).name for n in codecs]
+
+
+def streamOffer(codecs: Optional[Sequence[str]] = None) -> List[str]:
+    """Offer list for a stream transport; *None* means CBOR alone, so no
+    hello is sent unless the caller asks for it.  Pass
+    :func:`defaultCodecs` to offer the fastest codecs available."""
+    return [CBOR.name] if codecs is None else offeredCodecs(codecs)
+
+
+def needsHello(offered: Sequence[str]) -> bool:
+    """Whether an offer is worth a round trip; CBOR alone is what we'd get anyway."""
+    return any(name != CBOR.name for name in offered)
+
+
+def helloOffer(codecs: Optional[Sequence[str]] = None, **options: Any) -> RpcMessage:
+    """Hello frame offering *codecs*; *options* carry further transport
+    settings the server may accept in its answer."""
+    hello: Dict[str, Any] = {'codecs': offeredCodecs(codecs)}
+    hello.update(options)
+    return {HELLO_KEY: hello}
+
+
+def helloOptions(message: Any) -> Dict[str, Any]:
+    """Body of a hello or hello answer; empty for anything else."""
+    if not isHello(message):
+        return {}
+    return message.get(HELLO_KEY) or {}
+
+
+def answerHello(message: RpcMessage, accepted: Optional[Iterable[str]] = None) -> Tuple[Codec, RpcMessage]:
+    """Pick a codec for an offer; returns it with the answer frame to send."""
+    offer = message.get(HELLO_KEY) or {}
+    codec = chooseCodec(offer.get('codecs') or (), accepted)
+    return codec, {HELLO_KEY: {'codec': codec.name}}
+
+
+def acceptAnswer(message: Any) -> Codec:
+    """Codec chosen by the peer, or CBOR when it did not understand the hello."""
+    if not isHello(message):
+        return CBOR
+    name = (message.get(HELLO_KEY) or {}).get('codec')
+    return (_lookup(name) if isinstance(name, str) else None) or CBOR
@@ -0,0 +1,235 @@
+"""
+Per-frame compression for the stream transports, negotiated in the
+connection hello.
+
+``zlib`` is always available; ``lz4`` and ``zstd`` are registered when their
+packages import.  A frame is compressed only when it is at least the
+sender's threshold and actually shrinks; compressed frames carry
+:data:`xuri_rpc.framing.FLAG_COMPRESSED` in their header.
+"""
+import abc
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+class Compression(abc.ABC):
+    """One compression algorithm, identified by :attr:`name` in the hello."""
+
+    name: str = ''
+
+    @abc.abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    @abc.abstractmethod
+    def decompress(self, data: bytes, limit: int = 0) -> bytes:
+        """Inflate *data*; raises ``ValueError`` past *limit* bytes (0: no limit)."""
+        ...
+
+    def __repr__(self) -> str:
+        return f'<Compression {self.name}>'
+
+
+def _checkLimit(data: bytes, limit: int) -> bytes:
+    if limit and len(data) > limit:
+        raise ValueError(f"decompressed frame exceeds the limit of {limit} bytes")
+    return data
+
+
+class ZlibCompression(Compression):
+    name = 'zlib'
+
+    def __init__(self, level: int = 1) -> None:
+        self.level: int = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes, limit: int = 0) -> bytes:
+        if not limit:
+            return zlib.decompress(data)
+        inflater = zlib.decompressobj()
+        out = _checkLimit(inflater.decompress(data, limit + 1), limit)
+        if not inflater.eof:
+            raise zlib.error("truncated zlib stream")
+        return out
+
+
+class Lz4Compression(Compression):
+    """LZ4 frames; requires the ``lz4`` package."""
+
+    name = 'lz4'
+
+    def __init__(self) -> None:
+        import lz4.frame
+        self._compress = lz4.frame.compress
+        self._decompress = lz4.frame.decompress
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def decompress(self, data: bytes, limit: int = 0) -> bytes:
+        return _checkLimit(self._decompress(data), limit)
+
+
+class ZstdCompression(Compression):
+    """Zstandard, from ``compression.zstd`` (Python 3.14+) or the
+    ``zstandard`` package."""
+
+    name = 'zstd'
+
+    def __init__(self) -> None:
+        try:
+            from compression import zstd
+            self._compress = zstd.compress
+            self._decompress = zstd.decompress
+        except ImportError:
+            import zstandard
+            self._compress = zstandard.ZstdCompressor().compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def decompress(self, data: bytes, limit: int = 0) -> bytes:
+        return _checkLimit(self._decompress(data), limit)
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+ZLIB: Compression = ZlibCompression()
+
+_compressions: Dict[str, Compression] = {ZLIB.name: ZLIB}
+# Offered when a transport is asked to compress without a list, fastest first.
+_preference: List[str] = ['lz4', 'zstd', 'zlib']
+
+for _cls in (Lz4Compression, ZstdCompression):
+    try:
+        _compression = _cls()
+    except ImportError:
+        continue
+    _compressions[_compression.name] = _compression
+
+
+def registerCompression(compression: Compression, preferred: bool = False) -> None:
+    """Make *compression* available to every transport.
+
+    With *preferred* it is also offered by default, ahead of the built-ins.
+    """
+    _compressions[compression.name] = compression
+    if preferred:
+        if compression.name in _preference:
+            _preference.remove(compression.name)
+        _preference.insert(0, compression.name)
+
+
+def getCompression(name: str) -> Compression:
+    compression = _compressions.get(name)
+    if compression is None:
+        raise ValueError(f"unknown compression '{name}'")
+    return compression
+
+
+def availableCompressions() -> List[str]:
+    return list(_compressions)
+
+
+def defaultCompressions() -> List[str]:
+    return [name for name in _preference if name in _compressions]
+
+
+def offeredCompressions(names: Union[bool, Sequence[str]]) -> List[str]:
+    """Validated offer list: ``True`` offers :func:`defaultCompressions`,
+    ``False`` nothing."""
+    if isinstance(names, bool):
+        return defaultCompressions() if names else []
+    return [getCompression(n).name for n in names]
+
+
+def chooseCompression(
+    offered: Any, accepted: Optional[Iterable[str]] = None
+) -> Optional[Compression]:
+    """First algorithm in the peer's *offered* order that this side accepts."""
+    if not isinstance(offered, (list, tuple)):
+        return None
+    allowed = None if accepted is None else set(accepted)
+    for name in offered:
+        if isinstance(name, str) and (allowed is None or name in allowed) and name in _compressions:
+            return _compressions[name]
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Per-connection state
+# ---------------------------------------------------------------------------
+
+class CompressionStats:
+    """Compression counters of one connection.
+
+    ``frames`` counts the outgoing frames big enough to try, ``compressed``
+    those that shrank; ``ratio`` is ``bytesIn / bytesOut`` over the latter.
+    The seconds are time spent inside the algorithm.
+    """
+
+    def __init__(self) -> None:
+        self.frames: int = 0
+        self.compressed: int = 0
+        self.bytesIn: int = 0
+        self.bytesOut: int = 0
+        self.compressSeconds: float = 0.0
+        self.decompressed: int = 0
+        self.decompressSeconds: float = 0.0
+
+    def asDict(self) -> Dict[str, Any]:
+        return {
+            'frames': self.frames,
+            'compressed': self.compressed,
+            'bytesIn': self.bytesIn,
+            'bytesOut': self.bytesOut,
+            'ratio': self.bytesIn / self.bytesOut if self.bytesOut else 1.0,
+            'compressSeconds': self.compressSeconds,
+            'decompressed': self.decompressed,
+            'decompressSeconds': self.decompressSeconds,
+        }
+
+
+class FrameCompressor:
+    """Applies the agreed algorithm to the frames of one connection."""
+
+    def __init__(
+        self,
+        compression: Compression,
+        threshold: int = 1024,
+        stats: Optional[CompressionStats] = None,
+    ) -> None:
+        self.compression: Compression = compression
+        self.threshold: int = threshold
+        self.stats: CompressionStats = stats if stats is not None else CompressionStats()
+
+    def compress(self, payload: bytes) -> Tuple[bytes, bool]:
+        """``(data, compressed)``; small or incompressible payloads come back as is."""
+        size = len(payload)
+        if size < self.threshold:
+            return payload, False
+        stats = self.stats
+        stats.frames += 1
+        start = time.perf_counter()
+        packed = self.compression.compress(payload)
+        stats.compressSeconds += time.perf_counter() - start
+        if len(packed) >= size:
+            return payload, False
+        stats.compressed += 1
+        stats.bytesIn += size
+        stats.bytesOut += len(packed)
+        return packed, True
+
+    def decompress(self, data: bytes, limit: int = 0) -> bytes:
+        stats = self.stats
+        start = time.perf_counter()
+        out = self.compression.decompress(data, limit)
+        stats.decompressSeconds += time.perf_counter() - start
+        stats.decompressed += 1
+        return out
@@ -0,0 +1,96 @@
+"""
+Decorators that change how a service method is called remotely.
+
+Options recorded with :func:`_mark` are published in the member entry of
+the proxy descriptor so callers can act on them.
+"""
+from typing import Any, Callable, Dict, Optional
+
+from .cache import ResultCache
+
+_MEMBER_ATTR: str = '__rpc_member__'
+_CACHE_ATTR: str = '__rpc_cache__'
+_CACHES_ATTR: str = '__rpc_result_caches__'
+
+
+def _mark(func: Callable[..., Any], **options: Any) -> Callable[..., Any]:
+    merged = dict(getattr(func, _MEMBER_ATTR, None) or {})
+    merged.update(options)
+    setattr(func, _MEMBER_ATTR, merged)
+    return func
+
+
+def getMemberOptions(func: Any) -> Optional[Dict[str, Any]]:
+    """Options recorded on *func* by the decorators of this module."""
+    return getattr(func, _MEMBER_ATTR, None)
+
+
+def oneway(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Callers send the method's requests as notifications: no reply frame is
+    sent and the call resolves to ``None`` once the request is written."""
+    return _mark(func, oneway=True)
+
+
+def coalesce(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Share one execution between identical concurrent calls.
+
+    Callers send a single request for calls with the same plain-data
+    arguments while one is in flight, and the serving side runs the
+    handler once for identical requests that overlap on one connection.
+    Methods that take a context are never coalesced.
+    """
+    return _mark(func, coalesce=True)
+
+
+def cached(maxsize: Any = 1024, ttl: Optional[float] = None) -> Any:
+    """Cache the method's replies on the serving side.
+
+    Calls with the same object, method and plain-data arguments are
+    answered from an LRU cache of up to *maxsize* results, each kept for
+    at most *ttl* seconds, without running the handler.  Only plain-data
+    results are cached.  Every service instance has its own cache; service
+    code invalidates entries through :func:`getResultCache` (e.g.
+    ``getResultCache(self.lookup).clear()``), and
+    ``MessageReceiver.invalidateCache`` clears those served on its host.
+
+    Methods that take a context cannot be cached: their result may depend
+    on the caller, and a cache hit would skip the interceptors.
+    """
+    if callable(maxsize):       # used as a bare @cached
+        return cached()(maxsize)
+
+    def _decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        setattr(func, _CACHE_ATTR, (maxsize, ttl))
+        return func
+    return _decorate
+
+
+def getResultCache(func: Any) -> Optional[ResultCache]:
+    """The result cache of the ``@cached`` method *func*, created on first
+    use.  A bound method gets the cache of its instance."""
+    target = getattr(func, '__func__', func)
+    config = getattr(target, _CACHE_ATTR, None)
+    if config is None:
+        return None
+    owner = getattr(getattr(func, '__self__', None), '__dict__', None)
+    if owner is None:           # plain function, or an instance without __dict__
+        owner = target.__dict__
+    caches = owner.setdefault(_CACHES_ATTR, {})
+    cache = caches.get(target)
+    if cache is None:
+        cache = caches[target] = ResultCache(*config)
+    return cache
+
+
+def clientCached(ttl: Optional[float] = None, key: Optional[str] = None) -> Any:
+    """Let callers cache the method's results.
+
+    Callers that enabled a response cache (``Client.enableResponseCache``)
+    answer repeated calls with the same plain-data arguments locally for
+    up to *ttl* seconds.  *key* names a group the serving side can
+    invalidate with ``pushInvalidation(key=...)``; invalidating the object
+    id works for every method.
+    """
+    def _decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        return _mark(func, cache={'ttl': ttl, 'key': key})
+    return _decorate
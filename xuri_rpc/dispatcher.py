@@ -0,0 +1,107 @@
+"""
+Concurrent dispatch of inbound RPC messages for transport read loops.
+"""
+import asyncio
+import logging
+from typing import Any, Optional, Set
+
+from .rpc import (
+    FEATURE_CANCEL, Client, MessageReceiver, RpcMessage, _isControl, _isResponse, _stampDeadline,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentDispatcher:
+    """Runs every inbound request of one connection as its own task.
+
+    Replies to this side's own pending calls and control frames are handled
+    inline so they are never queued behind slow handlers.  Only
+    *max_inflight* requests execute at the same time; up to *max_queued* more
+    are admitted and wait for a slot.  An optional *shared_limit* semaphore
+    caps in-flight requests across all connections that share it (e.g. a
+    whole server).
+
+    Once both the window and the queue are full, :meth:`dispatch` waits for a
+    request to finish, which stops the read loop and pushes back on the peer.
+    The queue lets replies that running handlers wait for (nested callbacks)
+    get past a few queued requests; it defaults to *max_inflight*.
+    """
+
+    def __init__(
+        self,
+        receiver: MessageReceiver,
+        client: Client,
+        max_inflight: int = 64,
+        shared_limit: Optional[asyncio.Semaphore] = None,
+        max_queued: Optional[int] = None,
+    ) -> None:
+        self.receiver: MessageReceiver = receiver
+        self.client: Client = client
+        self.maxInflight: int = max_inflight
+        self._limit: Optional[asyncio.Semaphore] = (
+            asyncio.Semaphore(max_inflight) if max_inflight > 0 else None
+        )
+        if max_queued is None:
+            max_queued = max_inflight
+        self._admit: Optional[asyncio.Semaphore] = (
+            asyncio.Semaphore(max_inflight + max_queued) if max_inflight > 0 else None
+        )
+        self._sharedLimit: Optional[asyncio.Semaphore] = shared_limit
+        self._tasks: Set['asyncio.Task[Any]'] = set()
+
+    @property
+    def inflight(self) -> int:
+        """Number of requests started and not yet finished."""
+        return len(self._tasks)
+
+    async def dispatch(self, message: RpcMessage) -> None:
+        frames = message.get('frames')
+        if frames is not None:
+            for frame in frames:
+                await self.dispatch(frame)
+            return
+        if _isResponse(message) or _isControl(message):
+            await self.receiver.onReceiveMessage(message, self.client)
+            return
+        _stampDeadline(message)
+        admit = self._admit
+        if admit is not None:
+            await admit.acquire()
+        task = asyncio.ensure_future(self._run(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if admit is not None:
+            task.add_done_callback(lambda _t: admit.release())
+        if FEATURE_CANCEL in self.client.peerFeatures:
+            # a cancel frame may arrive while the request still waits for a slot
+            self.client._trackInflight(message.get('id'), task)
+
+    async def _run(self, message: RpcMessage) -> None:
+        limit = self._limit
+        shared = self._sharedLimit
+        if limit is not None:
+            await limit.acquire()
+        try:
+            if shared is not None:
+                await shared.acquire()
+            try:
+                await self.receiver.onReceiveMessage(message, self.client)
+            finally:
+                if shared is not None:
+                    shared.release()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("error while dispatching RPC message")
+        finally:
+            if limit is not None:
+                limit.release()
+
+    async def close(self) -> None:
+        """Cancel every request still running on this connection."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
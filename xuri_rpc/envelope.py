@@ -0,0 +1,254 @@
+"""
+Compact wire envelope: well-known message keys become array positions or
+small integers.
+
+A plain request ``{'id', 'objectId', 'method', 'args', 'meta'}`` is sent as
+``[0, id, objectId, method, args, meta]`` and a compact reply
+``{'idFor', 'status', 'data'}`` as ``[2, idFor, status, data]``.  Any other
+message keeps its dict shape with well-known keys replaced by integers, e.g.
+``{5: idFor, 6: -1, 9: {...}}``.
+
+Proxy descriptors found in arguments and results become
+``{-1: [id, hostId, members]}`` with each member as ``[name, type]`` (plus a
+dict of member options when present).  The array tag tells the receiver
+whether it has to look for them (odd tags), so calls with plain data skip
+that walk.  User data is otherwise left alone; a user dict that happens to
+use one of the reserved integer keys is wrapped as ``{-2: dict}`` so it
+decodes unchanged.
+
+Decoding interns method names, object ids and descriptor strings, which
+repeat on every call.  The layout needs a codec with integer map keys; it is
+only used when both ends agree on it in the connection hello.
+"""
+import sys
+from typing import Any, Dict, List, Tuple
+
+from .rpc import RpcMessage
+
+# Wire integer == position.  Append only: reordering breaks deployed peers,
+# while a code unknown to an older peer simply decodes as that integer.
+ENVELOPE_KEYS: Tuple[str, ...] = (
+    'id', 'objectId', 'method', 'args', 'meta', 'idFor', 'status', 'data', 'trace', 'error',
+    'batch', 'ordered', 'frames', 'promiseFor', 'cancelFor', 'streamFor', 'creditFor', 'n',
+    'chunk', 'invalidate', 'stream', 'window',
+    # meta
+    'sessionId', 'features', 'timeout', 'noReply', 'pipeline',
+    # error / invalidate
+    'type', 'code', 'message', 'key',
+)
+
+PROXY_TAG: int = -1
+ESCAPE_TAG: int = -2
+
+_PROXY_INDICATOR: str = '__is_rpc_proxy__'
+_DESCRIPTOR_FIELDS = frozenset((_PROXY_INDICATOR, 'id', 'hostId', 'members'))
+
+_KEY_CODES: Dict[str, int] = {key: code for code, key in enumerate(ENVELOPE_KEYS)}
+_KEY_NAMES: Dict[int, str] = dict(enumerate(ENVELOPE_KEYS))
+
+# array layouts; +1 means the data slot carries packed proxy descriptors
+_REQUEST: int = 0
+_REPLY: int = 2
+_REQUEST_KEYS = frozenset(('id', 'objectId', 'method', 'args', 'meta'))
+_REPLY_KEYS = frozenset(('idFor', 'status', 'data'))
+
+# keys whose value is user data that may carry proxy descriptors
+_DATA_KEYS = frozenset(('args', 'data', 'chunk'))
+# keys whose value is a list of whole messages
+_NESTED_KEYS = frozenset(('batch', 'frames'))
+# keys whose value is a flat dict of well-known keys
+_FLAT_KEYS = frozenset(('meta', 'error', 'invalidate'))
+# string values worth interning on decode
+_INTERNED_KEYS = frozenset(('objectId', 'method'))
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+def _packFlat(value: Any) -> Any:
+    if type(value) is not dict:
+        return value
+    codes = _KEY_CODES
+    return {codes.get(k, k): v for k, v in value.items()}
+
+
+def _packDescriptor(value: Dict[str, Any]) -> List[Any]:
+    members = []
+    for member in value.get('members') or ():
+        name = member.get('name')
+        kind = member.get('type')
+        if len(member) > 2:
+            members.append([name, kind, {k: v for k, v in member.items() if k not in ('name', 'type')}])
+        else:
+            members.append([name, kind])
+    packed = [value.get('id'), value.get('hostId'), members]
+    extra = {k: _packData(v) for k, v in value.items() if k not in _DESCRIPTOR_FIELDS}
+    if extra:
+        packed.append(extra)
+    return packed
+
+
+def _packData(value: Any) -> Any:
+    kind = type(value)
+    if kind is dict:
+        if _PROXY_INDICATOR in value:
+            return {PROXY_TAG: _packDescriptor(value)}
+        packed = {k: _packData(v) if type(v) in _CONTAINERS else v for k, v in value.items()}
+        if PROXY_TAG in value or ESCAPE_TAG in value:
+            return {ESCAPE_TAG: packed}
+        return packed
+    if kind is list or kind is tuple:
+        return [_packData(v) if type(v) in _CONTAINERS else v for v in value]
+    return value
+
+
+def _hasDescriptor(value: Any) -> bool:
+    kind = type(value)
+    if kind is dict:
+        if _PROXY_INDICATOR in value:
+            return True
+        values = value.values()
+    elif kind is list or kind is tuple:
+        values = value
+    else:
+        return False
+    for v in values:
+        if type(v) in _CONTAINERS and _hasDescriptor(v):
+            return True
+    return False
+
+
+def _packNested(value: Any) -> Any:
+    return [packMessage(m) for m in value]
+
+
+_CONTAINERS = frozenset((dict, list, tuple))
+_PACKERS = dict.fromkeys(_DATA_KEYS, _packData)
+_PACKERS.update(dict.fromkeys(_FLAT_KEYS, _packFlat))
+_PACKERS.update(dict.fromkeys(_NESTED_KEYS, _packNested))
+
+
+def packMessage(message: RpcMessage) -> Any:
+    """Dict envelope -> compact envelope."""
+    keys = message.keys()
+    if keys == _REQUEST_KEYS:
+        args = message['args']
+        tag = _REQUEST
+        if _hasDescriptor(args):
+            args = _packData(args)
+            tag += 1
+        meta = message['meta']
+        return [tag, message['id'], message['objectId'], message['method'], args,
+                _packFlat(meta) if meta else meta]
+    if keys == _REPLY_KEYS:
+        data = message['data']
+        tag = _REPLY
+        if type(data) in _CONTAINERS and _hasDescriptor(data):
+            data = _packData(data)
+            tag += 1
+        return [tag, message['idFor'], message['status'], data]
+    codes = _KEY_CODES
+    packers = _PACKERS
+    packed: Dict[Any, Any] = {}
+    for key, value in message.items():
+        packer = packers.get(key)
+        if packer is not None and type(value) in _CONTAINERS:
+            value = packer(value)
+        packed[codes.get(key, key)] = value
+    return packed
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+def _unpackFlat(value: Any) -> Any:
+    if type(value) is not dict:
+        return value
+    names = _KEY_NAMES
+    return {names.get(k, k): v for k, v in value.items()}
+
+
+def _unpackDescriptor(packed: List[Any]) -> Dict[str, Any]:
+    members = []
+    for member in packed[2]:
+        unpacked = {'name': _intern(member[0]), 'type': _intern(member[1])}
+        if len(member) > 2:
+            unpacked.update(member[2])
+        members.append(unpacked)
+    value: Dict[str, Any] = {
+        'id': _intern(packed[0]),
+        'hostId': _intern(packed[1]),
+        'members': members,
+        _PROXY_INDICATOR: _PROXY_INDICATOR,
+    }
+    if len(packed) > 3:
+        value.update(_unpackData(packed[3]))
+    return value
+
+
+def _unpackData(value: Any) -> Any:
+    kind = type(value)
+    if kind is dict:
+        if len(value) == 1:
+            if PROXY_TAG in value:
+                return _unpackDescriptor(value[PROXY_TAG])
+            if ESCAPE_TAG in value:
+                inner = value[ESCAPE_TAG]
+                for k, v in inner.items():
+                    inner[k] = _unpackData(v)
+                return inner
+        for k, v in value.items():
+            if type(v) is dict or type(v) is list:
+                value[k] = _unpackData(v)
+        return value
+    if kind is list:
+        for i, v in enumerate(value):
+            if type(v) is dict or type(v) is list:
+                value[i] = _unpackData(v)
+    return value
+
+
+def _unpackNested(value: Any) -> Any:
+    return [unpackMessage(m) for m in value]
+
+
+_UNPACKERS = dict.fromkeys(_DATA_KEYS, _unpackData)
+_UNPACKERS.update(dict.fromkeys(_FLAT_KEYS, _unpackFlat))
+_UNPACKERS.update(dict.fromkeys(_NESTED_KEYS, _unpackNested))
+_UNPACKERS.update(dict.fromkeys(_INTERNED_KEYS, _intern))
+
+
+def unpackMessage(packed: Any) -> RpcMessage:
+    """Compact envelope -> dict envelope."""
+    if type(packed) is list:
+        tag = packed[0]
+        if tag < _REPLY:
+            meta = packed[5]
+            return {
+                'id': packed[1],
+                'objectId': _intern(packed[2]),
+                'method': _intern(packed[3]),
+                'args': _unpackData(packed[4]) if tag & 1 else packed[4],
+                'meta': _unpackFlat(meta) if meta else meta,
+            }
+        return {
+            'idFor': packed[1],
+            'status': packed[2],
+            'data': _unpackData(packed[3]) if tag & 1 else packed[3],
+        }
+    names = _KEY_NAMES
+    unpackers = _UNPACKERS
+    message: RpcMessage = {}
+    for code, value in packed.items():
+        key = names.get(code, code)
+        unpacker = unpackers.get(key)
+        if unpacker is not None:
+            value = unpacker(value)
+        message[key] = value
+    return message
@@ -0,0 +1,116 @@
+"""
+Execution policies deciding where synchronous RPC handlers run.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import pickle
+from typing import Any, Callable, Optional, Tuple
+
+INLINE: str = 'inline'
+THREAD: str = 'thread'
+PROCESS: str = 'process'
+
+_POLICY_ATTR: str = '__rpc_execution__'
+
+
+class ExecutionPolicy:
+    """Runs synchronous handlers inline, in a thread pool or in a process pool.
+
+    Each pool policy owns its executor with *max_workers* workers.  At most
+    ``max_workers + max_pending`` calls are handed to the executor at once;
+    further calls wait on the event loop, so a saturated pool pushes back on
+    its own callers while cheap inline handlers keep running.
+
+    Handlers run by a process policy, and their arguments and results, must
+    be picklable.  A method is sent to the pool with its instance, so every
+    call pickles the whole service object; keep such services small or
+    expose module-level functions.  Objects that cannot be pickled are
+    refused when they are registered.
+    """
+
+    def __init__(
+        self,
+        kind: str = INLINE,
+        max_workers: int = 1,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        if kind not in (INLINE, THREAD, PROCESS):
+            raise ValueError(f"unknown execution policy '{kind}'")
+        self.kind: str = kind
+        self.maxWorkers: int = max_workers
+        self.maxPending: int = max_workers if max_pending is None else max_pending
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._limit: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    @classmethod
+    def inline(cls) -> 'ExecutionPolicy':
+        return cls(INLINE)
+
+    @classmethod
+    def thread(cls, max_workers: int = 4, max_pending: Optional[int] = None) -> 'ExecutionPolicy':
+        return cls(THREAD, max_workers, max_pending)
+
+    @classmethod
+    def process(cls, max_workers: int = 2, max_pending: Optional[int] = None) -> 'ExecutionPolicy':
+        return cls(PROCESS, max_workers, max_pending)
+
+    @property
+    def isInline(self) -> bool:
+        return self.kind == INLINE
+
+    def _getExecutor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.kind == THREAD:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.maxWorkers)
+            else:
+                self._executor = concurrent.futures.ProcessPoolExecutor(self.maxWorkers)
+        return self._executor
+
+    def _getLimit(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        limit = self._limit
+        if limit is None or limit[0] is not loop:
+            limit = (loop, asyncio.Semaphore(self.maxWorkers + self.maxPending))
+            self._limit = limit
+        return limit[1]
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.kind == INLINE:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        async with self._getLimit(loop):
+            return await loop.run_in_executor(
+                self._getExecutor(), functools.partial(func, *args)
+            )
+
+    def bind(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Return an async callable that runs *func* under this policy."""
+        async def _run(*args: Any) -> Any:
+            return await self.run(func, *args)
+        return _run
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def runIn(policy: ExecutionPolicy) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator selecting the execution policy of a single handler method."""
+    def _decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        setattr(func, _POLICY_ATTR, policy)
+        return func
+    return _decorate
+
+
+def getExecutionPolicy(func: Any) -> Optional[ExecutionPolicy]:
+    return getattr(func, _POLICY_ATTR, None)
+
+
+def checkPicklable(obj: Any, name: str) -> None:
+    """Raise ``ValueError`` when *obj*, which a process pool pickles on every
+    call, cannot be pickled."""
+    try:
+        pickle.dumps(obj)
+    except Exception as exc:
+        raise ValueError(f"'{name}' cannot run in a process pool: {exc}") from exc
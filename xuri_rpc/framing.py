@@ -0,0 +1,208 @@
+"""
+Length-prefixed framing shared by the stream transports (TCP, stdio).
+
+Every frame starts with a 4-byte big-endian word.  On a connection that did
+not negotiate chunking or compression the word is simply the payload
+length, as it always was.  Once both ends agreed on either in the
+connection hello, the top bits of the word are flags and the low 29 bits
+the length:
+
+``FLAG_CHUNK``
+    The frame carries one piece of a larger message.
+``FLAG_FIRST``
+    First piece; its payload starts with ``!QI`` (total message size,
+    encoded document size) so the receiver can check the size against its
+    limit and allocate the whole buffer up front.
+``FLAG_COMPRESSED``
+    The encoded document (the frame payload, or the document part of a
+    chunked message) is compressed with the agreed algorithm; out-of-band
+    buffers never are.
+
+A message bigger than the chunk size, or one with out-of-band buffers, is
+cut into chunk frames; everything else goes out as one plain frame.  Only
+one chunked message is on the wire per direction at a time, but plain
+frames may be written between its chunks, so small calls are not stuck
+behind a huge one.
+"""
+import struct
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from .compression import FrameCompressor
+
+HEADER = struct.Struct('!I')
+FIRST_HEADER = struct.Struct('!QI')
+
+FLAG_CHUNK: int = 0x80000000
+FLAG_FIRST: int = 0x40000000
+FLAG_COMPRESSED: int = 0x20000000
+LENGTH_MASK: int = 0x1FFFFFFF
+
+MAX_CHUNK_SIZE: int = LENGTH_MASK - FIRST_HEADER.size
+MIN_CHUNK_SIZE: int = 512
+
+
+class MessageTooLarge(ValueError):
+    """A message exceeds the size limit of the side that would receive it."""
+
+
+def checkSize(size: int, limit: int) -> None:
+    if limit and size > limit:
+        raise MessageTooLarge(f"message of {size} bytes exceeds the limit of {limit} bytes")
+
+
+def sizeOption(value: Any) -> int:
+    """A size from a connection hello, or 0 when absent or malformed."""
+    return value if isinstance(value, int) and value > 0 else 0
+
+
+def chunkOption(value: Any) -> int:
+    """A chunk size from a connection hello or option, clamped to
+    ``MIN_CHUNK_SIZE``..``MAX_CHUNK_SIZE``; 0 (no chunking) when absent or
+    malformed."""
+    size = sizeOption(value)
+    return min(max(size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE) if size else 0
+
+
+def bufferSize(buffer: Any) -> int:
+    return buffer.nbytes if type(buffer) is memoryview else len(buffer)
+
+
+def needsChunks(payload: bytes, buffers: Sequence[Any], chunkSize: int) -> bool:
+    return bool(chunkSize) and (bool(buffers) or len(payload) > chunkSize)
+
+
+def chunkSizeFor(payload: Any, chunkSize: int, flagged: bool) -> int:
+    """Chunk size to send *payload* with.
+
+    A flagged header holds at most ``LENGTH_MASK`` bytes, so on a connection
+    that agreed on flagged headers without chunking (compression only) a
+    larger payload is still cut into chunks.  A plain header holds 32 bits.
+    """
+    size = bufferSize(payload)
+    if not flagged:
+        if size > 0xFFFFFFFF:
+            raise MessageTooLarge(f"message of {size} bytes does not fit a frame header")
+        return chunkSize
+    if not chunkSize and size > LENGTH_MASK:
+        return MAX_CHUNK_SIZE
+    return chunkSize
+
+
+def chunkFrames(parts: Sequence[Any], chunkSize: int, flags: int = 0) -> Iterator[List[Any]]:
+    """Header and payload slices of each chunk frame for one message.
+
+    *parts* is the encoded document followed by any out-of-band buffers;
+    slices are memoryviews, so nothing is copied.  *flags* go on the first
+    chunk.
+    """
+    if chunkSize <= FIRST_HEADER.size:
+        raise ValueError(f"chunk size {chunkSize} leaves no room for data")
+    total = sum(bufferSize(p) for p in parts)
+    frame: List[Any] = [FIRST_HEADER.pack(total, bufferSize(parts[0]))]
+    size = FIRST_HEADER.size
+    flags |= FLAG_CHUNK | FLAG_FIRST
+    for part in parts:
+        view = memoryview(part)
+        while view.nbytes:
+            take = view[:chunkSize - size]
+            view = view[take.nbytes:]
+            frame.append(take)
+            size += take.nbytes
+            if size == chunkSize:
+                yield [HEADER.pack(flags | size), *frame]
+                frame, size, flags = [], 0, FLAG_CHUNK
+    if frame:
+        yield [HEADER.pack(flags | size), *frame]
+
+
+class Reassembler:
+    """Collects the chunks of one incoming message into a preallocated buffer."""
+
+    def __init__(self, maxMessageSize: int = 0) -> None:
+        self.maxMessageSize: int = maxMessageSize
+        self._buffer: Optional[bytearray] = None
+        self._view: Optional[memoryview] = None
+        self._docSize: int = 0
+        self._filled: int = 0
+        self._flags: int = 0
+
+    def feed(self, flags: int, data: Any) -> Optional[Tuple[memoryview, int, int]]:
+        """Add one chunk; returns ``(message, documentSize, firstFlags)`` once
+        complete."""
+        view = memoryview(data)
+        if flags & FLAG_FIRST:
+            if self._buffer is not None:
+                raise ConnectionError("chunked message started before the previous one ended")
+            total, self._docSize = FIRST_HEADER.unpack_from(view)
+            self._flags = flags
+            try:
+                checkSize(total, self.maxMessageSize)
+            except MessageTooLarge as e:
+                raise ConnectionError(str(e)) from None
+            self._buffer = bytearray(total)
+            self._view = memoryview(self._buffer)
+            self._filled = 0
+            view = view[FIRST_HEADER.size:]
+        elif self._buffer is None:
+            raise ConnectionError("chunk received without a first chunk")
+        end = self._filled + view.nbytes
+        if end > len(self._buffer):
+            raise ConnectionError("chunked message longer than announced")
+        self._view[self._filled:end] = view
+        self._filled = end
+        if end < len(self._buffer):
+            return None
+        message, docSize = self._view, self._docSize
+        self._buffer = self._view = None
+        return message.toreadonly(), docSize, self._flags
+
+
+def _document(data: Any, flags: int, compressor: Optional[FrameCompressor], limit: int) -> Any:
+    if not flags & FLAG_COMPRESSED:
+        return data
+    if compressor is None:
+        raise ConnectionError("compressed frame on a connection without compression")
+    try:
+        return compressor.decompress(data, limit)
+    except Exception as e:
+        raise ConnectionError(f"cannot decompress frame: {e}") from None
+
+
+async def readMessage(
+    readexactly: Callable[[int], Awaitable[Optional[bytes]]],
+    flagged: bool,
+    reassembler: Reassembler,
+    compressor: Optional[FrameCompressor] = None,
+) -> Optional[Tuple[Any, Optional[memoryview]]]:
+    """Read frames until one message is complete.
+
+    *flagged* tells whether the connection negotiated flagged headers.
+    Returns ``(document, rest)``: the (decompressed) encoded document and,
+    for a chunked message, the bytes after it (its out-of-band buffers);
+    *rest* is ``None`` for a plain frame.  ``None`` means end of stream.  A
+    frame over the reassembler's size limit raises ``ConnectionError``
+    before its payload is read.
+    """
+    limit = reassembler.maxMessageSize
+    while True:
+        header = await readexactly(HEADER.size)
+        if header is None:
+            return None
+        (word,) = HEADER.unpack(header)
+        if not flagged:
+            if limit and word > limit:
+                raise ConnectionError(f"frame of {word} bytes exceeds the limit of {limit} bytes")
+            data = await readexactly(word) if word else b''
+            return None if data is None else (data, None)
+        length = word & LENGTH_MASK
+        if limit and length > limit + FIRST_HEADER.size:
+            raise ConnectionError(f"frame of {length} bytes exceeds the limit of {limit} bytes")
+        data = await readexactly(length) if length else b''
+        if data is None:
+            return None
+        if not word & FLAG_CHUNK:
+            return _document(data, word, compressor, limit), None
+        done = reassembler.feed(word, data)
+        if done is not None:
+            data, docSize, flags = done
+            return _document(data[:docSize], flags, compressor, limit), data[docSize:]
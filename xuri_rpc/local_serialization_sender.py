@@ -1,24 +1,23 @@
 """
-Local serialisation sender using CBOR for in-process RPC testing.
-Requires: pip install cbor2
+Local serialisation sender for in-process RPC testing; messages go through a
+real codec (CBOR by default) on the way.
 """
 import asyncio
-from typing import Any, Optional, Tuple, Callable, Dict
+from typing import Any, Optional, Tuple, Callable, Union
 
+from .codec import CBOR, Codec, getCodec
 from .rpc import Client, MessageReceiver, RpcMessage, ISender
 
 
 class LocalSerializationSender(ISender):
-    """Sends RPC messages via a DumpChannel using CBOR encoding."""
+    """Sends RPC messages via a DumpChannel, encoded with the channel's codec."""
 
     def __init__(self, channel: 'DumpChannel', direction: str) -> None:
         self.channel: 'DumpChannel' = channel
         self.direction: str = direction
 
     async def send(self, message: RpcMessage) -> None:
-        import cbor2
-
-        dumped = cbor2.dumps(message)
+        dumped = self.channel.codec.encode(message)
         if self.direction == 'toServer':
             self.channel.sendToServer(dumped)
         else:
@@ -26,9 +25,13 @@ class LocalSerializationSender(ISender):
 
 
 class DumpChannel:
-    """In-process bidirectional channel connecting a server and client side."""
+    """In-process bidirectional channel connecting a server and client side.
+
+    *codec* is a :class:`~xuri_rpc.codec.Codec` or a registered codec name.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, codec: Union[Codec, str, None] = None) -> None:
+        self.codec: Codec = getCodec(codec) if isinstance(codec, str) else (codec or CBOR)
         self.serverSideReceiver: Optional[MessageReceiver] = None
         self.clientSideReceiver: Optional[MessageReceiver] = None
         self.serverSideClient: Optional[Client] = None
@@ -43,9 +46,7 @@ class DumpChannel:
         self.clientSideClient = client
 
     def sendToServer(self, message: bytes) -> None:
-        import cbor2
-
-        decoded = cbor2.loads(message)
+        decoded = self.codec.decode(message)
         asyncio.ensure_future(
             self.serverSideReceiver.onReceiveMessage(
                 decoded, self.serverSideClient
@@ -53,9 +54,7 @@ class DumpChannel:
         )
 
     def sendToClient(self, message: bytes) -> None:
-        import cbor2
-
-        decoded = cbor2.loads(message)
+        decoded = self.codec.decode(message)
         asyncio.ensure_future(
             self.clientSideReceiver.onReceiveMessage(
                 decoded, self.clientSideClient
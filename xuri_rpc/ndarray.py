@@ -0,0 +1,81 @@
+"""
+NumPy arrays as data instead of proxies.
+
+Without a translator an ``ndarray`` argument or result would be registered
+as a remote object and every element access would be a round trip.
+:class:`NdarrayTranslator` ships dtype, shape and (for Fortran-ordered
+arrays) strides together with the raw buffer, which transports with
+out-of-band buffers enabled send without further copies.  The receiver
+wraps the bytes with ``np.frombuffer``, so received arrays are read-only
+views of the message buffer.
+
+Registered on every :class:`~xuri_rpc.rpc.ArgTranslator` when numpy imports.
+"""
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .rpc import ICustomTranslator
+
+NDARRAY_KEY: str = '__rpc_ndarray__'
+
+
+def _descr(dtype: 'np.dtype') -> Union[str, List[Any]]:
+    return dtype.str if dtype.fields is None else np.lib.format.dtype_to_descr(dtype)
+
+
+def _tuples(descr: Any) -> Any:
+    """A descr that went through the codec, with its tuples restored."""
+    if isinstance(descr, str):
+        return descr
+    return [
+        (field[0], _tuples(field[1]), *((tuple(field[2]),) if len(field) > 2 else ()))
+        for field in descr
+    ]
+
+
+def _wholeBuffer(arr: 'np.ndarray') -> Optional[Union[bytes, bytearray]]:
+    """The bytes or bytearray *arr* covers exactly (as received arrays do)."""
+    base = arr.base
+    while isinstance(base, np.ndarray):
+        base = base.base
+    if isinstance(base, memoryview):
+        base = base.obj
+    if type(base) in (bytes, bytearray) and len(base) == arr.nbytes:
+        return base
+    return None
+
+
+class NdarrayTranslator(ICustomTranslator):
+    """Sends ``numpy.ndarray`` values by content; object arrays stay proxies."""
+
+    def match(self, obj: Any) -> bool:
+        return isinstance(obj, np.ndarray) and not obj.dtype.hasobject
+
+    def translate(self, obj: 'np.ndarray') -> Dict[str, Any]:
+        strides = None
+        if not obj.flags.c_contiguous:
+            if obj.flags.f_contiguous:
+                strides = list(obj.strides)
+            else:
+                obj = np.ascontiguousarray(obj)
+        data = _wholeBuffer(obj)
+        out: Dict[str, Any] = {
+            NDARRAY_KEY: _descr(obj.dtype),
+            'shape': list(obj.shape),
+            'data': data if data is not None else obj.tobytes(order='A'),
+        }
+        if strides is not None:
+            out['strides'] = strides
+        return out
+
+    def reverseMatch(self, obj: Any) -> bool:
+        return NDARRAY_KEY in obj
+
+    def reverseTranslate(self, obj: Dict[str, Any]) -> 'np.ndarray':
+        dtype = np.lib.format.descr_to_dtype(_tuples(obj[NDARRAY_KEY]))
+        shape = tuple(obj['shape'])
+        strides = obj.get('strides')
+        if strides is not None:
+            return np.ndarray(shape, dtype, buffer=obj['data'], strides=tuple(strides))
+        return np.frombuffer(obj['data'], dtype).reshape(shape)
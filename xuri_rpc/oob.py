@@ -0,0 +1,103 @@
+"""
+Out-of-band transfer of large binary values.
+
+Before encoding, bytes-like values of at least *threshold* bytes are taken
+out of the message and replaced by ``{'__rpc_oob__': index}``; the message
+gains ``'oob': [length, ...]`` and the transport writes the buffers right
+after the encoded document, straight from the caller's objects.  The
+receiver reads them into their own buffers and puts read-only
+``memoryview``s back in place.  Only used when both ends agreed on it in the
+connection hello.
+
+A dict of the caller's that itself has an ``'__rpc_oob__'`` or
+``'__rpc_oob_escape__'`` key is sent as ``{'__rpc_oob_escape__': dict}`` so
+that it is never mistaken for a reference.
+"""
+from typing import Any, List, Tuple
+
+from .rpc import RpcMessage
+
+OOB_KEY: str = '__rpc_oob__'
+OOB_ESCAPE: str = '__rpc_oob_escape__'
+
+_BUFFERS = frozenset((bytes, bytearray, memoryview))
+_CONTAINERS = frozenset((dict, list, tuple))
+_WALKED = _BUFFERS | _CONTAINERS
+
+
+def _extract(value: Any, threshold: int, buffers: List[Any]) -> Any:
+    """*value* with large buffers swapped for refs; containers are copied
+    only along the paths that changed."""
+    kind = type(value)
+    if kind in _BUFFERS:
+        size = value.nbytes if kind is memoryview else len(value)
+        if size < threshold:
+            return bytes(value) if kind is memoryview else value
+        if kind is memoryview and (value.ndim != 1 or value.format != 'B'):
+            value = value.cast('B') if value.c_contiguous else memoryview(value.tobytes())
+        buffers.append(value)
+        return {OOB_KEY: len(buffers) - 1}
+    if kind is dict:
+        out = None
+        for key, item in value.items():
+            if type(item) in _WALKED:
+                new = _extract(item, threshold, buffers)
+                if new is not item:
+                    if out is None:
+                        out = dict(value)
+                    out[key] = new
+        if OOB_KEY in value or OOB_ESCAPE in value:
+            return {OOB_ESCAPE: value if out is None else out}
+        return value if out is None else out
+    if kind is list or kind is tuple:
+        out = None
+        for i, item in enumerate(value):
+            if type(item) in _WALKED:
+                new = _extract(item, threshold, buffers)
+                if new is not item:
+                    if out is None:
+                        out = list(value)
+                    out[i] = new
+        return value if out is None else out
+    return value
+
+
+def extractBuffers(message: RpcMessage, threshold: int) -> Tuple[RpcMessage, List[Any]]:
+    """Split *message* into a document and its out-of-band buffers."""
+    buffers: List[Any] = []
+    doc = _extract(message, threshold, buffers)
+    if not buffers:
+        # the receiver restores nothing, so colliding dicts need no escape
+        return message, buffers
+    doc = dict(doc)
+    doc['oob'] = [b.nbytes if type(b) is memoryview else len(b) for b in buffers]
+    return doc, buffers
+
+
+def _restore(value: Any, buffers: List[Any]) -> Any:
+    kind = type(value)
+    if kind is dict:
+        if len(value) == 1:
+            if OOB_KEY in value:
+                index = value[OOB_KEY]
+                if type(index) is not int or not 0 <= index < len(buffers):
+                    raise ConnectionError(f"invalid out-of-band reference {index!r}")
+                return buffers[index]
+            if OOB_ESCAPE in value:
+                value = value[OOB_ESCAPE]
+                if type(value) is not dict:
+                    raise ConnectionError("invalid out-of-band escape")
+        for key, item in value.items():
+            if type(item) in _CONTAINERS:
+                value[key] = _restore(item, buffers)
+    elif kind is list:
+        for i, item in enumerate(value):
+            if type(item) in _CONTAINERS:
+                value[i] = _restore(item, buffers)
+    return value
+
+
+def restoreBuffers(message: RpcMessage, buffers: List[Any]) -> RpcMessage:
+    """Put received buffers back into a decoded *message*, in place."""
+    message.pop('oob', None)
+    return _restore(message, buffers)
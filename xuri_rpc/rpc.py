@@ -4,6 +4,12 @@ Core module containing all RPC logic.
 """
 import abc
 import asyncio
+import fnmatch
+import functools
+import inspect
+import itertools
+import logging
+import re
 import weakref
 import time
 import traceback
@@ -11,6 +17,12 @@ from typing import (
     Any, Optional, Callable, Dict, List, Set, Union, Tuple,
 )
 
+from .cache import MISS, ResultCache, freezeArgs, isPlainData
+from .decorators import getMemberOptions, getResultCache
+from .execution import PROCESS, ExecutionPolicy, checkPicklable, getExecutionPolicy
+
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------------
 # Types & constants
 # ---------------------------------------------------------------------------
@@ -30,12 +42,55 @@ _connectionLimit: float = 30.0     # seconds
 
 _DEFAULT_HOST_KEY: str = '__default_host__'
 
+# (objectId, method) of the functions RemoteProxy builds for remote methods
+_TARGET_ATTR: str = '__rpc_target__'
+
+_outboundQueueSize: int = 1024
+
+# Optional protocol features this implementation understands.  Each side
+# announces its set in the ``meta.features`` of its first request (or of the
+# reply to the peer's first request); features are only used towards peers
+# that announced them, so older peers keep receiving the original layout.
+FEATURE_COMPACT: str = 'compact'      # replies carry only idFor/status/data/trace
+FEATURE_CANCEL: str = 'cancel'        # {'cancelFor': id} stops an in-flight request
+FEATURE_STREAM: str = 'stream'        # generator results are sent as chunk frames
+FEATURE_BATCH: str = 'batch'          # {'batch': [requests]} frames with one reply
+FEATURE_FRAMES: str = 'frames'        # {'frames': [messages]} transport envelopes
+FEATURE_PIPELINE: str = 'pipeline'    # calls on the result of a call still in flight
+FEATURE_ONEWAY: str = 'oneway'        # meta.noReply requests are never answered
+FEATURE_INVALIDATE: str = 'invalidate'  # {'invalidate': {...}} clears response caches
+FEATURE_ERRORS: str = 'errors'        # error replies carry a structured 'error'
+_supportedFeatures: Set[str] = {
+    FEATURE_COMPACT, FEATURE_CANCEL, FEATURE_STREAM, FEATURE_BATCH, FEATURE_FRAMES,
+    FEATURE_PIPELINE, FEATURE_ONEWAY, FEATURE_INVALIDATE, FEATURE_ERRORS,
+}
+
+# How much a receiver tells callers about failed handlers.
+ERROR_DETAIL_NONE: str = 'none'        # exception type (and code) only
+ERROR_DETAIL_MESSAGE: str = 'message'  # plus message and args
+ERROR_DETAIL_TRACE: str = 'trace'      # plus the formatted traceback, logged locally
+_errorDetail: str = ERROR_DETAIL_TRACE
+
+_streamWindow: int = 32            # chunks a stream may send ahead of the consumer
+_maxFramesPerEnvelope: int = 256   # messages coalesced into one 'frames' envelope
+_maxEnvelopedSize: int = 65536    # rough size above which a message is not coalesced
+_maxOverlappingSends: int = 8      # sends a writer keeps going when the sender allows it
+_pipelineTtl: float = 30.0         # seconds a pipelined result stays addressable
+
 
 def setDebugFlag(flag: bool) -> None:
     global debugFlag
     debugFlag = flag
 
 
+def setErrorDetail(level: str) -> None:
+    """Default error detail level of receivers created afterwards."""
+    global _errorDetail
+    if level not in (ERROR_DETAIL_NONE, ERROR_DETAIL_MESSAGE, ERROR_DETAIL_TRACE):
+        raise ValueError(f"unknown error detail level '{level}'")
+    _errorDetail = level
+
+
 def _getId(hostId: Optional[str] = None) -> str:
     global _idCount
     hid = hostId if hostId is not None else _hostId
@@ -44,6 +99,17 @@ def _getId(hostId: Optional[str] = None) -> str:
     return rid
 
 
+def _nextMessageId(hostId: Optional[str] = None) -> int:
+    """Next message id of *hostId*.
+
+    Message ids are small integers drawn from a per-host counter that is
+    never reset, so they stay unique in the host's pending table across
+    reconnects, and hosts in one process never share a table.  Object ids
+    keep using :func:`_getId` because they must be unique across hosts.
+    """
+    return next(_getOrCreateOption(hostId)['messageIds'])
+
+
 # ---------------------------------------------------------------------------
 # PreArgObj
 # ---------------------------------------------------------------------------
@@ -63,6 +129,11 @@ class PreArgObj:
 class ISender(abc.ABC):
     """Abstract base class for message senders. Implementations may be sync or async."""
 
+    #: True when :meth:`send` starts writing before it first yields and lets
+    #: other sends write between the chunks of a large message.  The outbound
+    #: writer then lets small replies of other calls overtake a large one.
+    overlapsSends: bool = False
+
     @abc.abstractmethod
     async def send(self, message: RpcMessage) -> None:
         ...
@@ -81,6 +152,25 @@ class _ProxyObjectHandler:
         self.lastRegistered: float = time.time()
 
 
+class _DispatchTable:
+    """Resolved handlers of one MessageReceiver: objectId -> method -> entry."""
+
+    __slots__ = ('entries', '__weakref__')
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, Dict[str, '_DispatchEntry']] = {}
+
+    def invalidate(self, objId: str) -> None:
+        methods = self.entries.pop(objId, None)
+        if methods:
+            for entry in methods.values():
+                if entry.cache is not None:
+                    entry.cache.invalidate(objId)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
 class ObjectOfProxyManager:
     """Manages local objects exposed as proxies (object -> id mapping)."""
 
@@ -88,11 +178,21 @@ class ObjectOfProxyManager:
         self.proxyMap: Dict[int, str] = {}          # id(obj) -> id
         self.reverseProxyMap: Dict[str, _ProxyObjectHandler] = {}  # id -> handler
         self._objRefs: Dict[int, Any] = {}           # keep strong refs to prevent GC
+        self._dispatchTables: 'weakref.WeakSet[_DispatchTable]' = weakref.WeakSet()
+
+    def addDispatchTable(self, table: _DispatchTable) -> None:
+        """Register a dispatch cache to be invalidated when objects change."""
+        self._dispatchTables.add(table)
+
+    def _invalidate(self, objId: str) -> None:
+        for table in self._dispatchTables:
+            table.invalidate(objId)
 
     def set(self, obj: Any, objId: str) -> None:
         self.proxyMap[id(obj)] = objId
         self.reverseProxyMap[objId] = _ProxyObjectHandler(objId, obj)
         self._objRefs[id(obj)] = obj
+        self._invalidate(objId)
 
     def reRegister(self, objId: str) -> None:
         handler = self.reverseProxyMap.get(objId)
@@ -115,6 +215,7 @@ class ObjectOfProxyManager:
             self.proxyMap.pop(id(handler.target), None)
             self._objRefs.pop(id(handler.target), None)
             del self.reverseProxyMap[objId]
+            self._invalidate(objId)
 
     def delete(self, obj: Any) -> None:
         objId = self.proxyMap.get(id(obj))
@@ -122,6 +223,7 @@ class ObjectOfProxyManager:
             self.reverseProxyMap.pop(objId, None)
             del self.proxyMap[id(obj)]
             self._objRefs.pop(id(obj), None)
+            self._invalidate(objId)
 
 
 class RemoteProxyManager:
@@ -152,6 +254,14 @@ class RemoteProxyManager:
 # Helper: proxy descriptor creation
 # ---------------------------------------------------------------------------
 
+def _describeMethod(name: str, func: Any) -> RpcMessage:
+    member = {'name': name, 'type': 'function'}
+    options = getMemberOptions(func)
+    if options:
+        member.update(options)
+    return member
+
+
 def _createProxyForObject(proxyId: str, obj: Any, hostIdVal: str) -> Optional[RpcMessage]:
     """Create a ProxyDescriber dict for a local object."""
     if callable(obj) and not isinstance(obj, dict):
@@ -173,7 +283,7 @@ def _createProxyForObject(proxyId: str, obj: Any, hostIdVal: str) -> Optional[Rp
                 continue
             val = obj[key]
             if callable(val):
-                members.append({'name': key, 'type': 'function'})
+                members.append(_describeMethod(key, val))
         return {
             'id': proxyId,
             'hostId': hostIdVal,
@@ -186,10 +296,11 @@ def _createProxyForObject(proxyId: str, obj: Any, hostIdVal: str) -> Optional[Rp
         if name.startswith('__'):
             continue
         try:
-            if callable(getattr(obj, name)):
-                members.append({'name': name, 'type': 'function'})
+            val = getattr(obj, name)
         except AttributeError:
             continue
+        if callable(val):
+            members.append(_describeMethod(name, val))
     return {
         'id': proxyId,
         'hostId': hostIdVal,
@@ -240,7 +351,16 @@ def _isDict(obj: Any) -> bool:
 
 
 def _isSimpleObject(obj: Any) -> bool:
-    return isinstance(obj, (bytes, str, int, float, bool, type(None)))
+    return isinstance(obj, (bytes, bytearray, str, int, float, bool, type(None)))
+
+
+def _plainBuffer(view: memoryview) -> Any:
+    """bytes-like value a codec can encode for *view*, without copying when
+    the view spans a whole bytes or bytearray object (received buffers do)."""
+    base = view.obj
+    if type(base) in (bytes, bytearray) and view.c_contiguous and view.nbytes == len(base):
+        return base
+    return view.tobytes()
 
 
 # ---------------------------------------------------------------------------
@@ -248,7 +368,13 @@ def _isSimpleObject(obj: Any) -> bool:
 # ---------------------------------------------------------------------------
 
 class ICustomTranslator(abc.ABC):
-    """Abstract base class for custom argument translators."""
+    """Abstract base class for custom argument translators.
+
+    :meth:`translate` turns a local object accepted by :meth:`match` into a
+    dict of plain data; the receiving side recognises that dict with
+    :meth:`reverseMatch` and rebuilds the object with
+    :meth:`reverseTranslate`.
+    """
 
     @abc.abstractmethod
     def match(self, obj: Any) -> bool:
@@ -258,17 +384,31 @@ class ICustomTranslator(abc.ABC):
     def translate(self, obj: Any) -> Any:
         ...
 
+    def reverseMatch(self, obj: Dict[str, Any]) -> bool:
+        """Whether a received dict is this translator's output; defaults to
+        :meth:`match` for translators whose test accepts both forms."""
+        return self.match(obj)
+
     @abc.abstractmethod
     def reverseTranslate(self, obj: Any) -> Any:
         ...
 
 
+def _defaultTranslators() -> List[ICustomTranslator]:
+    """Built-in translators whose optional dependency imports."""
+    try:
+        from .ndarray import NdarrayTranslator
+    except ImportError:
+        return []
+    return [NdarrayTranslator()]
+
+
 class ArgTranslator:
     """Translates arguments to/from serialisable ArgObj dicts."""
 
     def __init__(self) -> None:
         self.typeIndicator: str = '__is_rpc_proxy__'
-        self.customTranslators: List[ICustomTranslator] = []
+        self.customTranslators: List[ICustomTranslator] = _defaultTranslators()
 
     def setTypeIndicator(self, indicator: str) -> None:
         self.typeIndicator = indicator
@@ -294,6 +434,9 @@ class ArgTranslator:
         if _isSimpleObject(target):
             return target
 
+        if isinstance(target, memoryview):
+            return _plainBuffer(target)
+
         if isinstance(target, list):
             return [self.toArgObj(item, asProxyLocal) for item in target]
 
@@ -316,14 +459,13 @@ class ArgTranslator:
             client.getRunnableProxyManager().set(data['id'], result, client)
             return result
 
-        for ct in self.customTranslators:
-            if hasattr(target, 'data') and ct.match(target.get('data')):
-                return ct.reverseTranslate(target['data'])
-
         if isinstance(target, list):
             return [self.reverseToArgObj(item, client) for item in target]
 
         if _isDict(target):
+            for ct in self.customTranslators:
+                if ct.reverseMatch(target):
+                    return ct.reverseTranslate(target)
             return {k: self.reverseToArgObj(v, client) for k, v in target.items()}
 
         return target
@@ -372,10 +514,183 @@ class RemoteProxy:
             self._isCallable = True
 
 
+# ---------------------------------------------------------------------------
+# Outbound writer
+# ---------------------------------------------------------------------------
+
+class _OutboundWriter:
+    """Single ordered writer for the messages a Client sends without waiting
+    for an answer (replies, error replies).
+
+    Messages go through a bounded queue; :meth:`put` blocks while the queue is
+    full, which pushes back on handlers when the peer reads slowly.  The
+    writer task only lives while there is something to send.  Messages that
+    queued up while a send was in progress go out together in one
+    ``frames`` envelope when the peer supports it.
+
+    Messages go out in queue order, with one exception: when the sender
+    sets :attr:`ISender.overlapsSends`, a message too large to share an
+    envelope is sent in the background (up to ``_maxOverlappingSends`` at
+    once), so later small messages of *other* calls can go out between its
+    chunks.  Small messages stay in order among themselves, and a message of
+    the same call or stream as a large one still waits for it.
+    """
+
+    def __init__(self, client: 'Client', maxsize: int) -> None:
+        self.client: 'Client' = client
+        self.loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        self.queue: 'asyncio.Queue[RpcMessage]' = asyncio.Queue(maxsize)
+        self.task: Optional['asyncio.Task[None]'] = None
+        self.sending: Set['asyncio.Task[None]'] = set()
+        self.lastFor: Dict[Any, 'asyncio.Task[None]'] = {}
+        self.sent: int = 0
+        self.failed: int = 0
+        self.maxDepth: int = 0
+        self.lastError: Optional[BaseException] = None
+
+    async def put(self, message: RpcMessage) -> None:
+        await self.queue.put(message)
+        self._start()
+
+    def putNowait(self, message: RpcMessage) -> None:
+        """Queue a small control frame without waiting for room."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.loop.create_task(self.put(message))
+            return
+        self._start()
+
+    def _start(self) -> None:
+        depth = self.queue.qsize()
+        if depth > self.maxDepth:
+            self.maxDepth = depth
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        queue = self.queue
+        client = self.client
+        while not queue.empty():
+            if len(self.sending) >= _maxOverlappingSends:
+                await asyncio.wait(self.sending, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            message = queue.get_nowait()
+            count = 1
+            alone = not _fitsEnvelope(message)
+            large: Optional[RpcMessage] = None
+            if not alone and not queue.empty() and FEATURE_FRAMES in client.peerFeatures:
+                frames: List[RpcMessage] = []
+                _addFrames(frames, message)
+                while not queue.empty() and len(frames) < _maxFramesPerEnvelope:
+                    nextMessage = queue.get_nowait()
+                    if not _fitsEnvelope(nextMessage):
+                        large = nextMessage
+                        break
+                    _addFrames(frames, nextMessage)
+                if len(frames) > 1:
+                    message = {'frames': frames}
+                    count = len(frames)
+            await self._dispatch(message, count, alone)
+            if large is not None:
+                await self._dispatch(large, 1, True)
+
+    async def _dispatch(self, message: RpcMessage, count: int, large: bool) -> None:
+        keys = _orderKeys(message)
+        after = {self.lastFor[k] for k in keys if k in self.lastFor}
+        if not (large and getattr(self.client.useSender(), 'overlapsSends', False)):
+            await self._send(message, count, after)
+            return
+        task = self.loop.create_task(self._send(message, count, after))
+        self.sending.add(task)
+        for key in keys:
+            self.lastFor[key] = task
+        task.add_done_callback(functools.partial(self._sendDone, keys))
+
+    def _sendDone(self, keys: Set[Any], task: 'asyncio.Task[None]') -> None:
+        self.sending.discard(task)
+        for key in keys:
+            if self.lastFor.get(key) is task:
+                del self.lastFor[key]
+
+    async def _send(
+        self, message: RpcMessage, count: int,
+        after: Optional[Set['asyncio.Task[None]']] = None,
+    ) -> None:
+        client = self.client
+        try:
+            if after:
+                await asyncio.wait(after)
+            sender = client.useSender()
+            if sender is None:
+                raise RuntimeError("sender not set")
+            result = sender.send(message)
+            if asyncio.iscoroutine(result) or asyncio.isfuture(result):
+                await result
+            self.sent += count
+        except Exception as e:
+            self.failed += count
+            self.lastError = e
+            client._failRequests(message, e)
+            logger.error("[%s] failed to send message: %s", client.getHostId(), e)
+
+
+def _fitsEnvelope(message: RpcMessage) -> bool:
+    """Whether *message* is small enough to share a ``frames`` envelope;
+    a large one goes out alone so the small ones need not wait for it."""
+    budget = _maxEnvelopedSize
+    pending: List[Any] = [message]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, (str, bytes, bytearray)):
+            budget -= len(value)
+        elif isinstance(value, dict):
+            budget -= len(value)
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            budget -= len(value)
+            pending.extend(value)
+        else:
+            budget -= getattr(value, 'nbytes', 8)
+        if budget < 0:
+            return False
+    return True
+
+
+def _orderKeys(message: RpcMessage) -> Set[Any]:
+    """The call and stream ids *message* carries frames for."""
+    keys: Set[Any] = set()
+    for frame in message.get('frames') or (message,):
+        for field in ('id', 'idFor', 'streamFor', 'cancelFor', 'creditFor'):
+            value = frame.get(field)
+            if value is not None:
+                keys.add(value)
+    return keys
+
+
+def _addFrames(frames: List[RpcMessage], message: RpcMessage) -> None:
+    inner = message.get('frames')
+    if inner is not None:
+        frames.extend(inner)
+    else:
+        frames.append(message)
+
+
 # ---------------------------------------------------------------------------
 # Client
 # ---------------------------------------------------------------------------
 
+class _PendingCall:
+    """Entry of the pending-request table: a request waiting for its reply."""
+
+    __slots__ = ('future', 'request', 'sendTime')
+
+    def __init__(self, future: 'asyncio.Future[Any]', request: RpcMessage) -> None:
+        self.future: 'asyncio.Future[Any]' = future
+        self.request: RpcMessage = request
+        self.sendTime: float = time.time()
+
+
 class Client:
     """RPC client that sends requests and receives responses via an ISender."""
 
@@ -384,6 +699,27 @@ class Client:
         self._useSender: Callable[[], Optional[ISender]] = lambda: None
         self.argTranslator: ArgTranslator = ArgTranslator()
         self.argsAutoWrapper: AutoWrapper = _shallowAutoWrapper
+        self.outboundQueueSize: int = _outboundQueueSize
+        self._outbound: Optional[_OutboundWriter] = None
+        self.features: Set[str] = set(_supportedFeatures)
+        self.peerFeatures: Set[str] = set()
+        self._featuresAnnounced: bool = False
+        # handler tasks of requests received over this connection, by id
+        self._inflight: Dict[Any, 'asyncio.Task[Any]'] = {}
+        # send credit of the streams this side is producing, by request id
+        self._outStreams: Dict[Any, asyncio.Semaphore] = {}
+        self.autoBatchWindow: Optional[float] = None   # seconds, None = off
+        self._coalesced: List[RpcMessage] = []
+        self._flushHandle: Optional[asyncio.Handle] = None
+        self._flushAt: float = 0.0
+        self.pipelining: bool = False
+        # results the peer asked to keep for pipelined calls:
+        # request id -> (future of (objectId, error), expiry)
+        self._pipelined: Dict[Any, Tuple['asyncio.Future[Tuple[Any, Any]]', float]] = {}
+        self.responseCache: Optional[ResultCache] = None
+        self._cacheGeneration: int = 0
+        # in-flight calls of @coalesce methods, by (objectId, method, args)
+        self._sharedCalls: Dict[Any, 'asyncio.Task[Any]'] = {}
 
     # -- configuration ----------------------------------------------------
 
@@ -396,17 +732,47 @@ class Client:
     def setArgsAutoWrapper(self, wrapper: AutoWrapper) -> None:
         self.argsAutoWrapper = wrapper
 
+    def setAutoBatch(self, window_us: Optional[int] = 0) -> None:
+        """Coalesce outgoing requests into ``frames`` envelopes.
+
+        With ``0`` the requests issued in the same loop iteration share one
+        frame; a positive *window_us* also waits up to that many microseconds
+        for more.  A request with a timeout never waits longer than a tenth
+        of it.  ``None`` turns coalescing off.  Only used towards peers that
+        announced the ``frames`` feature.
+        """
+        self.autoBatchWindow = None if window_us is None else window_us / 1e6
+
+    def setPipelining(self, enabled: bool = True) -> None:
+        """Make remote calls return :class:`RemotePromise` objects.
+
+        Methods called on a promise before its request went out are sent
+        right away and run on the peer against the pending result, so
+        ``await main.getX().compute()`` costs one round trip.  Only used
+        towards peers that announced the ``pipeline`` feature.
+        """
+        self.pipelining = enabled
+
+    def enableResponseCache(self, maxsize: int = 1024) -> None:
+        """Answer calls to ``@clientCached`` methods from a local cache.
+
+        Entries live for the TTL declared by the method and are dropped when
+        the peer pushes an invalidation for their key or object id.
+        """
+        self.responseCache = ResultCache(maxsize)
+
+    def setOutboundQueueSize(self, size: int) -> None:
+        """Bound the queue of unsent replies (``0`` means unbounded)."""
+        self.outboundQueueSize = size
+        self._outbound = None
+
     # -- internal helpers -------------------------------------------------
 
     def _getReqPending(self) -> Dict[str, Any]:
         return _getOrCreateOption(self.hostId)['requestPendingDict']
 
-    def _putAwait(self, reqId: str, future: 'asyncio.Future[Any]', request: RpcMessage) -> None:
-        self._getReqPending()[reqId] = {
-            'future': future,
-            'request': request,
-            'sendTime': time.time(),
-        }
+    def _putAwait(self, reqId: Any, future: 'asyncio.Future[Any]', request: RpcMessage) -> None:
+        self._getReqPending()[reqId] = _PendingCall(future, request)
     def getSessionData(self) -> dict[str,Any]:
         return _getOrCreateOption(self.hostId)['session']
 
@@ -421,14 +787,264 @@ class Client:
     def getRunnableProxyManager(self) -> RemoteProxyManager:
         return _getOrCreateOption(self.hostId)['runnableProxyManager']
 
+    def _announceFeatures(self, message: RpcMessage) -> None:
+        """Attach this side's feature set to the first message that carries meta."""
+        if not self._featuresAnnounced:
+            self._featuresAnnounced = True
+            message.setdefault('meta', {})['features'] = sorted(self.features)
+
+    def _learnFeatures(self, message: RpcMessage) -> None:
+        meta = message.get('meta')
+        if meta:
+            features = meta.get('features')
+            if features is not None:
+                self.peerFeatures = set(features) & self.features
+                _getOrCreateOption(self.hostId)['peers'].add(self)
+
+    def peerSupports(self, feature: str) -> bool:
+        return feature in self.peerFeatures
+
+    def _getOutbound(self) -> _OutboundWriter:
+        writer = self._outbound
+        if writer is None or writer.loop is not asyncio.get_running_loop():
+            writer = _OutboundWriter(self, self.outboundQueueSize)
+            self._outbound = writer
+        return writer
+
+    def _trackInflight(self, reqId: Any, task: 'asyncio.Task[Any]') -> None:
+        inflight = self._inflight
+        inflight[reqId] = task
+
+        def _untrack(t: 'asyncio.Task[Any]') -> None:
+            if inflight.get(reqId) is t:
+                del inflight[reqId]
+
+        task.add_done_callback(_untrack)
+
+    def _runsInflight(self, reqId: Any) -> bool:
+        """Whether the current task is the one tracked for request *reqId*,
+        i.e. a cancel frame for it already reaches the running handler."""
+        return self._inflight.get(reqId) is asyncio.current_task()
+
+    def _cancelInflight(self, reqId: Any) -> None:
+        task = self._inflight.pop(reqId, None)
+        if task is not None:
+            task.cancel()
+
+    def _abandon(self, reqId: Any) -> None:
+        """Forget the pending request *reqId* and ask the peer to stop it."""
+        self._getReqPending().pop(reqId, None)
+        coalesced = self._coalesced
+        for i, request in enumerate(coalesced):
+            if request['id'] == reqId:
+                del coalesced[i]
+                return
+        if FEATURE_CANCEL in self.peerFeatures:
+            self._sendControl({'cancelFor': reqId})
+
+    def _coalesce(self, request: RpcMessage, timeout: Optional[float]) -> None:
+        coalesced = self._coalesced
+        coalesced.append(request)
+        if len(coalesced) >= _maxFramesPerEnvelope:
+            self._flushCoalesced()
+            return
+        loop = asyncio.get_running_loop()
+        delay = self.autoBatchWindow or 0.0
+        if timeout is not None:
+            delay = min(delay, timeout * 0.1)
+        flushAt = loop.time() + delay
+        handle = self._flushHandle
+        if handle is None or flushAt < self._flushAt:
+            if handle is not None:
+                handle.cancel()
+            self._flushAt = flushAt
+            if delay > 0:
+                self._flushHandle = loop.call_later(delay, self._flushCoalesced)
+            else:
+                self._flushHandle = loop.call_soon(self._flushCoalesced)
+
+    def _flushCoalesced(self) -> None:
+        if self._flushHandle is not None:
+            self._flushHandle.cancel()
+            self._flushHandle = None
+        requests = self._coalesced
+        if not requests:
+            return
+        self._coalesced = []
+        self._getOutbound().putNowait(
+            requests[0] if len(requests) == 1 else {'frames': requests}
+        )
+
+    def _failRequests(self, message: RpcMessage, error: BaseException) -> None:
+        """Fail the pending calls whose requests were in an unsent *message*."""
+        frames = message.get('frames')
+        reqPending = self._getReqPending()
+        for frame in frames if frames is not None else (message,):
+            if 'method' in frame or 'batch' in frame:
+                for request in frame.get('batch') or (frame,):
+                    pending = reqPending.pop(request.get('id'), None)
+                    if pending is not None and not pending.future.done():
+                        pending.future.set_exception(error)
+
+    def _pipelineSlot(self, reqId: Any) -> 'asyncio.Future[Tuple[Any, Any]]':
+        table = self._pipelined
+        entry = table.get(reqId)
+        if entry is None:
+            now = time.monotonic()
+            # entries are kept in expiry order
+            while table:
+                oldest = next(iter(table))
+                if table[oldest][1] > now:
+                    break
+                del table[oldest]
+            entry = (asyncio.get_running_loop().create_future(), now + _pipelineTtl)
+            table[reqId] = entry
+        return entry[0]
+
+    def _settlePipelined(self, reqId: Any, objectId: Any, error: Any = None) -> None:
+        future = self._pipelineSlot(reqId)
+        if not future.done():
+            future.set_result((objectId, error))
+
+    async def _pipelinedTarget(self, reqId: Any) -> str:
+        """Object id of the result of pipelined request *reqId*."""
+        try:
+            objectId, error = await asyncio.wait_for(
+                asyncio.shield(self._pipelineSlot(reqId)), _pipelineTtl
+            )
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"pipelined request {reqId} never arrived") from None
+        if error is not None:
+            raise RuntimeError(f"pipelined request {reqId} failed: {error}")
+        return objectId
+
+    async def _callCached(
+        self,
+        objectId: str,
+        method: str,
+        args: Tuple[Any, ...],
+        options: Dict[str, Any],
+        timeout: Optional[float],
+    ) -> Any:
+        cache = self.responseCache
+        frozen = freezeArgs(args)
+        if cache is None or frozen is None:
+            return await self.waitForRequest(
+                self._buildRequest(objectId, method, args, timeout), timeout
+            )
+        key = (objectId, method, frozen, options.get('key'))
+        hit = cache.get(key)
+        if hit is not MISS:
+            return self.reverseToArgObj(hit)   # a fresh copy for every caller
+        generation = self._cacheGeneration
+        result = await self.waitForRequest(
+            self._buildRequest(objectId, method, args, timeout), timeout
+        )
+        if not isPlainData(result):
+            return result
+        # an invalidation that arrived meanwhile may concern this result
+        if generation == self._cacheGeneration:
+            cache.put(key, result, options.get('ttl'))
+        return self.reverseToArgObj(result)
+
+    async def _callCoalesced(
+        self, objectId: str, method: str, args: Tuple[Any, ...], timeout: Optional[float]
+    ) -> Any:
+        frozen = freezeArgs(args)
+        if frozen is None:
+            return await self.waitForRequest(
+                self._buildRequest(objectId, method, args, timeout), timeout
+            )
+        key = (objectId, method, frozen)
+        shared = self._sharedCalls.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self.waitForRequest(
+                self._buildRequest(objectId, method, args, timeout), timeout
+            ))
+            self._sharedCalls[key] = shared
+            shared.add_done_callback(lambda t: self._sharedCalls.pop(key, None))
+        # one caller giving up must not cancel the call for the others
+        result = await asyncio.shield(shared)
+        return self.reverseToArgObj(result) if isPlainData(result) else result
+
+    def _applyInvalidation(self, spec: Dict[str, Any]) -> None:
+        self._cacheGeneration += 1
+        cache = self.responseCache
+        if cache is None:
+            return
+        key = spec.get('key')
+        objectId = spec.get('objectId')
+        if key is None and objectId is None:
+            cache.clear()
+        else:
+            cache.invalidateWhere(
+                lambda k: (key is None or k[3] == key) and (objectId is None or k[0] == objectId)
+            )
+
+    def pushInvalidation(self, key: Optional[str] = None, objectId: Optional[str] = None) -> None:
+        """Tell the peer to drop cached responses for *key* and/or *objectId*
+        (everything when both are None)."""
+        if FEATURE_INVALIDATE in self.peerFeatures:
+            spec = {}
+            if key is not None:
+                spec['key'] = key
+            if objectId is not None:
+                spec['objectId'] = objectId
+            self._sendControl({'invalidate': spec})
+
+    def _sendControl(self, frame: RpcMessage) -> None:
+        if self.useSender() is not None:
+            self._getOutbound().putNowait(frame)
+
+    def _getRemoteStreams(self) -> Dict[Any, 'RemoteStream']:
+        return _getOrCreateOption(self.hostId)['remoteStreams']
+
+    def _grantCredit(self, reqId: Any, n: int) -> None:
+        credit = self._outStreams.get(reqId)
+        if credit is not None:
+            for _ in range(n):
+                credit.release()
+
     # -- public API -------------------------------------------------------
 
+    async def sendReply(self, message: RpcMessage) -> None:
+        """Queue *message* on this connection's ordered outbound writer.
+
+        Waits while the outbound queue is full.  On senders that overlap
+        sends, later small messages of other calls may overtake a large one;
+        see :class:`_OutboundWriter`.
+        """
+        await self._getOutbound().put(message)
+
+    def outboundQueueDepth(self) -> int:
+        writer = self._outbound
+        return writer.queue.qsize() if writer is not None else 0
+
+    def getOutboundStats(self) -> Dict[str, Any]:
+        writer = self._outbound
+        if writer is None:
+            return {'depth': 0, 'maxDepth': 0, 'sent': 0, 'failed': 0}
+        return {
+            'depth': writer.queue.qsize(),
+            'maxDepth': writer.maxDepth,
+            'sent': writer.sent,
+            'failed': writer.failed,
+        }
+
     def toArgObj(self, obj: Any) -> Any:
         return self.argTranslator.toArgObj(
             obj, lambda o: asProxy(o, self.getHostId())
         )
 
-    async def waitForRequest(self, request: RpcMessage) -> Any:
+    async def waitForRequest(self, request: RpcMessage, timeout: Optional[float] = None) -> Any:
+        """Send *request* and wait for its reply.
+
+        With *timeout* (seconds) the wait is abandoned with ``TimeoutError``
+        and the pending entry released; the receiver enforces the same
+        deadline when the request carries ``meta.timeout``.  Cancelling the
+        waiting task also releases the entry, and a peer that supports it is
+        sent a cancel frame so the handler stops as well.
+        """
         if debugFlag:
             print(
                 f"{self.getHostId()} is waiting for {request['id']},", request
@@ -437,19 +1053,54 @@ class Client:
         if sender is None:
             raise RuntimeError("sender not set")
 
+        self._announceFeatures(request)
         loop = asyncio.get_event_loop()
         future: asyncio.Future = loop.create_future()
         self._putAwait(request['id'], future, request)
 
         try:
-            result = sender.send(request)
-            if asyncio.iscoroutine(result) or asyncio.isfuture(result):
-                await result
-        except Exception as e:
-            if not future.done():
-                future.set_exception(e)
-
-        return await future
+            if self.autoBatchWindow is not None and FEATURE_FRAMES in self.peerFeatures:
+                self._coalesce(request, timeout)
+            else:
+                try:
+                    result = sender.send(request)
+                    if asyncio.iscoroutine(result) or asyncio.isfuture(result):
+                        await result
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+
+            if timeout is None:
+                return await future
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                if not future.cancelled():
+                    raise
+                self._abandon(request['id'])
+                raise TimeoutError(
+                    f"request {request['id']} timed out after {timeout}s"
+                ) from None
+        except asyncio.CancelledError:
+            self._abandon(request['id'])
+            raise
+
+    async def notify(self, request: RpcMessage) -> None:
+        """Send *request* as a one-way call: no pending entry, no reply.
+
+        Resolves once the request has been handed to the transport.
+        """
+        sender = self.useSender()
+        if sender is None:
+            raise RuntimeError("sender not set")
+        request['meta']['noReply'] = 1
+        self._announceFeatures(request)
+        if self.autoBatchWindow is not None and FEATURE_FRAMES in self.peerFeatures:
+            self._coalesce(request, None)
+            return
+        result = sender.send(request)
+        if asyncio.iscoroutine(result) or asyncio.isfuture(result):
+            await result
 
     def createRemoteProxy(self, data: RpcMessage) -> Any:
         """Build a RemoteProxy (or return cached) from a ProxyDescriber dict."""
@@ -470,24 +1121,118 @@ class Client:
             elif memberType == 'function':
                 _dataId = data['id']
                 _methodName = memberName
-
-                async def _remoteCall(*args, _did=_dataId, _mn=_methodName):
-                    argsTransformed = [
-                        self.toArgObj(self.argsAutoWrapper(a)) for a in args
-                    ]
-                    request = {
-                        'objectId': _did,
-                        'meta': {},
-                        'id': _getId(self.hostId),
-                        'method': _mn,
-                        'args': argsTransformed,
-                    }
-                    return await self.waitForRequest(request)
-
+                _oneway = bool(member.get('oneway'))
+                _cacheOptions = member.get('cache')
+                _coalesce = bool(member.get('coalesce'))
+
+                def _remoteCall(
+                    *args, _did=_dataId, _mn=_methodName, _ow=_oneway, _cc=_cacheOptions,
+                    _sf=_coalesce, _rpc_timeout=None, _rpc_oneway=None,
+                ):
+                    if _cc is not None and self.responseCache is not None:
+                        return self._callCached(_did, _mn, args, _cc, _rpc_timeout)
+                    if _sf:
+                        return self._callCoalesced(_did, _mn, args, _rpc_timeout)
+                    request = self._buildRequest(_did, _mn, args, _rpc_timeout)
+                    if (_ow if _rpc_oneway is None else _rpc_oneway) and (
+                        FEATURE_ONEWAY in self.peerFeatures
+                    ):
+                        return self.notify(request)
+                    if self.pipelining and FEATURE_PIPELINE in self.peerFeatures:
+                        return RemotePromise(self, request, _rpc_timeout)
+                    return self.waitForRequest(request, _rpc_timeout)
+
+                setattr(_remoteCall, _TARGET_ATTR, (_dataId, _methodName))
                 proxy.addMethod(memberName, _remoteCall)
 
         return proxy
 
+    def _buildRequest(
+        self, objectId: str, method: str, args: Any, timeout: Optional[float] = None
+    ) -> RpcMessage:
+        request = {
+            'objectId': objectId,
+            'meta': {},
+            'id': _nextMessageId(self.hostId),
+            'method': method,
+            'args': [self.toArgObj(self.argsAutoWrapper(a)) for a in args],
+        }
+        if timeout is not None:
+            request['meta']['timeout'] = timeout
+        return request
+
+    def batch(self, ordered: bool = False) -> 'Batch':
+        """Collect remote calls and send them as one batch frame.
+
+        ::
+
+            async with client.batch() as b:
+                first = b.call(main.get, 1)
+                second = b.call(other.put, 'k', 2)
+            print(first.result())
+        """
+        return Batch(self, ordered)
+
+    async def sendBatch(
+        self,
+        requests: List[RpcMessage],
+        futures: List['asyncio.Future[Any]'],
+        ordered: bool = False,
+    ) -> None:
+        """Send *requests* in one batch frame; each reply resolves the future
+        at the same index.
+
+        Peers that did not announce batch support get the requests one by
+        one (in sequence when *ordered*).
+        """
+        if FEATURE_BATCH not in self.peerFeatures:
+            async def _one(request: RpcMessage, future: 'asyncio.Future[Any]') -> None:
+                try:
+                    result = await self.waitForRequest(request)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+
+            if ordered:
+                for request, future in zip(requests, futures):
+                    await _one(request, future)
+            else:
+                await asyncio.gather(*(_one(r, f) for r, f in zip(requests, futures)))
+            return
+
+        sender = self.useSender()
+        if sender is None:
+            raise RuntimeError("sender not set")
+        for request, future in zip(requests, futures):
+            self._putAwait(request['id'], future, request)
+        frame = {
+            'id': _nextMessageId(self.hostId),
+            'meta': {},
+            'batch': requests,
+            'ordered': ordered,
+        }
+        self._announceFeatures(frame)
+        try:
+            try:
+                result = sender.send(frame)
+                if asyncio.iscoroutine(result) or asyncio.isfuture(result):
+                    await result
+            except Exception as e:
+                for request, future in zip(requests, futures):
+                    self._getReqPending().pop(request['id'], None)
+                    if not future.done():
+                        future.set_exception(e)
+            await asyncio.wait(futures)
+        except asyncio.CancelledError:
+            for request, future in zip(requests, futures):
+                if not future.done():
+                    self._abandon(request['id'])
+                    future.cancel()
+            raise
+
     def transformArg(self, argObj: RpcMessage, clazz: Any = None) -> Any:
         if argObj.get('type') == 'data':
             return argObj['data']
@@ -502,7 +1247,7 @@ class Client:
     async def getObject(self, objectId: str) -> Any:
         request = {
             'meta': {},
-            'id': _getId(self.hostId),
+            'id': _nextMessageId(self.hostId),
             'objectId': 'main0',
             'method': 'getMain',
             'args': [self.toArgObj(objectId)],
@@ -513,6 +1258,112 @@ class Client:
         return await self.getObject('main')
 
 
+class RemotePromise:
+    """Result of a remote call made with pipelining enabled.
+
+    Awaiting it gives the call's result.  Calling a method on it returns
+    another promise; while the original request has not been sent yet
+    (it goes out on the next loop iteration), the chained request is sent
+    along with it and the peer runs it on the result as soon as that
+    exists.  Chained calls made later simply wait for the result first.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        request: RpcMessage,
+        timeout: Optional[float] = None,
+        base: Optional['RemotePromise'] = None,
+    ) -> None:
+        self._client: Client = client
+        self._request: RpcMessage = request
+        self._timeout: Optional[float] = timeout
+        self._base: Optional['RemotePromise'] = base
+        self._task: Optional['asyncio.Task[Any]'] = None
+        self._chained: bool = False
+        asyncio.get_running_loop().call_soon(self._start)
+
+    def _start(self) -> 'asyncio.Task[Any]':
+        if self._task is None:
+            if self._base is not None:
+                self._base._start()    # the base request must go out first
+            self._task = asyncio.ensure_future(
+                self._client.waitForRequest(self._request, self._timeout)
+            )
+            if self._chained:
+                # a failure also fails the chained calls, which report it
+                self._task.add_done_callback(_consumeException)
+        return self._task
+
+    def __await__(self) -> Any:
+        return self._start().__await__()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def _pipelinedCall(*args: Any, _rpc_timeout: Optional[float] = None) -> Any:
+            if self._task is not None:
+                return self._callAfter(name, args, _rpc_timeout)
+            self._request['meta']['pipeline'] = 1
+            self._chained = True
+            request = self._client._buildRequest(None, name, args, _rpc_timeout)
+            request['promiseFor'] = self._request['id']
+            return RemotePromise(self._client, request, _rpc_timeout, self)
+
+        return _pipelinedCall
+
+    async def _callAfter(self, name: str, args: Tuple[Any, ...], timeout: Optional[float]) -> Any:
+        target = await self
+        return await getattr(target, name)(*args, _rpc_timeout=timeout)
+
+
+def _consumeException(task: 'asyncio.Task[Any]') -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+class Batch:
+    """Calls collected by :meth:`Client.batch`, sent together on exit.
+
+    :meth:`call` takes a method of a RemoteProxy created by the same client
+    and returns a future for that call's result.  Each call succeeds or
+    fails on its own; leaving the ``async with`` block waits for all of
+    them.
+    """
+
+    def __init__(self, client: Client, ordered: bool = False) -> None:
+        self.client: Client = client
+        self.ordered: bool = ordered
+        self.requests: List[RpcMessage] = []
+        self.futures: List['asyncio.Future[Any]'] = []
+
+    def call(self, method: Callable[..., Any], *args: Any) -> 'asyncio.Future[Any]':
+        target = getattr(method, _TARGET_ATTR, None)
+        if target is None:
+            raise TypeError("batch calls need a method of a remote proxy")
+        future = asyncio.get_running_loop().create_future()
+        self.requests.append(self.client._buildRequest(target[0], target[1], args))
+        self.futures.append(future)
+        return future
+
+    async def send(self) -> None:
+        requests, futures = self.requests, self.futures
+        self.requests, self.futures = [], []
+        if requests:
+            await self.client.sendBatch(requests, futures, self.ordered)
+
+    async def __aenter__(self) -> 'Batch':
+        return self
+
+    async def __aexit__(self, excType: Any, exc: Any, tb: Any) -> None:
+        if excType is None:
+            await self.send()
+        else:
+            for future in self.futures:
+                future.cancel()
+
+
 # ---------------------------------------------------------------------------
 # Options (per-host state)
 # ---------------------------------------------------------------------------
@@ -538,6 +1389,10 @@ def _getOrCreateOption(
             'session':{},
             'hostId': None if key == _DEFAULT_HOST_KEY else key,
             'requestPendingDict': {},
+            'messageIds': itertools.count(1),
+            'remoteStreams': {},
+            'peers': weakref.WeakSet(),
+            'resultCaches': weakref.WeakSet(),
         }
     return _options[key]
 
@@ -562,6 +1417,106 @@ def _deleteProxy(obj: Any, hostIdVal: Optional[str] = None) -> None:
 # MessageReceiver
 # ---------------------------------------------------------------------------
 
+class _DispatchEntry:
+    """Cached resolution of one (objectId, method) pair."""
+
+    __slots__ = ('func', 'isAsync', 'withContext', 'interceptors', 'cache', 'coalesce')
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        withContext: bool,
+        interceptors: Tuple[Callable[..., Any], ...],
+        cache: Optional[ResultCache] = None,
+        coalesce: bool = False,
+    ) -> None:
+        self.func: Callable[..., Any] = func
+        self.isAsync: bool = asyncio.iscoroutinefunction(func)
+        self.withContext: bool = withContext
+        self.interceptors: Tuple[Callable[..., Any], ...] = interceptors
+        self.cache: Optional[ResultCache] = cache
+        self.coalesce: bool = coalesce and not withContext
+
+
+_NO_REPLY: Any = object()
+
+
+class _InterceptorScope:
+    """An interceptor plus the objects/methods it applies to."""
+
+    __slots__ = ('interceptor', 'objectId', 'methodPattern')
+
+    def __init__(
+        self,
+        interceptor: Callable[..., Any],
+        objectId: Optional[str],
+        method: Optional[str],
+    ) -> None:
+        self.interceptor: Callable[..., Any] = interceptor
+        self.objectId: Optional[str] = objectId
+        self.methodPattern: Optional['re.Pattern[str]'] = (
+            re.compile(fnmatch.translate(method)) if method is not None else None
+        )
+
+    def applies(self, objId: str, method: str) -> bool:
+        if self.objectId is not None and self.objectId != objId:
+            return False
+        if self.methodPattern is not None and not self.methodPattern.match(method):
+            return False
+        return True
+
+
+class _InterceptorRun:
+    """State of one call travelling through a compiled interceptor pipeline."""
+
+    __slots__ = ('interceptors', 'context', 'message', 'client', 'func', 'args', 'result')
+
+    def __init__(
+        self,
+        interceptors: Tuple[Callable[..., Any], ...],
+        message: RpcMessage,
+        client: 'Client',
+        func: Callable[..., Any],
+        args: List[Any],
+    ) -> None:
+        self.interceptors = interceptors
+        self.context: Dict[str, Any] = {'setContext': self.setResult}
+        self.message = message
+        self.client = client
+        self.func = func
+        self.args = args
+        self.result: Any = None
+
+    def setResult(self, value: Any) -> None:
+        self.result = value
+
+    async def next(self, index: int = 0) -> None:
+        """Run the pipeline from interceptor *index*.  Each interceptor gets a
+        ``next`` bound to its own position, so calling it twice (retry,
+        fallback) runs the rest of the chain twice."""
+        if index < len(self.interceptors):
+            await self.interceptors[index](
+                self.context, self.message, self.client, functools.partial(self.next, index + 1)
+            )
+        else:
+            r = self.func(self.context, *self.args)
+            if inspect.isawaitable(r):
+                r = await r
+            self.result = r
+
+
+def _usesProcessPool(
+    obj: Any, executionPolicy: Optional[Union[ExecutionPolicy, Dict[str, ExecutionPolicy]]]
+) -> bool:
+    policies = executionPolicy.values() if isinstance(executionPolicy, dict) else (executionPolicy,)
+    if any(p is not None and p.kind == PROCESS for p in policies):
+        return True
+    return any(
+        getattr(getExecutionPolicy(member), 'kind', None) == PROCESS
+        for klass in type(obj).__mro__ for member in vars(klass).values()
+    )
+
+
 class MessageReceiver:
     """Receives and dispatches RPC messages (both requests and responses)."""
 
@@ -569,8 +1524,15 @@ class MessageReceiver:
         self.hostId: Optional[str] = hostIdVal
         self.rpcServer: Optional[Any] = None
         self.interceptors: List[Callable[..., Any]] = []
+        self._interceptorScopes: List[_InterceptorScope] = []
+        self.executionPolicies: Dict[str, Union[ExecutionPolicy, Dict[str, ExecutionPolicy]]] = {}
         self.objectWithContext: Set[str] = set()
         self.resultAutoWrapper: AutoWrapper = _shallowAutoWrapper
+        self._dispatchTable: _DispatchTable = _DispatchTable()
+        self.getProxyManager().addDispatchTable(self._dispatchTable)
+        self.errorDetail: str = _errorDetail
+        # running executions of @coalesce handlers, by (caller, (objectId, method, args))
+        self._sharedRuns: Dict[Any, 'asyncio.Task[Any]'] = {}
 
         # Register the built-in 'main0' handler object
         hostIdToSend = self.getHostId()
@@ -605,19 +1567,80 @@ class MessageReceiver:
     def getReqPending(self) -> Dict[str, Any]:
         return _getOrCreateOption(self.hostId)['requestPendingDict']
 
+    def _getRemoteStreams(self) -> Dict[Any, 'RemoteStream']:
+        return _getOrCreateOption(self.hostId)['remoteStreams']
+
     # -- configuration ----------------------------------------------------
 
     def setMain(self, obj: Any) -> None:
         self.rpcServer = obj
         self.setObject('main', self.rpcServer, False)
 
-    def setObject(self, objId: str, obj: Any, withContext: bool) -> None:
-        self.getProxyManager().set(obj, objId)
+    def setObject(
+        self,
+        objId: str,
+        obj: Any,
+        withContext: bool,
+        executionPolicy: Optional[Union[ExecutionPolicy, Dict[str, ExecutionPolicy]]] = None,
+    ) -> None:
+        """Expose *obj* under *objId*.
+
+        *executionPolicy* runs the object's synchronous methods in a thread or
+        process pool; pass a dict to choose a policy per method name.  A
+        policy set on a method with :func:`runIn` takes precedence.  When any
+        method runs in a process pool, *obj* must be picklable.
+        """
+        if _usesProcessPool(obj, executionPolicy):
+            checkPicklable(obj, objId)
         if withContext:
             self.objectWithContext.add(objId)
+        if executionPolicy is not None:
+            self.executionPolicies[objId] = executionPolicy
+        else:
+            self.executionPolicies.pop(objId, None)
+        self.getProxyManager().set(obj, objId)
 
-    def addInterceptor(self, interceptor: Callable[..., Any]) -> None:
+    def setErrorDetail(self, level: str) -> None:
+        """How much callers learn about failed handlers: ``'none'``,
+        ``'message'`` or ``'trace'`` (the default)."""
+        if level not in (ERROR_DETAIL_NONE, ERROR_DETAIL_MESSAGE, ERROR_DETAIL_TRACE):
+            raise ValueError(f"unknown error detail level '{level}'")
+        self.errorDetail = level
+
+    def pushInvalidation(self, key: Optional[str] = None, objectId: Optional[str] = None) -> None:
+        """Invalidate the response caches of every connected peer of this host
+        for *key* and/or *objectId*."""
+        for client in list(_getOrCreateOption(self.hostId)['peers']):
+            client.pushInvalidation(key, objectId)
+
+    def invalidateCache(self, objectId: Optional[str] = None, method: Optional[str] = None) -> None:
+        """Drop cached results of ``@cached`` methods served on this host, by
+        this receiver or any other (TCP and WebSocket servers have one per
+        connection)."""
+        for cache in list(_getOrCreateOption(self.hostId)['resultCaches']):
+            cache.invalidate(objectId, method)
+
+    def addInterceptor(
+        self,
+        interceptor: Callable[..., Any],
+        objectId: Optional[str] = None,
+        method: Optional[str] = None,
+    ) -> None:
+        """Add *interceptor* to the pipeline of context objects.
+
+        *objectId* limits it to one object and *method* (a glob pattern such
+        as ``'get*'``) to matching method names; calls outside the scope skip
+        the interceptor entirely.
+        """
         self.interceptors.append(interceptor)
+        self._interceptorScopes.append(_InterceptorScope(interceptor, objectId, method))
+        self._dispatchTable.clear()
+
+    def _interceptorsFor(self, objId: str, method: str) -> Tuple[Callable[..., Any], ...]:
+        return tuple(
+            scope.interceptor for scope in self._interceptorScopes
+            if scope.applies(objId, method)
+        )
 
     def setResultAutoWrapper(self, wrapper: AutoWrapper) -> None:
         self.resultAutoWrapper = wrapper
@@ -628,38 +1651,268 @@ class MessageReceiver:
     # -- interceptor chain ------------------------------------------------
 
     async def withContext(
-        self, message: RpcMessage, client: Client, args: List[Any], func: Callable[..., Any]
+        self, message: RpcMessage, client: Client, args: List[Any], func: Callable[..., Any],
+        interceptors: Optional[Tuple[Callable[..., Any], ...]] = None,
     ) -> Any:
-        resultContainer: Dict[str, Any] = {}
-
-        context = {
-            'setContext': lambda r: resultContainer.__setitem__('value', r),
-        }
-
-        def generateInterceptorExecutor(index: int) -> Callable:
-            if index < len(self.interceptors):
-                async def executeThis():
-                    interceptor = self.interceptors[index]
-
-                    async def generateAndExecuteNext():
-                        executor = generateInterceptorExecutor(index + 1)
-                        await executor()
-
-                    await interceptor(context, message, client, generateAndExecuteNext)
-
-                return executeThis
+        if interceptors is None:
+            interceptors = self._interceptorsFor(message['objectId'], message['method'])
+        run = _InterceptorRun(interceptors, message, client, func, args)
+        await run.next()
+        return run.result
+
+    # -- dispatch cache ---------------------------------------------------
+
+    def _resolveEntry(self, objId: str, method: str) -> Optional[_DispatchEntry]:
+        """Resolve and cache the handler for *method* on object *objId*.
+
+        Returns ``None`` when the object does not exist; a missing method
+        raises like a normal attribute/key lookup and is not cached.
+        """
+        obj = self.getProxyManager().getById(objId)
+        if obj is None:
+            return None
+        if method == '__call__':
+            func = obj
+        elif isinstance(obj, dict):
+            func = obj[method]
+        else:
+            func = getattr(obj, method)
+        withContext = objId in self.objectWithContext
+        cache = getResultCache(func)
+        if cache is not None:
+            if withContext:
+                raise ValueError(
+                    f"'{objId}.{method}' runs with context and cannot be cached"
+                )
+            _getOrCreateOption(self.hostId)['resultCaches'].add(cache)
+        options = getMemberOptions(func)
+        coalesce = bool(options and options.get('coalesce'))
+        policy = self._executionPolicyFor(objId, method, func)
+        if policy is not None and not policy.isInline and not asyncio.iscoroutinefunction(func):
+            if withContext and policy.kind == PROCESS:
+                raise ValueError(
+                    f"'{objId}.{method}' runs with context and cannot use a process pool"
+                )
+            func = policy.bind(func)
+        entry = _DispatchEntry(
+            func,
+            withContext,
+            self._interceptorsFor(objId, method) if withContext else (),
+            cache,
+            coalesce,
+        )
+        self._dispatchTable.entries.setdefault(objId, {})[method] = entry
+        return entry
+
+    def _executionPolicyFor(
+        self, objId: str, method: str, func: Callable[..., Any]
+    ) -> Optional[ExecutionPolicy]:
+        policy = getExecutionPolicy(func)
+        if policy is not None:
+            return policy
+        configured = self.executionPolicies.get(objId)
+        if isinstance(configured, dict):
+            return configured.get(method)
+        return configured
+
+    def _buildReply(
+        self,
+        client: Client,
+        idFor: Any,
+        status: int,
+        data: Any = None,
+        trace: Optional[str] = None,
+        error: Optional[Dict[str, Any]] = None,
+    ) -> RpcMessage:
+        """Build a reply in the compact layout when the peer accepts it."""
+        failed = trace is not None or error is not None
+        if FEATURE_COMPACT in client.peerFeatures:
+            if not failed:
+                reply = {'idFor': idFor, 'status': status, 'data': data}
             else:
-                async def executeFinal():
-                    r = func(context, *args)
-                    if asyncio.iscoroutine(r) or asyncio.isfuture(r):
-                        r = await r
-                    resultContainer['value'] = r
+                reply = {'idFor': idFor, 'status': status}
+        else:
+            reply = {
+                'id': _nextMessageId(self.hostId),
+                'objectId': '',
+                'method': '',
+                'args': [],
+                'meta': {},
+                'idFor': idFor,
+                'data': {'type': 'data', 'data': None} if failed else data,
+                'status': status,
+            }
+        if trace is not None:
+            reply['trace'] = trace
+        if error is not None:
+            reply['error'] = error
+        client._announceFeatures(reply)
+        return reply
+
+    def _errorFields(self, e: BaseException, client: Client) -> Dict[str, Any]:
+        """Reply fields describing handler exception *e*.
+
+        The traceback is only formatted (and logged) at the ``trace`` level
+        and never for :class:`RpcError`, so expected business errors stay
+        cheap.  Peers without structured errors get a one-line trace.
+        """
+        level = self.errorDetail
+        fields: Dict[str, Any] = {}
+        if level == ERROR_DETAIL_TRACE and not isinstance(e, RpcError):
+            fields['trace'] = traceback.format_exc()
+            logger.error("[%s] error handling request: %s\n%s", self.getHostId(), e, fields['trace'])
+        elif debugFlag:
+            logger.debug("[%s] handler raised %s: %s", self.getHostId(), type(e).__name__, e)
+        if FEATURE_ERRORS in client.peerFeatures:
+            error: Dict[str, Any] = {'type': type(e).__name__}
+            code = getattr(e, 'code', None)
+            if isinstance(code, (int, str)):
+                error['code'] = code
+            if level != ERROR_DETAIL_NONE:
+                error['message'] = str(e)
+                error['args'] = [a if isPlainData(a) else repr(a) for a in e.args]
+            fields['error'] = error
+        elif 'trace' not in fields:
+            fields['trace'] = (
+                type(e).__name__ if level == ERROR_DETAIL_NONE else f"{type(e).__name__}: {e}"
+            )
+        return fields
 
-                return executeFinal
+    async def _invoke(
+        self, entry: _DispatchEntry, message: RpcMessage, client: Client, args: List[Any]
+    ) -> Any:
+        if entry.withContext:
+            return await self.withContext(message, client, args, entry.func, entry.interceptors)
+        if entry.isAsync:
+            return await entry.func(*args)
+        result = entry.func(*args)
+        # not asyncio.iscoroutine: that also accepts plain generators
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
-        first = generateInterceptorExecutor(0)
-        await first()
-        return resultContainer.get('value')
+    def _joinSharedRun(
+        self,
+        key: Any,
+        entry: _DispatchEntry,
+        message: RpcMessage,
+        client: Client,
+        args: List[Any],
+    ) -> 'asyncio.Future[Any]':
+        """Awaitable result of the running execution for *key*, started if
+        there is none.  Cancelling it leaves the execution running."""
+        shared = self._sharedRuns.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self._invoke(entry, message, client, args))
+            self._sharedRuns[key] = shared
+            shared.add_done_callback(lambda t: self._sharedRuns.pop(key, None))
+        return asyncio.shield(shared)
+
+    async def _invokeTracked(
+        self,
+        call: Any,
+        message: RpcMessage,
+        client: Client,
+        deadline: Optional[float],
+    ) -> Any:
+        """Run the handler *call* as a task the peer can cancel, bounded by
+        *deadline*.  Only needed when the request has a deadline or does
+        not run in a task of its own (serial dispatch).
+
+        Returns ``_NO_REPLY`` when the request was cancelled by the caller or
+        ran past its deadline; nobody is waiting for a reply then.
+        """
+        task = asyncio.ensure_future(call)
+        client._trackInflight(message['id'], task)
+        try:
+            await asyncio.wait(
+                (task,), timeout=None if deadline is None else deadline - time.monotonic()
+            )
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not task.done():
+            task.cancel()
+            if debugFlag:
+                logger.debug("[%s] cancelled expired request %s", self.getHostId(), message['id'])
+            return _NO_REPLY
+        if task.cancelled():
+            if debugFlag:
+                logger.debug("[%s] request %s cancelled by caller", self.getHostId(), message['id'])
+            return _NO_REPLY
+        return task.result()
+
+
+    def _onControl(self, message: RpcMessage, client: Client) -> None:
+        streamFor = message.get('streamFor')
+        if streamFor is not None:
+            stream = self._getRemoteStreams().get(streamFor)
+            if stream is not None:
+                stream._feed(message)
+            elif debugFlag:
+                logger.debug("[%s] no stream for id %s: %s", self.getHostId(), streamFor, message)
+        elif 'creditFor' in message:
+            client._grantCredit(message['creditFor'], message.get('n', 1))
+        elif 'invalidate' in message:
+            client._applyInvalidation(message['invalidate'])
+        else:
+            client._cancelInflight(message['cancelFor'])
+
+    async def _sendStream(self, client: Client, reqId: Any, gen: Any) -> None:
+        """Send the items of generator *gen* as chunk frames of stream *reqId*.
+
+        The consumer grants credit as it reads, so at most ``_streamWindow``
+        chunks are ever buffered on its side.  A cancel frame for *reqId*
+        stops the stream and closes the generator.
+        """
+        credit = asyncio.Semaphore(_streamWindow)
+        client._outStreams[reqId] = credit
+        if client._runsInflight(reqId):
+            try:
+                await self._pumpStream(client, reqId, gen, credit)
+            finally:
+                client._outStreams.pop(reqId, None)
+            return
+        task = asyncio.ensure_future(self._pumpStream(client, reqId, gen, credit))
+        client._trackInflight(reqId, task)
+        try:
+            await asyncio.wait((task,))
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            client._outStreams.pop(reqId, None)
+        if task.cancelled():
+            if debugFlag:
+                logger.debug("[%s] stream %s cancelled by consumer", self.getHostId(), reqId)
+
+    async def _pumpStream(
+        self, client: Client, reqId: Any, gen: Any, credit: asyncio.Semaphore
+    ) -> None:
+        head = self._buildReply(client, reqId, 200)
+        head['stream'] = 1
+        head['window'] = _streamWindow
+        await client.sendReply(head)
+        try:
+            if inspect.isasyncgen(gen):
+                async for item in gen:
+                    await credit.acquire()
+                    await client.sendReply({'streamFor': reqId, 'chunk': client.toArgObj(item)})
+            else:
+                for item in gen:
+                    await credit.acquire()
+                    await client.sendReply({'streamFor': reqId, 'chunk': client.toArgObj(item)})
+        except Exception as e:
+            frame = {'streamFor': reqId, 'status': -1}
+            frame.update(self._errorFields(e, client))
+            await client.sendReply(frame)
+            return
+        finally:
+            if inspect.isasyncgen(gen):
+                await gen.aclose()
+            else:
+                gen.close()
+        await client.sendReply({'streamFor': reqId, 'status': 200})
 
     # -- core message handling -------------------------------------------
 
@@ -669,6 +1922,13 @@ class MessageReceiver:
         if not isinstance(clientForCallback, Client):
             raise TypeError("clientForCallback must be a Client")
 
+        frames = messageRecv.get('frames')
+        if frames is not None:
+            await asyncio.gather(
+                *(self.onReceiveMessage(f, clientForCallback) for f in frames)
+            )
+            return
+
         if debugFlag:
             idFor = messageRecv.get('idFor')
             if idFor:
@@ -682,109 +1942,311 @@ class MessageReceiver:
                     messageRecv,
                 )
 
+        if 'meta' in messageRecv:
+            clientForCallback._learnFeatures(messageRecv)
+
+        if _isControl(messageRecv):
+            self._onControl(messageRecv, clientForCallback)
+            return
+
         # ----- REQUEST -----
         if not _isResponse(messageRecv):
-            message = messageRecv
-            try:
-                obj = self.getProxyManager().getById(message['objectId'])
-                if obj is None:
-                    _maybeAwait(
-                        clientForCallback.useSender().send(
-                            generateErrorReply(message, 'object not found', 100, self.hostId)
-                        )
-                    )
-                    return
-
-                args = [clientForCallback.reverseToArgObj(a) for a in message['args']]
-
-                shouldWithContext = message['objectId'] in self.objectWithContext
-
-                if message['method'] == '__call__':
-                    if shouldWithContext:
-                        result = await self.withContext(
-                            message, clientForCallback, args, obj
-                        )
-                    else:
-                        result = obj(*args)
-                else:
-                    if isinstance(obj, dict):
-                        methodFunc = obj[message['method']]
-                    else:
-                        methodFunc = getattr(obj, message['method'])
-                    if shouldWithContext:
-                        result = await self.withContext(
-                            message, clientForCallback, args, methodFunc
-                        )
-                    else:
-                        result = methodFunc(*args)
-
-                result = self.resultAutoWrapper(result)
-                if asyncio.iscoroutine(result) or asyncio.isfuture(result):
-                    result = await result
-
-                wrappedResult = clientForCallback.toArgObj(result)
-
-                reply = {
-                    'id': _getId(self.hostId),
-                    'objectId': '',
-                    'method': '',
-                    'args': [],
-                    'meta': {},
-                    'idFor': message['id'],
-                    'data': wrappedResult,
-                    'status': 200,
-                }
-                _maybeAwait(clientForCallback.useSender().send(reply))
+            if 'batch' in messageRecv:
+                reply = await self._handleBatch(messageRecv, clientForCallback)
+            else:
+                reply = await self._handleRequest(messageRecv, clientForCallback)
+            if reply is not None and clientForCallback.useSender():
+                await clientForCallback.sendReply(reply)
 
+        # ----- RESPONSE -----
+        else:
+            self._onResponse(messageRecv, clientForCallback)
+
+    async def _handleRequest(
+        self, message: RpcMessage, clientForCallback: Client, allowStream: bool = True
+    ) -> Optional[RpcMessage]:
+        promiseFor = message.get('promiseFor')
+        if promiseFor is not None:
+            try:
+                message['objectId'] = await clientForCallback._pipelinedTarget(promiseFor)
             except Exception as e:
-                traceStr = traceback.format_exc()
-                errorReply = {
-                    'id': _getId(self.hostId),
-                    'objectId': '',
-                    'method': '',
-                    'args': [],
-                    'meta': {},
-                    'idFor': message['id'],
-                    'data': {'type': 'data', 'data': None},
-                    'trace': traceStr,
-                    'status': -1,
-                }
-                if clientForCallback.useSender():
-                    _maybeAwait(clientForCallback.useSender().send(errorReply))
-                print(f"Error handling request: {e}")
+                return self._buildReply(clientForCallback, message['id'], 100, trace=str(e))
+        meta = message.get('meta')
+        if meta and meta.get('noReply'):
+            await self._runRequest(message, clientForCallback, False, False)
+            return None
+        if not (meta and meta.get('pipeline')):
+            return await self._runRequest(message, clientForCallback, allowStream)
 
-        # ----- RESPONSE -----
+        # keep the result addressable for the requests chained onto this one
+        try:
+            reply = await self._runRequest(message, clientForCallback, False)
+        except asyncio.CancelledError:
+            clientForCallback._settlePipelined(message['id'], None, 'cancelled')
+            raise
+        data = reply.get('data') if reply is not None else None
+        if isinstance(data, dict) and clientForCallback.argTranslator.typeIndicator in data:
+            clientForCallback._settlePipelined(message['id'], data['id'])
+        elif reply is None:
+            clientForCallback._settlePipelined(message['id'], None, 'no result')
+        elif reply['status'] != 200:
+            clientForCallback._settlePipelined(
+                message['id'], None, reply.get('trace') or reply.get('error') or 'failed'
+            )
         else:
-            idFor = messageRecv['idFor']
-            message = messageRecv
-            reqPending = self.getReqPending()
+            clientForCallback._settlePipelined(message['id'], None, 'result is not an object')
+        return reply
+
+    async def _runRequest(
+        self,
+        message: RpcMessage,
+        clientForCallback: Client,
+        allowStream: bool = True,
+        wantReply: bool = True,
+    ) -> Optional[RpcMessage]:
+        """Run one request and return its reply.
+
+        Returns ``None`` when no reply is due: the request is one-way,
+        expired or was cancelled, or its result has already been streamed.
+        """
+        try:
+            objMethods = self._dispatchTable.entries.get(message['objectId'])
+            entry = objMethods.get(message['method']) if objMethods else None
+            if entry is None:
+                entry = self._resolveEntry(message['objectId'], message['method'])
+            if entry is None:
+                if not wantReply:
+                    logger.warning("[%s] one-way call to unknown '%s.%s'", self.getHostId(),
+                                   message['objectId'], message['method'])
+                    return None
+                return self._buildReply(
+                    clientForCallback, message['id'], 100, trace='object not found'
+                )
 
-            if idFor not in reqPending:
-                print(
-                    f"[{self.getHostId()}] no pending request for id {idFor}",
-                    message,
+            deadline = _stampDeadline(message)
+            if deadline is not None and deadline <= time.monotonic():
+                if debugFlag:
+                    logger.debug("[%s] dropped expired request %s", self.getHostId(), message['id'])
+                return None
+
+            args = [clientForCallback.reverseToArgObj(a) for a in message['args']]
+
+            callKey = None
+            if entry.cache is not None or entry.coalesce:
+                frozen = freezeArgs(args)
+                if frozen is not None:
+                    callKey = (message['objectId'], message['method'], frozen)
+            cacheKey = callKey if entry.cache is not None else None
+            if cacheKey is not None:
+                hit = entry.cache.get(cacheKey)
+                if hit is not MISS:
+                    if not wantReply:
+                        return None
+                    return self._buildReply(clientForCallback, message['id'], 200, hit)
+
+            if entry.coalesce and callKey is not None:
+                # only the same connection may join: another caller must not
+                # receive a result (or an error) produced for someone else
+                call = self._joinSharedRun(
+                    (clientForCallback, callKey), entry, message, clientForCallback, args
                 )
-                return
+            else:
+                call = self._invoke(entry, message, clientForCallback, args)
+            if deadline is None and (
+                FEATURE_CANCEL not in clientForCallback.peerFeatures
+                or clientForCallback._runsInflight(message['id'])
+            ):
+                # a cancel frame, if any, cancels this very task
+                result = await call
+            else:
+                result = await self._invokeTracked(call, message, clientForCallback, deadline)
+                if result is _NO_REPLY:
+                    return None
+
+            if not wantReply:
+                return None
+
+            if (
+                allowStream
+                and (inspect.isasyncgen(result) or inspect.isgenerator(result))
+                and FEATURE_STREAM in clientForCallback.peerFeatures
+            ):
+                await self._sendStream(clientForCallback, message['id'], result)
+                return None
+
+            result = self.resultAutoWrapper(result)
+            if asyncio.iscoroutine(result) or asyncio.isfuture(result):
+                result = await result
 
-            req = reqPending.pop(idFor)
-            future: asyncio.Future = req['future']
+            wrappedResult = clientForCallback.toArgObj(result)
+            if cacheKey is not None and isPlainData(result):
+                entry.cache.put(cacheKey, wrappedResult)
 
-            if message['status'] == 200:
-                if not future.done():
-                    future.set_result(
-                        clientForCallback.reverseToArgObj(message['data'])
-                    )
+            return self._buildReply(clientForCallback, message['id'], 200, wrappedResult)
+
+        except Exception as e:
+            if not wantReply:
+                if not isinstance(e, RpcError):
+                    logger.error("[%s] error handling one-way request: %s", self.getHostId(), e)
+                return None
+            return self._buildReply(
+                clientForCallback, message['id'], -1, **self._errorFields(e, clientForCallback)
+            )
+
+    async def _handleBatch(self, message: RpcMessage, clientForCallback: Client) -> RpcMessage:
+        """Run the calls of a batch frame and collect their replies.
+
+        Calls run concurrently unless the batch is ``ordered``.  Each call
+        keeps its own status; results are never streamed inside a batch.
+        """
+        requests = message['batch']
+        if message.get('ordered'):
+            replies = []
+            for request in requests:
+                replies.append(await self._handleRequest(request, clientForCallback, False))
+        else:
+            replies = await asyncio.gather(
+                *(self._handleRequest(r, clientForCallback, False) for r in requests)
+            )
+        reply = self._buildReply(clientForCallback, message['id'], 200)
+        reply['batch'] = [r for r in replies if r is not None]
+        return reply
+
+    def _onResponse(self, message: RpcMessage, clientForCallback: Client) -> None:
+        subReplies = message.get('batch')
+        if subReplies is not None:
+            for sub in subReplies:
+                self._onResponse(sub, clientForCallback)
+            return
+
+        idFor = message['idFor']
+        reqPending = self.getReqPending()
+
+        if idFor not in reqPending:
+            print(
+                f"[{self.getHostId()}] no pending request for id {idFor}",
+                message,
+            )
+            return
+
+        req = reqPending.pop(idFor)
+        future: asyncio.Future = req.future
+
+        if message['status'] == 200:
+            if future.done():
+                return
+            if message.get('stream'):
+                stream = RemoteStream(clientForCallback, idFor, message.get('window', 1))
+                self._getRemoteStreams()[idFor] = stream
+                future.set_result(stream)
             else:
-                if not future.done():
-                    future.set_exception(RpcRemoteError(message))
+                future.set_result(
+                    clientForCallback.reverseToArgObj(message.get('data'))
+                )
+        else:
+            if not future.done():
+                future.set_exception(RpcRemoteError(message))
+
+
+class RemoteStream:
+    """Async iterator over a result the peer streams from a generator.
+
+    Returned by a remote call whose handler produced a (sync or async)
+    generator.  Chunks arrive as the producer yields them; reading them
+    grants the producer more credit.  Closing the stream early (``aclose``
+    or leaving ``async with``) cancels the producer.
+    """
+
+    def __init__(self, client: Client, streamId: Any, window: int) -> None:
+        self.client: Client = client
+        self.id: Any = streamId
+        self.window: int = window
+        self.lastFrameTime: float = time.time()
+        self._items: 'asyncio.Queue[Tuple[bool, Any]]' = asyncio.Queue()
+        self._consumed: int = 0
+        self._finished: bool = False   # final frame received
+        self._closed: bool = False     # nothing more will be returned
+
+    def _feed(self, message: RpcMessage) -> None:
+        self.lastFrameTime = time.time()
+        if 'chunk' in message:
+            self._items.put_nowait((True, self.client.reverseToArgObj(message['chunk'])))
+            return
+        self._finish(None if message.get('status') == 200 else RpcRemoteError(message))
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        if not self._finished:
+            self._finished = True
+            self.client._getRemoteStreams().pop(self.id, None)
+            self._items.put_nowait((False, error))
+
+    def __aiter__(self) -> 'RemoteStream':
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._closed:
+            raise StopAsyncIteration
+        isChunk, value = await self._items.get()
+        if not isChunk:
+            self._closed = True
+            if value is None:
+                raise StopAsyncIteration
+            raise value
+        self._consumed += 1
+        if not self._finished and self._consumed * 2 >= self.window:
+            self.client._sendControl({'creditFor': self.id, 'n': self._consumed})
+            self._consumed = 0
+        return value
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if not self._finished:
+            self._finished = True
+            self.client._getRemoteStreams().pop(self.id, None)
+            self.client._abandon(self.id)
+
+    async def __aenter__(self) -> 'RemoteStream':
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+
+class RpcError(Exception):
+    """Expected (business) error raised by a handler.
+
+    Replies for it never carry a traceback and nothing is printed; the
+    caller's :class:`RpcRemoteError` gets its type name, *code*, message
+    and args.
+    """
+
+    def __init__(self, message: str = '', *args: Any, code: Optional[Union[int, str]] = None) -> None:
+        super().__init__(message, *args)
+        self.code: Optional[Union[int, str]] = code
+
+    def __str__(self) -> str:
+        return str(self.args[0]) if self.args else ''
 
 
 class RpcRemoteError(Exception):
-    """Raised when the remote side returns a non-200 status."""
+    """Raised when the remote side returns a non-200 status.
+
+    ``type``, ``code``, ``message`` and ``remoteArgs`` describe the remote
+    exception as far as the peer's error detail level reveals it.
+    """
 
     def __init__(self, response: RpcMessage) -> None:
         self.response: RpcMessage = response
-        trace: str = response.get('trace', '')
+        error: Dict[str, Any] = response.get('error') or {}
+        self.type: Optional[str] = error.get('type')
+        self.code: Optional[Union[int, str]] = error.get('code')
+        self.message: Optional[str] = error.get('message')
+        self.remoteArgs: List[Any] = error.get('args') or []
+        trace: Optional[str] = response.get('trace')
+        if trace is None:
+            trace = self.type or ''
+            if self.message:
+                trace = f"{trace}: {self.message}"
         super().__init__(f"Remote error (status={response.get('status')}): {trace}")
 
 
@@ -796,10 +2258,29 @@ def _isResponse(message: RpcMessage) -> bool:
     return message.get('idFor') is not None
 
 
-def _maybeAwait(result: Any) -> None:
-    """Fire-and-forget for sender calls that may return a coroutine."""
-    if asyncio.iscoroutine(result):
-        asyncio.ensure_future(result)
+def _isControl(message: RpcMessage) -> bool:
+    """Frames that neither call a method nor answer a call: cancel, stream
+    chunks, stream credit and cache invalidation."""
+    return (
+        'cancelFor' in message or 'streamFor' in message
+        or 'creditFor' in message or 'invalidate' in message
+    )
+
+
+def _stampDeadline(message: RpcMessage) -> Optional[float]:
+    """Turn a request's relative ``meta.timeout`` into a local deadline.
+
+    Transports call this as soon as a message is read so that time spent
+    waiting for a dispatch slot counts against the deadline.
+    """
+    deadline = message.get('_deadline')
+    if deadline is None:
+        meta = message.get('meta')
+        timeout = meta.get('timeout') if meta else None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+            message['_deadline'] = deadline
+    return deadline
 
 
 # ---------------------------------------------------------------------------
@@ -878,7 +2359,7 @@ async def autoReRegister() -> None:
 
             request = {
                 'meta': {},
-                'id': _getId(opt['hostId']),
+                'id': _nextMessageId(client.hostId),
                 'objectId': 'main0',
                 'method': 'reRegister',
                 'args': [client.toArgObj(toReRegister)],
@@ -903,14 +2384,18 @@ def _killTimeoutConnection(
         reqPending = opt['requestPendingDict']
         toDelete = []
         for reqId, value in reqPending.items():
-            if time.time() - value['sendTime'] > millisec:
-                future = value['future']
+            if time.time() - value.sendTime > millisec:
+                future = value.future
                 if not future.done():
                     future.set_exception(TimeoutError("timeout"))
                 toDelete.append(reqId)
         for reqId in toDelete:
             del reqPending[reqId]
 
+        for stream in list(opt['remoteStreams'].values()):
+            if stream._items.empty() and time.time() - stream.lastFrameTime > millisec:
+                stream._finish(TimeoutError("timeout"))
+
     _forOptions(_check)
 
 